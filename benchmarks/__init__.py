@@ -0,0 +1,4 @@
+"""
+Benchmarks package for FastAPI application.
+Standalone scripts that measure the performance of the app's building blocks.
+"""
@@ -0,0 +1,84 @@
+"""
+Benchmark: /external/post/{post_id}, new httpx client per request vs shared pool
+
+Boots the app in-process (httpx.ASGITransport) with EXTERNAL_API_BASE_URL
+pointing at a local stub upstream, then fires the same load twice:
+- "per-request": the old behaviour, one AsyncClient (and TCP connection) per call
+- "pooled": the app-wide client created by the lifespan handler
+
+Run: python -m benchmarks.bench_http_client --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from .bench_item_store import percentile
+from .stub_upstream import StubUpstream
+
+async def run_load(app, total: int, concurrency: int) -> tuple[float, list[int]]:
+    """Return (requests per second, sorted latencies in ns)"""
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        async def one(i: int):
+            async with semaphore:
+                start = time.perf_counter_ns()
+                response = await client.get(f"/external/post/{i % 250 + 1}")
+                latencies.append(time.perf_counter_ns() - start)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return total / elapsed, latencies
+
+class _PerRequestClient:
+    """Mimics the old code: `async with httpx.AsyncClient() as client` on every call"""
+
+    def __init__(self, base_url: str):
+        self.base_url = httpx.URL(base_url)
+
+    async def get(self, url: str, **kwargs):
+        async with httpx.AsyncClient(base_url=self.base_url) as client:
+            return await client.get(url, **kwargs)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    stub = StubUpstream().start_in_thread()
+    os.environ["EXTERNAL_API_BASE_URL"] = stub.base_url
+
+    from main import app, lifespan
+    from core.config import get_settings
+    from core.upstream import UpstreamClient, get_upstream
+    from routers.external import post_cache
+
+    async with lifespan(app):
+        modes = {
+            "pooled": None,
+            "per-request": lambda: UpstreamClient(_PerRequestClient(stub.base_url), get_settings()),
+        }
+        print(f"{'mode':>12} | {'req/s':>9} | {'p50':>9} {'p99':>9} | upstream connections")
+        for mode, override in modes.items():
+            post_cache.clear()  # Measure the upstream calls, not the cache
+            post_cache.ttl = 0
+            if override:
+                app.dependency_overrides[get_upstream] = override
+            connections_before = stub.connections_opened
+            rps, latencies = await run_load(app, args.requests, args.concurrency)
+            app.dependency_overrides.clear()
+            print(
+                f"{mode:>12} | {rps:>9.0f} | {percentile(latencies, 50) / 1e6:>7.2f}ms "
+                f"{percentile(latencies, 99) / 1e6:>7.2f}ms | {stub.connections_opened - connections_before}"
+            )
+
+if __name__ == "__main__":
+    asyncio.run(main())
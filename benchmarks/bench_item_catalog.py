@@ -0,0 +1,121 @@
+"""
+Benchmark: item records as dicts vs the columnar ItemCatalog
+
+Memory: bytes per item of the records themselves plus what price filters
+need (the dicts + an item_id index + a sorted (price, item_id) list, as the
+store used to keep them) against the catalog's columns, measured with
+tracemalloc. The name search index and the precomputed JSON are the same
+in both and are left out.
+
+Time: what /items/stats computes for a price range (count, min/max/avg,
+a 10-bin histogram, releases per month) by walking the dicts vs on the
+catalog's sorted price column, and the same without a range (every item).
+
+Run: python -m benchmarks.bench_item_catalog
+     python -m benchmarks.bench_item_catalog --sizes 10000 100000 --queries 100
+"""
+import argparse
+import collections
+import gc
+import random
+import time
+import tracemalloc
+
+from storage import ItemCatalog
+from .bench_item_store import percentile
+
+WORDS = ["Laptop", "Mouse", "Keyboard", "Monitor", "Webcam", "Speakers", "Headphones", "Tablet", "Phone"]
+
+def build_items(size: int) -> list[dict]:
+    return [
+        {
+            "item_id": i,
+            "name": f"{random.choice(WORDS)} {random.choice(WORDS).lower()}",  # Names repeat, as in a real catalog
+            "price": round(random.uniform(1, 1000), 2),
+            "release_date": f"202{random.randint(0, 5)}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}T10:00:00+02:00",
+        }
+        for i in range(1, size + 1)
+    ]
+
+def build_dicts(items: list[dict]):
+    # What ItemStore kept before: the records, an id index and a sorted price list
+    records = [dict(item) for item in items]
+    by_id = {record["item_id"]: record for record in records}
+    prices = sorted((record["price"], record["item_id"]) for record in records)
+    return records, by_id, prices
+
+def build_catalog(items: list[dict]) -> ItemCatalog:
+    catalog = ItemCatalog()
+    catalog.extend(items)
+    return catalog
+
+def measure_memory(build, items: list[dict]) -> float:
+    """Bytes per item allocated by build(items) and still alive afterwards"""
+    # The inputs are copies of strings, like the JSON the API would have parsed
+    copies = [dict(item, name="".join(item["name"]), release_date="".join(item["release_date"])) for item in items]
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    built = build(copies)
+    del copies  # Only what the structure itself keeps counts
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return (after - before) / len(items)
+
+def dict_stats(records: list[dict], min_price: float, max_price: float, bins: int = 10) -> dict:
+    # What a stats endpoint over the dicts has to do: visit every item
+    selected = [r for r in records if r.get("price") is not None and min_price <= r["price"] <= max_price]
+    if not selected:
+        return {"count": 0}
+    prices = [r["price"] for r in selected]
+    low, high = min(prices), max(prices)
+    width = (high - low) / bins or 1.0
+    histogram = [0] * bins
+    for price in prices:
+        histogram[min(int((price - low) / width), bins - 1)] += 1
+    months = collections.Counter(r["release_date"][:7] for r in selected if r.get("release_date"))
+    return {"count": len(prices), "min": low, "max": high, "avg": sum(prices) / len(prices),
+            "histogram": histogram, "months": sorted(months.items())}
+
+def measure(run, queries: list[tuple]) -> tuple[float, float]:
+    """Return (p50, p99) latency in milliseconds"""
+    timings = []
+    for min_price, max_price in queries:
+        start = time.perf_counter_ns()
+        run(min_price, max_price)
+        timings.append(time.perf_counter_ns() - start)
+    timings.sort()
+    return percentile(timings, 50) / 1e6, percentile(timings, 99) / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=50, help="Price ranges per size")
+    args = parser.parse_args()
+
+    print(f"{'size':>10} | {'dicts B/item':>12} {'columns B/item':>15} | "
+          f"{'dicts p50':>11} {'columns p50':>12} | {'full stats p50':>15}")
+    for size in args.sizes:
+        items = build_items(size)
+        dict_bytes = measure_memory(build_dicts, items)
+        column_bytes = measure_memory(build_catalog, items)
+
+        records, _, _ = build_dicts(items)
+        catalog = build_catalog(items)
+        queries = []
+        for _ in range(args.queries):
+            low = random.uniform(1, 900)
+            queries.append((low, low + random.uniform(10, 100)))
+
+        dicts_p50, _ = measure(lambda low, high: dict_stats(records, low, high), queries)
+        columns_p50, _ = measure(lambda low, high: catalog.stats(low, high, 10, "month"), queries)
+        full_p50, _ = measure(lambda low, high: catalog.stats(None, None, 10, "month"), queries)
+        print(
+            f"{size:>10} | {dict_bytes:>12.0f} {column_bytes:>15.0f} | "
+            f"{dicts_p50:>9.3f}ms {columns_p50:>10.3f}ms | {full_p50:>13.3f}ms"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: /items/search logic, linear scan vs ItemSearchIndex
+
+Run: python -m benchmarks.bench_item_search
+     python -m benchmarks.bench_item_search --sizes 10000 100000 --queries 200
+"""
+import argparse
+import random
+import time
+
+from storage import ItemStore
+from .bench_item_store import percentile
+
+WORDS = ["laptop", "mouse", "keyboard", "monitor", "webcam", "speakers", "headphones",
+         "microphone", "tablet", "phone", "charger", "cable", "stand", "dock", "router"]
+
+def build_items(size: int) -> list[dict]:
+    return [
+        {
+            "item_id": i,
+            "name": f"{random.choice(WORDS).title()} {random.choice(WORDS)} {i}",
+            "price": round(random.uniform(1, 1000), 2),
+        }
+        for i in range(1, size + 1)
+    ]
+
+def linear_search(items: list[dict], q: str, min_price=None, max_price=None) -> list[dict]:
+    # This is what search_items used to do
+    results = []
+    for item in items:
+        if q.lower() not in item["name"].lower():
+            continue
+        if min_price is not None and item["price"] < min_price:
+            continue
+        if max_price is not None and item["price"] > max_price:
+            continue
+        results.append(item)
+    return results
+
+def build_queries(count: int) -> list[tuple]:
+    queries = []
+    for _ in range(count):
+        word = random.choice(WORDS)
+        start = random.randint(0, len(word) - 3)
+        q = word[start : start + random.randint(3, len(word) - start)]
+        low = random.uniform(1, 900)
+        queries.append((q, low, low + random.uniform(1, 20)))
+    return queries
+
+def measure(search, queries: list[tuple]) -> tuple[float, float]:
+    """Return (p50, p99) latency in milliseconds"""
+    timings = []
+    for q, min_price, max_price in queries:
+        start = time.perf_counter_ns()
+        search(q, min_price, max_price)
+        timings.append(time.perf_counter_ns() - start)
+    timings.sort()
+    return percentile(timings, 50) / 1e6, percentile(timings, 99) / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200, help="Queries per size (text + narrow price range)")
+    args = parser.parse_args()
+
+    print(f"{'size':>10} | {'scan p50':>12} {'scan p99':>12} | {'index p50':>12} {'index p99':>12}")
+    for size in args.sizes:
+        items = build_items(size)
+        store = ItemStore(items)
+        queries = build_queries(args.queries)
+
+        scan_p50, scan_p99 = measure(lambda *query: linear_search(items, *query), queries)
+        index_p50, index_p99 = measure(store.search, queries)
+        print(
+            f"{size:>10} | {scan_p50:>10.3f}ms {scan_p99:>10.3f}ms | "
+            f"{index_p50:>10.3f}ms {index_p99:>10.3f}ms"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: item lookup by ID, linear scan vs ItemStore hash index
+
+Run: python -m benchmarks.bench_item_store
+     python -m benchmarks.bench_item_store --sizes 10000 100000 --lookups 2000
+"""
+import argparse
+import random
+import time
+
+from storage import ItemStore
+
+def build_items(size: int) -> list[dict]:
+    return [
+        {"item_id": i, "name": f"Item {i}", "price": round(random.uniform(1, 1000), 2)}
+        for i in range(1, size + 1)
+    ]
+
+def linear_lookup(items: list[dict], item_id: int):
+    # This is what get_item and read_user_item used to do
+    for item in items:
+        if item["item_id"] == item_id:
+            return item
+    return None
+
+def percentile(sorted_values: list[int], pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[index]
+
+def measure(lookup, ids: list[int]) -> tuple[float, float]:
+    """Return (p50, p99) latency in microseconds"""
+    timings = []
+    for item_id in ids:
+        start = time.perf_counter_ns()
+        lookup(item_id)
+        timings.append(time.perf_counter_ns() - start)
+    timings.sort()
+    return percentile(timings, 50) / 1000, percentile(timings, 99) / 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=1000, help="Lookups per size (random IDs)")
+    args = parser.parse_args()
+
+    print(f"{'size':>10} | {'scan p50':>12} {'scan p99':>12} | {'index p50':>12} {'index p99':>12}")
+    for size in args.sizes:
+        items = build_items(size)
+        store = ItemStore(items)
+        ids = [random.randint(1, size) for _ in range(args.lookups)]
+
+        scan_p50, scan_p99 = measure(lambda item_id: linear_lookup(items, item_id), ids)
+        index_p50, index_p99 = measure(store.get, ids)
+        print(
+            f"{size:>10} | {scan_p50:>10.1f}us {scan_p99:>10.1f}us | "
+            f"{index_p50:>10.2f}us {index_p99:>10.2f}us"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Load test: every router, in-process, with throughput and p50/p95/p99 per route
+
+Boots the whole app (lifespan included) behind httpx.ASGITransport, so no
+server or network is involved: /external/* talks to the local stub upstream,
+/images/* serves a file written to a temporary folder. Each scenario runs
+--requests requests with --concurrency in flight, after a short warm-up.
+
+Run: python -m benchmarks.bench_routes
+     python -m benchmarks.bench_routes --requests 2000 --concurrency 50 --only items,users
+     python -m benchmarks.bench_routes --items 10000 --users 10000 --backend sqlite
+
+Baselines (results are machine-dependent, so keep one per machine):
+     python -m benchmarks.bench_routes --save-baseline bench_baseline.json
+     python -m benchmarks.bench_routes --baseline bench_baseline.json
+The comparison flags a route whose p95 grew, or whose throughput dropped, by
+more than --tolerance (default 20%), and exits with status 1 if any did.
+"""
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import os
+import platform
+import random
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Callable
+
+import httpx
+
+from .bench_item_store import percentile
+from .stub_upstream import StubUpstream
+
+UPLOAD_SIZE = 256 * 1024
+
+@dataclass
+class Scenario:
+    group: str  # Router: items, users, models, external, convert, images
+    name: str
+    request: Callable[[httpx.AsyncClient, int], object]  # (client, i) → awaitable response
+    expected: tuple = (200,)
+
+def png_bytes(width: int = 256, height: int = 256) -> bytes:
+    """A valid gradient PNG, written by hand so the harness doesn't need Pillow"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    rows = b"".join(b"\x00" + bytes((x + y) % 256 for x in range(width) for _ in range(3)) for y in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+def build_scenarios(item_ids: list[int], user_ids: list[str], emails: list[str], upload: bytes) -> list[Scenario]:
+    pick = lambda values, i: values[i % len(values)]
+    counter = itertools.count()
+    files = lambda: {"file": ("photo.png", upload, "image/png")}
+    return [
+        Scenario("items", "GET /items/?limit=20", lambda c, i: c.get("/items/", params={"limit": 20})),
+        Scenario("items", "GET /items/{item_id}", lambda c, i: c.get(f"/items/{pick(item_ids, i)}")),
+        Scenario("items", "GET /items/search", lambda c, i: c.get("/items/search", params={"q": "o", "limit": 20})),
+        Scenario("items", "GET /items/export", lambda c, i: c.get("/items/export")),
+        Scenario("items", "GET /items/stats", lambda c, i: c.get("/items/stats", params={"min_price": 100, "max_price": 900})),
+        Scenario("items", "POST /items/", lambda c, i: c.post("/items/", json={"name": f"Load {i}", "price": "9.99"})),
+        Scenario("users", "GET /users/?limit=20", lambda c, i: c.get("/users/", params={"limit": 20})),
+        Scenario("users", "GET /users/{user_id}", lambda c, i: c.get(f"/users/{pick(user_ids, i)}")),
+        Scenario("users", "GET /users/by-email", lambda c, i: c.get("/users/by-email", params={"email": pick(emails, i)})),
+        Scenario("users", "GET /users/{user_id}/items/{item_id}",
+                 lambda c, i: c.get(f"/users/{pick(user_ids, i)}/items/{pick(item_ids, i)}")),
+        Scenario("users", "POST /users/",
+                 lambda c, i: c.post("/users/", json={"name": "Load", "email": f"load{next(counter)}@example.com"})),
+        Scenario("models", "GET /models/{model_name}",
+                 lambda c, i: c.get(f"/models/{pick(['alexnet', 'resnet', 'lenet'], i)}")),
+        Scenario("external", "GET /external/post/{post_id}", lambda c, i: c.get(f"/external/post/{i % 250 + 1}")),
+        Scenario("external", "GET /external/posts", lambda c, i: c.get("/external/posts", params={"ids": "1,2,3,4,5"})),
+        Scenario("convert", "GET /convert/filename/{filename}", lambda c, i: c.get(f"/convert/filename/archivo{i}.jpg")),
+        Scenario("convert", "GET /convert/image-simulation", lambda c, i: c.get("/convert/image-simulation")),
+        Scenario("convert", "POST /convert/upload", lambda c, i: c.post("/convert/upload", files=files())),
+        Scenario("convert", "POST /convert/upload/base64", lambda c, i: c.post("/convert/upload/base64", files=files())),
+        Scenario("images", "GET /images/{image_path}", lambda c, i: c.get("/images/bench/photo.png")),
+        Scenario("images", "GET /images/{image_path} (Range)",
+                 lambda c, i: c.get("/images/bench/photo.png", headers={"Range": "bytes=0-1023"}), (206,)),
+        Scenario("images", "GET /images/{image_path}?w=64",
+                 lambda c, i: c.get("/images/bench/photo.png", params={"w": 64}), (200, 501)),
+    ]
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, total: int, concurrency: int, warmup: int) -> dict:
+    for i in range(warmup):
+        await scenario.request(client, i)
+
+    latencies = []
+    statuses = collections.Counter()
+    next_request = iter(range(total))
+
+    async def worker():
+        for i in next_request:  # Shared iterator: each request index is taken once
+            start = time.perf_counter_ns()
+            response = await scenario.request(client, i)
+            await response.aread()
+            latencies.append(time.perf_counter_ns() - start)
+            statuses[response.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    unexpected = sum(count for status, count in statuses.items() if status not in scenario.expected)
+    return {
+        "group": scenario.group,
+        "requests": total,
+        "rps": total / elapsed,
+        "p50_ms": percentile(latencies, 50) / 1e6,
+        "p95_ms": percentile(latencies, 95) / 1e6,
+        "p99_ms": percentile(latencies, 99) / 1e6,
+        "errors": unexpected,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Names of the routes that regressed against the baseline
+
+    Slower (rps or p95 beyond the tolerance), but also more unexpected
+    statuses or a different set of status codes: a route that starts
+    failing fast (500, 404, 429...) must not look like a speed-up.
+    """
+    regressions = []
+    print(f"\n{'route':<44} {'rps':>16} {'p95 ms':>18}")
+    for name, result in results.items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            print(f"{name:<44} {'(no baseline)':>16}")
+            continue
+        rps_change = result["rps"] / before["rps"] - 1 if before["rps"] else 0.0
+        p95_change = result["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        reasons = []
+        if rps_change < -tolerance or p95_change > tolerance:
+            reasons.append("slower")
+        if result["errors"] > before.get("errors", 0):
+            reasons.append(f"errors {before.get('errors', 0)} -> {result['errors']}")
+        if set(result["statuses"]) != set(before.get("statuses", result["statuses"])):
+            reasons.append(f"statuses {sorted(before['statuses'])} -> {sorted(result['statuses'])}")
+        if reasons:
+            regressions.append(name)
+        verdict = "REGRESSION (" + ", ".join(reasons) + ")" if reasons else "ok"
+        print(f"{name:<44} {rps_change:>+15.1%} {p95_change:>+17.1%}  {verdict}")
+    return regressions
+
+async def seed(client: httpx.AsyncClient, items: int, users: int) -> None:
+    """Grow the stores through the bulk endpoints, so lists and searches have real work to do"""
+    if items:
+        rows = [{"name": f"Seed item {i}", "price": f"{random.uniform(1, 2000):.2f}"} for i in range(items)]
+        (await client.post("/items/bulk", json=rows)).raise_for_status()
+    if users:
+        rows = [{"name": f"Seed user {i}", "email": f"seed{i}@example.com", "edad": 20 + i % 50} for i in range(users)]
+        (await client.post("/users/bulk", json=rows)).raise_for_status()
+
+async def collect_ids(client: httpx.AsyncClient) -> tuple[list[int], list[str], list[str]]:
+    items = (await client.get("/items/", params={"limit": 100})).json()
+    users = (await client.get("/users/", params={"limit": 100})).json()
+    return [item["item_id"] for item in items], [user["id"] for user in users], [user["email"] for user in users]
+
+async def main(args) -> int:
+    stub = StubUpstream().start_in_thread()
+    workdir = tempfile.mkdtemp(prefix="bench_routes_")
+    os.makedirs(os.path.join(workdir, "images", "bench"))
+    with open(os.path.join(workdir, "images", "bench", "photo.png"), "wb") as f:
+        f.write(png_bytes())
+
+    # Before importing the app: the settings are read once, at import time
+    os.environ["EXTERNAL_API_BASE_URL"] = stub.base_url
+    os.environ["IMAGES_ROOT"] = os.path.join(workdir, "images")
+    os.environ["THUMBNAIL_CACHE_DIR"] = os.path.join(workdir, "thumbnails")
+    os.environ["STORAGE_BACKEND"] = args.backend
+    os.environ["SQLITE_PATH"] = os.path.join(workdir, "app.db")
+    os.environ.setdefault("RATE_LIMITS", "")  # One client sending everything: measure the routes, not the 429s
+
+    from main import app, lifespan
+
+    groups = set(args.only.split(",")) if args.only else None
+    results = {}
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            await seed(client, args.items, args.users)
+            item_ids, user_ids, emails = await collect_ids(client)
+            upload = os.urandom(UPLOAD_SIZE)
+            print(f"{'route':<44} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+            for scenario in build_scenarios(item_ids, user_ids, emails, upload):
+                if groups is not None and scenario.group not in groups:
+                    continue
+                result = await run_scenario(client, scenario, args.requests, args.concurrency, args.warmup)
+                results[scenario.name] = result
+                print(
+                    f"{scenario.name:<44} {result['rps']:>9.0f} {result['p50_ms']:>8.2f} "
+                    f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['errors']:>7}"
+                )
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "backend": args.backend,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    regressions: list[str] = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if (baseline.get("requests"), baseline.get("concurrency")) != (args.requests, args.concurrency):
+            print("\nWarning: the baseline was run with different --requests/--concurrency")
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"\n{len(regressions)} regression(s)" + (": " + ", ".join(regressions) if regressions else ""))
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per route")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requests in flight at the same time")
+    parser.add_argument("--warmup", type=int, default=20, help="Requests per route before measuring")
+    parser.add_argument("--only", default="", help="Comma-separated routers, e.g. items,users,images")
+    parser.add_argument("--items", type=int, default=1000, help="Extra items created before the run")
+    parser.add_argument("--users", type=int, default=1000, help="Extra users created before the run")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--save-baseline", help="Write this run's report here")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    sys.exit(asyncio.run(main(parser.parse_args())))
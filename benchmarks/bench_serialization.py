@@ -0,0 +1,82 @@
+"""
+Benchmark: serializing a list response, FastAPI's default path vs JSON kept at write time
+
+- default: what FastAPI does for `response_model=List[User]` + JSONResponse:
+  validate the dicts, dump them to JSON-compatible Python objects, json.dumps
+- orjson: the same validation and dump, rendered with orjson (ORJSONResponse)
+- precomputed: join the JSON bytes the store computed when each record was written
+
+Run: python -m benchmarks.bench_serialization
+     python -m benchmarks.bench_serialization --page-sizes 10 100 --rounds 2000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from decimal import Decimal
+from typing import List
+
+from pydantic import TypeAdapter
+
+from core.serialization import RecordEncoder, json_array, orjson
+from routers.items import ItemBase
+from routers.users import User
+from storage import ItemStore, UserStore
+from .bench_storage import build_users
+from .bench_item_search import build_items
+
+def default_path(adapter: TypeAdapter, page: list[dict]) -> bytes:
+    content = adapter.dump_python(adapter.validate_python(page), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def orjson_path(adapter: TypeAdapter, page: list[dict]) -> bytes:
+    return orjson.dumps(adapter.dump_python(adapter.validate_python(page), mode="json"))
+
+def measure(render, rounds: int) -> tuple[float, int]:
+    """Return (microseconds per response, bytes allocated per response)"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        render()
+    elapsed = (time.perf_counter() - start) / rounds * 1e6
+    tracemalloc.start()
+    for _ in range(50):
+        render()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--rounds", type=int, default=1000)
+    args = parser.parse_args()
+
+    size = max(args.page_sizes)
+    items = [dict(item, price=Decimal(str(item["price"]))) for item in build_items(size)]
+    users = [dict(user, roles=["admin", "writer"]) for user in build_users(size)]
+    cases = [
+        ("items", TypeAdapter(List[ItemBase]), ItemStore(items, RecordEncoder(ItemBase))),
+        ("users", TypeAdapter(List[User]), UserStore(users, RecordEncoder(User))),
+    ]
+
+    print(f"{'model':>6} {'page':>5} | {'default':>20} | {'orjson':>20} | {'precomputed':>20}")
+    for name, adapter, store in cases:
+        for page_size in args.page_sizes:
+            page, _ = store.slice(0, page_size)
+            renders = [lambda: default_path(adapter, page)]
+            renders.append((lambda: orjson_path(adapter, page)) if orjson is not None else None)
+            if name == "items":
+                renders.append(lambda: json_array(store.json_of(page)))
+            else:
+                renders.append(lambda: json_array(store.slice_json(0, page_size)[0]))
+            cells = []
+            for render in renders:
+                if render is None:
+                    cells.append(f"{'n/a':>20}")
+                    continue
+                us, peak = measure(render, args.rounds)
+                cells.append(f"{us:>8.1f}us {peak / 1024:>7.1f}KiB")
+            print(f"{name:>6} {page_size:>5} | " + " | ".join(cells))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: cold start, from a new Python process to the first response
+
+Every run is a fresh interpreter (nothing cached in sys.modules) that imports
+main, runs the lifespan startup and answers GET --path in-process. Eager
+(LAZY_ROUTERS=false) and lazy router loading are compared on the median of
+--runs runs, phase by phase (the phases recorded by core/startup.py).
+
+--imports adds a breakdown of the import time by top-level package
+(from python -X importtime), to see what the "imports" phase is made of.
+
+Run: python -m benchmarks.bench_startup
+     python -m benchmarks.bench_startup --runs 20 --path /items/ --imports
+"""
+import argparse
+import collections
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child process: first response through the real ASGI stack.
+# Plain ASGI calls, no HTTP client, so nothing else is imported on the way
+CHILD = """
+import asyncio, json, sys
+import main
+
+async def first_response():
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": sys.argv[1], "raw_path": sys.argv[1].encode(), "query_string": b"",
+             "root_path": "", "headers": [(b"host", b"app")], "client": ("127.0.0.1", 1), "server": ("app", 80)}
+    status = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    async with main.lifespan(main.app):
+        await main.app(scope, receive, send)
+        main.startup_timer.mark("first response")
+    return status[0]
+
+status = asyncio.run(first_response())
+print(json.dumps({"status": status, **main.startup_timer.report()}))
+"""
+
+def run_once(path: str, lazy: bool) -> dict:
+    env = {**os.environ, "LAZY_ROUTERS": "true" if lazy else "false", "STARTUP_REPORT": "false"}
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, path], cwd=PROJECT_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    wall_ms = (time.perf_counter() - start) * 1000
+    report = json.loads(output.strip().splitlines()[-1])
+    report["process_ms"] = wall_ms  # Includes starting the interpreter itself
+    return report
+
+def import_breakdown(top: int) -> list[tuple[str, float]]:
+    """Self time of every imported module, summed by top-level package (ms)"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], cwd=PROJECT_DIR, capture_output=True, text=True
+    ).stderr
+    totals = collections.Counter()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        totals[name.split(".")[0]] += int(self_us) / 1000
+    return totals.most_common(top)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--path", default="/", help="First request, e.g. / (a health check) or /items/")
+    parser.add_argument("--imports", action="store_true", help="Also show the import time by package")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    medians = {}
+    for mode, lazy in (("eager", False), ("lazy", True)):
+        runs = [run_once(args.path, lazy) for _ in range(args.runs)]
+        phases = {phase: statistics.median(run["phases_ms"][phase] for run in runs) for phase in runs[0]["phases_ms"]}
+        medians[mode] = {
+            **phases,
+            "to first response": statistics.median(run["total_ms"] for run in runs),
+            "process (with interpreter)": statistics.median(run["process_ms"] for run in runs),
+            "modules": statistics.median(run["modules_loaded"] for run in runs),
+        }
+
+    print(f"GET {args.path}, median of {args.runs} cold starts")
+    print(f"{'phase':<28} {'eager':>10} {'lazy':>10} {'change':>9}")
+    for phase, eager in medians["eager"].items():
+        lazy = medians["lazy"].get(phase, 0.0)
+        change = f"{lazy / eager - 1:+.0%}" if eager else ""
+        unit = "" if phase == "modules" else "ms"
+        print(f"{phase:<28} {eager:>8.1f}{unit:<2} {lazy:>8.1f}{unit:<2} {change:>9}")
+
+    if args.imports:
+        print("\nImport time by package (lazy, self time summed):")
+        for package, ms in import_breakdown(args.top):
+            print(f"  {package:<30} {ms:>8.1f}ms")
+
+if __name__ == "__main__":
+    main()
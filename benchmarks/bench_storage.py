@@ -0,0 +1,144 @@
+"""
+Benchmark: memory vs SQLite repositories under concurrent reads and writes
+
+Each of the --concurrency tasks runs a loop of random operations: item
+lookups, keyset pages and searches (reads), item creations and user updates
+(writes), with --write-ratio of them being writes.
+
+"persistent" is the memory backend with its write-behind change log
+(PERSIST_DIR): writes should cost about the same as plain memory. For it
+the durability lag (worst time from a write to its fsync) and the time to
+rebuild both stores from the snapshot + log (a restart) are shown too.
+
+Run: python -m benchmarks.bench_storage
+     python -m benchmarks.bench_storage --items 100000 --ops 20000 --concurrency 64 --write-ratio 0.2
+     python -m benchmarks.bench_storage --backends memory persistent --write-ratio 0.5 --snapshot-every 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from decimal import Decimal
+from uuid import uuid4
+
+from core.serialization import RecordEncoder
+from routers.items import ItemBase
+from routers.users import User
+from storage import (ChangeLog, ItemStore, MemoryItemRepository, MemoryUserRepository, SQLiteItemRepository, SQLitePool,
+                     SQLiteUserRepository, UserStore)
+from .bench_item_search import build_items
+from .bench_item_store import percentile
+
+def build_users(size: int) -> list[dict]:
+    return [
+        {"id": str(uuid4()), "name": f"User {i}", "email": f"user{i}@example.com", "active": True, "roles": [], "edad": 30}
+        for i in range(1, size + 1)
+    ]
+
+def make_repositories(backend: str, items: list[dict], users: list[dict], path: str, args):
+    item_encoder, user_encoder = RecordEncoder(ItemBase), RecordEncoder(User)
+    if backend == "sqlite":
+        pool = SQLitePool(path, args.pool_size)  # Shared, like the app does: one writer
+        return (
+            SQLiteItemRepository(pool, item_encoder, items),
+            SQLiteUserRepository(pool, user_encoder, users),
+        )
+    logs = [None, None]
+    if backend == "persistent":
+        directory = os.path.join(os.path.dirname(path), "persist")
+        logs = [ChangeLog(directory, name, args.flush_interval, args.snapshot_every) for name in ("items", "users")]
+    # Copies: the memory stores wrap (and grow) the list they are given
+    return (
+        MemoryItemRepository(ItemStore(list(items), item_encoder), item_encoder, logs[0]),
+        MemoryUserRepository(UserStore([dict(u) for u in users], user_encoder), user_encoder, logs[1]),
+    )
+
+def recover(items: list[dict], users: list[dict], directory: str) -> float:
+    """Seconds to rebuild both stores from the snapshot + log, as a restart does"""
+    start = time.perf_counter()
+    for name, seed, encoder, store_class, repository_class in (
+        ("items", items, RecordEncoder(ItemBase), ItemStore, MemoryItemRepository),
+        ("users", users, RecordEncoder(User), UserStore, MemoryUserRepository),
+    ):
+        snapshot, entries = ChangeLog(directory, name).recover()
+        records = [dict(record) for record in seed] if snapshot is None else snapshot
+        repository_class(store_class(records, encoder), encoder).replay(entries)
+    return time.perf_counter() - start
+
+async def run_mix(item_repo, user_repo, user_ids: list[str], args) -> tuple[float, list[int], list[int]]:
+    """Return (elapsed seconds, read timings ns, write timings ns)"""
+    reads, writes = [], []
+    remaining = args.ops
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            roll = random.random()
+            start = time.perf_counter_ns()
+            if roll < args.write_ratio / 2:
+                await item_repo.create({"name": "Bench item", "price": Decimal("9.99"), "release_date": None})
+                writes.append(time.perf_counter_ns() - start)
+            elif roll < args.write_ratio:
+                await user_repo.update(random.choice(user_ids), {"edad": random.randint(18, 90)})
+                writes.append(time.perf_counter_ns() - start)
+            else:
+                if roll < 0.8:
+                    await item_repo.get(random.randint(1, args.items))
+                elif roll < 0.95:
+                    await item_repo.page_after(random.randint(0, args.items), 20)
+                else:
+                    await item_repo.search("phone", 100, 200)
+                reads.append(time.perf_counter_ns() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return time.perf_counter() - start, sorted(reads), sorted(writes)
+
+def report(name: str, elapsed: float, reads: list[int], writes: list[int], ops: int):
+    def us(values, pct):
+        return percentile(values, pct) / 1000 if values else 0.0
+    print(
+        f"{name:>8} | {ops / elapsed:>10.0f} ops/s | "
+        f"read p50 {us(reads, 50):>8.1f}us p99 {us(reads, 99):>8.1f}us | "
+        f"write p50 {us(writes, 50):>8.1f}us p99 {us(writes, 99):>8.1f}us"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--ops", type=int, default=10_000, help="Operations per backend")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent tasks")
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--pool-size", type=int, default=4, help="SQLite reader connections")
+    parser.add_argument("--backends", nargs="+", default=["memory", "persistent", "sqlite"],
+                        choices=["memory", "persistent", "sqlite"])
+    parser.add_argument("--flush-interval", type=float, default=0.05, help="persistent: group-commit window (s)")
+    parser.add_argument("--snapshot-every", type=int, default=10_000, help="persistent: log entries per snapshot")
+    args = parser.parse_args()
+
+    items = build_items(args.items)
+    users = build_users(args.users)
+    print(f"{args.items} items, {args.users} users, {args.ops} ops, {args.concurrency} tasks, {args.write_ratio:.0%} writes")
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends:
+            item_repo, user_repo = make_repositories(backend, items, users, os.path.join(tmp, "bench.db"), args)
+            elapsed, reads, writes = await run_mix(item_repo, user_repo, [user["id"] for user in users], args)
+            report(backend, elapsed, reads, writes, args.ops)
+            await item_repo.close()
+            await user_repo.close()
+            if backend == "persistent":
+                lags = [repo.changelog.stats() for repo in (item_repo, user_repo)]
+                print(
+                    f"{'':>8} | max lag {max(stats['max_lag_ms'] for stats in lags):.1f}ms, "
+                    f"{sum(stats['fsyncs'] for stats in lags)} fsyncs for "
+                    f"{sum(stats['entries_written'] for stats in lags)} writes, "
+                    f"{sum(stats['snapshots'] for stats in lags)} snapshots | "
+                    f"restart (snapshot + log replay) {recover(items, users, item_repo.changelog.directory):.2f}s"
+                )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""
+Scenario: /external/post/{post_id} against a slow and failing upstream
+
+Boots the app in-process against the local stub upstream and runs three phases:
+1. healthy    - no faults, baseline latency
+2. degraded   - injected latency + 503s: retries absorb part of the faults
+3. outage     - every call fails: the circuit opens and requests fail fast (503)
+
+Run: python -m benchmarks.bench_upstream_resilience --latency 0.2 --fault-rate 0.3
+"""
+import argparse
+import asyncio
+import collections
+import os
+import time
+
+import httpx
+
+from .bench_item_store import percentile
+from .stub_upstream import StubUpstream
+
+async def run_phase(client: httpx.AsyncClient, total: int, concurrency: int) -> dict:
+    latencies = []
+    statuses = collections.Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter_ns()
+            response = await client.get(f"/external/post/{i % 250 + 1}")
+            latencies.append(time.perf_counter_ns() - start)
+            statuses[response.status_code] += 1
+
+    await asyncio.gather(*(one(i) for i in range(total)))
+    latencies.sort()
+    return {
+        "p50_ms": percentile(latencies, 50) / 1e6,
+        "p99_ms": percentile(latencies, 99) / 1e6,
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="Injected upstream latency in the degraded phase")
+    parser.add_argument("--fault-rate", type=float, default=0.3, help="Fraction of 503s in the degraded phase")
+    args = parser.parse_args()
+
+    stub = StubUpstream().start_in_thread()
+    os.environ["EXTERNAL_API_BASE_URL"] = stub.base_url
+    os.environ.setdefault("EXTERNAL_CACHE_TTL", "0")  # Every request must reach the upstream
+    os.environ.setdefault("RATE_LIMITS", "")  # One client: the 429s would hide the upstream behaviour
+
+    from main import app, lifespan
+
+    phases = {
+        "healthy": (0.0, 0.0),
+        "degraded": (args.latency, args.fault_rate),
+        "outage": (args.latency, 1.0),
+    }
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            for name, (latency, fault_rate) in phases.items():
+                stub.latency, stub.fault_rate = latency, fault_rate
+                result = await run_phase(client, args.requests, args.concurrency)
+                print(
+                    f"{name:>9} | p50 {result['p50_ms']:>8.1f}ms | p99 {result['p99_ms']:>8.1f}ms | "
+                    f"statuses {result['statuses']}"
+                )
+            print("circuits:", (await client.get("/external/upstream/stats")).json())
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+"""
+Benchmark: user lookup by UUID and by email, linear scan vs UserStore indexes
+
+Run: python -m benchmarks.bench_user_store
+     python -m benchmarks.bench_user_store --sizes 10000 1000000 --lookups 2000 --scan-lookups 20
+"""
+import argparse
+import random
+import time
+from uuid import UUID, uuid4
+
+from storage import UserStore
+from .bench_item_store import measure
+
+def build_users(size: int) -> list[dict]:
+    return [
+        {"id": str(uuid4()), "name": f"User {i}", "email": f"user{i}@example.com", "active": True, "roles": [], "edad": 30}
+        for i in range(size)
+    ]
+
+def linear_lookup(users: list[dict], user_id: UUID):
+    # What get_user did before (with the UUID compared to the stored string)
+    for user in users:
+        if user["id"] == str(user_id):
+            return user
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=1000, help="Indexed lookups per size (random users)")
+    parser.add_argument("--scan-lookups", type=int, default=20, help="Linear-scan lookups per size (they are slow)")
+    args = parser.parse_args()
+
+    print(f"{'size':>10} | {'build':>8} | {'scan p50':>12} {'scan p99':>12} | {'uuid p50':>10} {'uuid p99':>10} | {'email p50':>10} {'email p99':>10}")
+    for size in args.sizes:
+        users = build_users(size)
+        start = time.perf_counter()
+        store = UserStore(users)
+        build = time.perf_counter() - start
+
+        picks = [random.choice(users) for _ in range(args.lookups)]
+        ids = [UUID(user["id"]) for user in picks]  # What FastAPI passes to the handlers
+        emails = [user["email"].upper() for user in picks]
+
+        scan_p50, scan_p99 = measure(lambda user_id: linear_lookup(users, user_id), ids[: args.scan_lookups])
+        uuid_p50, uuid_p99 = measure(store.get, ids)
+        email_p50, email_p99 = measure(store.get_by_email, emails)
+        print(
+            f"{size:>10} | {build:>7.2f}s | {scan_p50:>10.1f}us {scan_p99:>10.1f}us | "
+            f"{uuid_p50:>8.2f}us {uuid_p99:>8.2f}us | {email_p50:>8.2f}us {email_p99:>8.2f}us"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Local stub of the DummyJSON posts API, for benchmarks (no internet needed)
+
+Run standalone: python -m benchmarks.stub_upstream --port 8081
+Then point the app at it:
+    EXTERNAL_API_BASE_URL=http://127.0.0.1:8081 fastapi dev main.py
+
+Only GET /posts/{id} is implemented (IDs 1..250, like DummyJSON; 404 otherwise).
+Connections are kept alive, so a client with a connection pool reuses them.
+
+Latency and faults can be injected (on the command line or by changing the
+attributes of a running StubUpstream), to test retries and circuit breaking:
+    python -m benchmarks.stub_upstream --latency 0.2 --fault-rate 0.3
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+
+MAX_POST_ID = 250
+
+def _post(post_id: int) -> dict:
+    return {
+        "id": post_id,
+        "title": f"Post number {post_id}",
+        "body": "This is a stub post served locally for benchmarks.",
+        "userId": post_id % 10 + 1,
+        "tags": ["stub", "benchmark"],
+        "reactions": {"likes": post_id * 3, "dislikes": post_id % 7},
+    }
+
+def _response(status: str, payload: dict) -> bytes:
+    body = json.dumps(payload).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: keep-alive\r\n\r\n"
+    )
+    return head.encode("ascii") + body
+
+class StubUpstream:
+    """Tiny asyncio HTTP/1.1 server, good enough for GET requests from httpx"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        fault_rate: float = 0.0,
+        drop_rate: float = 0.0,
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency        # Seconds added before every answer
+        self.fault_rate = fault_rate  # Fraction of requests answered with 503
+        self.drop_rate = drop_rate    # Fraction of connections closed without answering
+        self.requests_served = 0
+        self.connections_opened = 0
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def handle_request(self, method: str, path: str) -> bytes:
+        parts = path.strip("/").split("/")
+        if method == "GET" and len(parts) == 2 and parts[0] == "posts" and parts[1].isdigit():
+            post_id = int(parts[1])
+            if 1 <= post_id <= MAX_POST_ID:
+                return _response("200 OK", _post(post_id))
+        return _response("404 Not Found", {"message": f"Post with id '{parts[-1]}' not found"})
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections_opened += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                method, path, _ = head.split(b"\r\n", 1)[0].decode("latin-1").split(" ", 2)
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if random.random() < self.drop_rate:
+                    break
+                if random.random() < self.fault_rate:
+                    writer.write(_response("503 Service Unavailable", {"message": "Injected fault"}))
+                else:
+                    writer.write(await self.handle_request(method, path.split("?", 1)[0]))
+                await writer.drain()
+                self.requests_served += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def start_in_thread(self) -> "StubUpstream":
+        """Run the server on its own event loop in a daemon thread"""
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(self.start())
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+        return self
+
+async def _serve_forever(host: str, port: int, latency: float, fault_rate: float, drop_rate: float):
+    stub = StubUpstream(host, port, latency, fault_rate, drop_rate)
+    await stub.start()
+    print(f"Stub upstream listening on {stub.base_url}")
+    await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--fault-rate", type=float, default=0.0, help="Fraction of 503 answers (0..1)")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of dropped connections (0..1)")
+    args = parser.parse_args()
+    asyncio.run(_serve_forever(args.host, args.port, args.latency, args.fault_rate, args.drop_rate))
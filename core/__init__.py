@@ -0,0 +1,4 @@
+"""
+Core package for FastAPI application.
+Contains cross-cutting helpers shared by the routers (settings, pagination, HTTP client, ...).
+"""
@@ -0,0 +1,30 @@
+import base64
+
+
+class Base64StreamEncoder:
+    """
+    Incremental Base64: feed bytes chunk by chunk, get Base64 text chunk by chunk
+
+    Base64 turns every 3 input bytes into 4 characters, so each call encodes
+    the largest multiple of 3 it has and keeps the 0-2 leftover bytes for
+    the next call. Only `finish()` may add "=" padding. The concatenated
+    output is exactly base64.b64encode(all the input).
+    """
+
+    def __init__(self):
+        self._leftover = b""
+
+    def update(self, chunk: bytes) -> bytes:
+        data = self._leftover + chunk if self._leftover else chunk
+        cut = len(data) - len(data) % 3
+        self._leftover = data[cut:]
+        return base64.b64encode(data[:cut])
+
+    def finish(self) -> bytes:
+        tail, self._leftover = self._leftover, b""
+        return base64.b64encode(tail)
+
+
+def base64_length(size: int) -> int:
+    """Length of the Base64 text for `size` input bytes (with padding)"""
+    return 4 * ((size + 2) // 3)
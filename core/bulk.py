@@ -0,0 +1,137 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from pydantic import TypeAdapter, ValidationError
+
+from .ndjson import NDJSON_MEDIA_TYPE
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard json module parses the same documents, slower
+    orjson = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+RowErrors = Dict[int, List[dict]]  # row index → validation errors of that row
+
+
+def operation_of(row) -> str:
+    """Discriminator for bulk rows: the "op" field, "create" when it is missing"""
+    if isinstance(row, dict):
+        return row.get("op", "create")
+    return getattr(row, "op", "create")
+
+
+def _row_errors(exc: ValidationError) -> Optional[RowErrors]:
+    """Group validation errors by row; None if an error is about the whole body"""
+    errors: RowErrors = {}
+    for error in exc.errors(include_url=False):
+        loc = error["loc"]
+        if not loc or not isinstance(loc[0], int):
+            return None
+        errors.setdefault(loc[0], []).append({"loc": list(loc[1:]), "msg": error["msg"], "type": error["type"]})
+    return errors
+
+
+def _check_size(count: int, max_rows: int) -> None:
+    if count > max_rows:
+        raise HTTPException(status_code=413, detail=f"Too many rows ({count}), the limit is {max_rows}")
+
+
+def _validate_valid_rows(adapter: TypeAdapter, raw: list, errors: RowErrors) -> List[Tuple[int, Any]]:
+    # Rows are independent, so once the bad ones are known the rest validates.
+    # Every failed pass takes at least one more row out, so this always ends
+    while True:
+        good = [index for index in range(len(raw)) if index not in errors]
+        try:
+            return list(zip(good, adapter.validate_python([raw[index] for index in good])))
+        except ValidationError as exc:
+            row_errors = _row_errors(exc)
+            if not row_errors:
+                # Not about any one row: say so, instead of quietly dropping the valid ones
+                raise HTTPException(status_code=400, detail=exc.errors(include_url=False)) from exc
+            for position, errors_of_row in row_errors.items():
+                errors[good[position]] = errors_of_row
+
+
+async def _read_body(request: Request, max_bytes: int) -> bytes:
+    """The request body, refused with a 413 as soon as it is bigger than `max_bytes`"""
+    too_large = HTTPException(status_code=413, detail=f"The body is larger than {max_bytes} bytes")
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large  # Declared too big: not even read
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise too_large  # Chunked upload (no Content-Length): stop reading at the limit
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def read_bulk_rows(request: Request, adapter: TypeAdapter, max_rows: int,
+                         max_bytes: int) -> Tuple[List[Tuple[int, Any]], RowErrors]:
+    """
+    Parse and validate the body of a bulk request: a JSON array or NDJSON
+
+    Limits are checked before the expensive steps: the body size while it
+    is read (BULK_MAX_BYTES), then the number of rows after parsing and
+    BEFORE any row is validated (BULK_MAX_ROWS). Parsing is one orjson call
+    (for NDJSON, one per line, so a row's index is always its line).
+
+    `adapter` validates a list of rows. The usual case (every row valid) is
+    ONE `validate_python` call over all of them; invalid rows are reported
+    by index and the others are still applied.
+
+    Returns ([(row index, validated row), ...], {row index: errors}).
+    """
+    body = await _read_body(request, max_bytes)
+    errors: RowErrors = {}
+    if NDJSON_MEDIA_TYPE in request.headers.get("content-type", ""):
+        lines = [line for line in body.splitlines() if line.strip()]
+        _check_size(len(lines), max_rows)
+        raw = []
+        for index, line in enumerate(lines):
+            try:
+                raw.append(_loads(line))
+            except ValueError:  # Also a line with two rows, like {...},{...}
+                raw.append(None)
+                errors[index] = [{"loc": [], "msg": "Invalid JSON", "type": "json_invalid"}]
+    else:
+        try:
+            raw = _loads(body)
+        except ValueError:
+            raw = None
+        if not isinstance(raw, list):
+            raise HTTPException(status_code=400, detail="The body must be a JSON array (or NDJSON with Content-Type: application/x-ndjson)")
+        _check_size(len(raw), max_rows)
+
+    return _validate_valid_rows(adapter, raw, errors), errors
+
+
+def bulk_summary(rows: List[Tuple[int, Any]], results: List[Optional[dict]], errors: RowErrors, key: str, not_found: str) -> dict:
+    """
+    Response of a bulk endpoint: one entry per applied row, one error per failed row
+
+    Invalid rows are 422 errors, updates/deletes of missing records are 404
+    and rows rejected by a uniqueness rule (the repository returned the
+    exception instead of a record) are 409.
+    """
+    succeeded = []
+    failed = [{"index": index, "status_code": 422, "detail": detail} for index, detail in errors.items()]
+    for (index, row), record in zip(rows, results):
+        if record is None:
+            failed.append({"index": index, "op": row.op, "status_code": 404, "detail": not_found})
+        elif isinstance(record, Exception):
+            failed.append({"index": index, "op": row.op, "status_code": 409, "detail": str(record)})
+        else:
+            succeeded.append({"index": index, "op": row.op, key: record[key]})
+    failed.sort(key=lambda error: error["index"])
+    return {
+        "received": len(rows) + len(errors),
+        "succeeded": len(succeeded),
+        "failed": len(failed),
+        "results": succeeded,
+        "errors": failed,
+    }
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTTLCache:
+    """
+    In-process async cache: size bound + TTL + LRU eviction + request coalescing
+
+    - Entries live `ttl` seconds. With `stale_ttl > 0`, an expired entry is
+      still served for `stale_ttl` more seconds while ONE background task
+      refreshes it (stale-while-revalidate).
+    - When the cache is full, the least recently used entry is evicted.
+    - Concurrent misses for the same key share one in-flight load, so a
+      burst of requests for a cold key sends a single upstream request.
+    - Failed loads are not cached: every waiter gets the exception.
+
+    A load is shared by every caller of that key, so `loader` must not
+    depend on which caller happened to start it (e.g. on its own
+    deadline): pass a caller's time budget as `timeout` instead, it only
+    limits that caller's wait.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, stale_ttl: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[Hashable, tuple[Any, float]]" = OrderedDict()  # key → (value, expires_at)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                          timeout: Optional[float] = None) -> Any:
+        """
+        Return the cached value for `key`, calling `loader()` on a miss
+
+        With a `timeout` (seconds), TimeoutError if the load takes longer:
+        the load itself keeps going for the other waiters (and the cache).
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            now = time.monotonic()
+            if now < expires_at:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+            if now < expires_at + self.stale_ttl:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                if key not in self._inflight:
+                    self._start_load(key, loader).add_done_callback(self._log_refresh_error)
+                return value
+            del self._entries[key]
+
+        self.misses += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._start_load(key, loader)
+        else:
+            self.coalesced += 1
+        # shield(): if this client goes away (or its timeout expires), the load keeps going for the others
+        if timeout is None:
+            return await asyncio.shield(task)
+        return await asyncio.wait_for(asyncio.shield(task), max(0.0, timeout))
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = asyncio.ensure_future(self._load(key, loader))
+        self._inflight[key] = task
+        return task
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+            self.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background cache refresh failed: %r", task.exception())
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)  # Least recently used
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "in_flight": len(self._inflight),
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
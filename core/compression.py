@@ -0,0 +1,386 @@
+import asyncio
+import gzip
+import importlib.util
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Optional: "br" and "zstd" are only offered when brotli / zstandard are installed.
+# Checked without importing them: they are imported by the first response that uses them
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+ZSTANDARD_AVAILABLE = importlib.util.find_spec("zstandard") is not None
+
+# Types worth compressing. Images, zips, videos... are already compressed
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+# Bodies this big are compressed in a worker thread (zlib, brotli and zstd
+# release the GIL), so one huge export doesn't stall every other request
+THREAD_THRESHOLD = 1024 * 1024
+
+
+class Codec(ABC):
+    """
+    One Content-Encoding: a one-shot compress() for complete bodies and a
+    streaming compressor for streamed ones
+
+    compress() may run in a worker thread while other requests use the same
+    codec, so it must not share compression state between calls.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes: ...
+
+    @abstractmethod
+    def stream(self) -> "StreamCompressor": ...
+
+
+class StreamCompressor(ABC):
+    """
+    chunk() compresses AND flushes, so every chunk the app sends reaches the
+    client right away (an NDJSON export stays a stream); finish() ends it
+    """
+
+    @abstractmethod
+    def chunk(self, data: bytes) -> bytes: ...
+
+    @abstractmethod
+    def finish(self) -> bytes: ...
+
+
+class GzipCodec(Codec):
+    name = "gzip"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        # mtime=0: the same body always gives the same bytes
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def stream(self) -> StreamCompressor:
+        return _ZlibStream(zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS))
+
+
+class _ZlibStream(StreamCompressor):
+    def __init__(self, compressor):
+        self.compressor = compressor
+
+    def chunk(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+class BrotliCodec(Codec):
+    name = "br"
+
+    def __init__(self, quality: int = 4):
+        self.quality = quality
+
+    def compress(self, data: bytes) -> bytes:
+        import brotli
+        return brotli.compress(data, quality=self.quality)
+
+    def stream(self) -> StreamCompressor:
+        import brotli
+        return _BrotliStream(brotli.Compressor(quality=self.quality))
+
+
+class _BrotliStream(StreamCompressor):
+    def __init__(self, compressor):
+        self.compressor = compressor
+
+    def chunk(self, data: bytes) -> bytes:
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.compressor.finish()
+
+
+class ZstdCodec(Codec):
+    name = "zstd"
+
+    def __init__(self, level: int = 3):
+        self.level = level
+
+    # A ZstdCompressor can't be used from two threads, nor by two compressobj()
+    # streams at once: every call and every stream gets its own (they are cheap)
+
+    def compress(self, data: bytes) -> bytes:
+        import zstandard
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def stream(self) -> StreamCompressor:
+        import zstandard
+        return _ZstdStream(zstandard.ZstdCompressor(level=self.level).compressobj(), zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+
+class _ZstdStream(StreamCompressor):
+    def __init__(self, compressor, flush_mode: int):
+        self.compressor = compressor
+        self.flush_mode = flush_mode
+
+    def chunk(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(self.flush_mode)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+def available_codecs(names: Sequence[str], gzip_level: int = 6, brotli_quality: int = 4,
+                     zstd_level: int = 3) -> List[Codec]:
+    """The codecs for `names` (in that preference order), skipping the ones not installed"""
+    factories = {
+        "gzip": lambda: GzipCodec(gzip_level),
+        "br": (lambda: BrotliCodec(brotli_quality)) if BROTLI_AVAILABLE else None,
+        "zstd": (lambda: ZstdCodec(zstd_level)) if ZSTANDARD_AVAILABLE else None,
+    }
+    return [factories[name]() for name in names if factories.get(name) is not None]
+
+
+def parse_accept_encoding(value: str) -> Dict[str, float]:
+    """'gzip;q=0.8, br, *;q=0' → {"gzip": 0.8, "br": 1.0, "*": 0.0}"""
+    weights = {}
+    for entry in value.split(","):
+        name, _, params = entry.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, number = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+    return weights
+
+
+def choose_codec(accept_encoding: str, codecs: Sequence[Codec]) -> Optional[Codec]:
+    """
+    The codec the client accepts with the highest q-value; on a tie, the
+    first one in OUR preference order (codecs). None → send it uncompressed
+    """
+    weights = parse_accept_encoding(accept_encoding)
+    best, best_q = None, 0.0
+    for codec in codecs:
+        q = weights.get(codec.name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = codec, q
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    content_type = content_type.split(";", 1)[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) or content_type.endswith(("+json", "+xml"))
+
+
+class CompressedBodyCache:
+    """
+    LRU of compressed bodies keyed by (ETag, encoding), bounded in bytes
+
+    An ETag names one exact version of a resource (the HTTP cache middleware
+    sets them), so the same ETag means the same bytes: we compress them once
+    and reuse the result until the data changes and the ETag with it.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+
+    def get(self, etag: str, encoding: str) -> Optional[bytes]:
+        body = self._entries.get((etag, encoding))
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end((etag, encoding))
+        self.hits += 1
+        return body
+
+    def put(self, etag: str, encoding: str, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        old = self._entries.pop((etag, encoding), None)
+        if old is not None:
+            self.size -= len(old)
+        self._entries[(etag, encoding)] = body
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware: compresses response bodies with the best encoding
+    the client accepts (Accept-Encoding)
+
+    - Complete bodies smaller than `minimum_size` are sent as they are:
+      compressing a few hundred bytes costs more than it saves.
+    - Streamed responses (NDJSON exports, base64 output...) are compressed
+      chunk by chunk, without buffering them.
+    - Bodies with an ETag are compressed once and kept in `cache`.
+    - Every response that COULD be compressed says `Vary: Accept-Encoding`,
+      including the ones sent as they are (small, HEAD, client without a
+      codec we support), so shared caches keep one copy per encoding.
+    """
+
+    def __init__(self, app: ASGIApp, codecs: Sequence[Codec], minimum_size: int = 1024,
+                 cache: Optional[CompressedBodyCache] = None):
+        self.app = app
+        self.codecs = list(codecs)
+        self.minimum_size = minimum_size
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.codecs:
+            await self.app(scope, receive, send)
+            return
+        codec = None
+        if scope["method"] != "HEAD":
+            codec = choose_codec(Headers(scope=scope).get("accept-encoding", ""), self.codecs)
+        await self.app(scope, receive, _CompressingSender(self, codec, send))
+
+
+class _CompressingSender:
+    """
+    The `send` of one request: decides, once the body starts, whether and how to compress
+
+    Without a codec (HEAD, or nothing the client accepts) the body is sent as
+    it is, with the Vary header when another client could get it compressed.
+    """
+
+    def __init__(self, middleware: CompressionMiddleware, codec: Optional[Codec], send: Send):
+        self.middleware = middleware
+        self.codec = codec
+        self.send = send
+        self.start: Optional[Message] = None
+        self.mode = ""  # "" until the first body message, then "plain" or "stream"
+        self.stream: Optional[StreamCompressor] = None
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            if not self._should_compress(Headers(raw=message.get("headers", []))):
+                self.mode = "plain"
+                await self.send(message)
+            elif self.codec is None:
+                self.mode = "plain"
+                await self.send(self._with_vary(message))
+            return
+        if self.mode == "plain" or message["type"] != "http.response.body":
+            if self.mode == "":  # e.g. http.response.pathsend: nothing to compress
+                self.mode = "plain"
+                await self.send(self.start)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.mode == "stream":
+            data = self.stream.chunk(body) if body else b""
+            if not more_body:
+                data += self.stream.finish()
+            if data or not more_body:
+                await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        # First body message
+        if more_body:
+            self.mode = "stream"
+            self.stream = self.codec.stream()
+            await self.send(self._compressed_start(None))
+            await self(message)
+        elif len(body) < self.middleware.minimum_size:
+            self.mode = "plain"
+            await self.send(self._with_vary(self.start))
+            await self.send(message)
+        else:
+            compressed = await self._compress(body)
+            await self.send(self._compressed_start(len(compressed)))
+            await self.send({"type": "http.response.body", "body": compressed})
+
+    def _should_compress(self, headers: Headers) -> bool:
+        status = self.start["status"]
+        return (
+            200 <= status < 300 and status not in (204, 206)
+            and "content-encoding" not in headers
+            and is_compressible(headers.get("content-type", ""))
+            and "no-transform" not in headers.get("cache-control", "")
+        )
+
+    async def _compress(self, body: bytes) -> bytes:
+        cache = self.middleware.cache
+        etag = Headers(raw=self.start.get("headers", [])).get("etag")
+        if cache is not None and etag is not None:
+            compressed = cache.get(etag, self.codec.name)
+            if compressed is not None:
+                return compressed
+        if len(body) >= THREAD_THRESHOLD:
+            compressed = await asyncio.to_thread(self.codec.compress, body)
+        else:
+            compressed = self.codec.compress(body)
+        if cache is not None and etag is not None:
+            cache.put(etag, self.codec.name, compressed)
+        return compressed
+
+    def _compressed_start(self, content_length: Optional[int]) -> Message:
+        headers = []
+        for key, value in self.start.get("headers", []):
+            if key == b"content-length":
+                continue
+            if key == b"etag" and not value.startswith(b"W/"):
+                # The compressed bytes differ from the plain ones, so a strong ETag
+                # becomes weak (If-None-Match still matches it: weak comparison)
+                value = b"W/" + value
+            headers.append((key, value))
+        headers.append((b"content-encoding", self.codec.name.encode("latin-1")))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode("latin-1")))
+        return self._with_vary({**self.start, "headers": headers})
+
+    @staticmethod
+    def _with_vary(start: Message) -> Message:
+        # Caches must keep one copy per Accept-Encoding
+        headers = list(start.get("headers", []))
+        for index, (key, value) in enumerate(headers):
+            if key == b"vary":
+                if b"accept-encoding" not in value.lower():
+                    headers[index] = (key, value + b", Accept-Encoding")
+                return {**start, "headers": headers}
+        headers.append((b"vary", b"Accept-Encoding"))
+        return {**start, "headers": headers}
+
+
+# One cache for the whole app (like the profiler), sized from the settings in main.py
+compressed_cache = CompressedBodyCache(max_bytes=32 * 1024 * 1024)
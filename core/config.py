@@ -0,0 +1,193 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _env_path(name: str, default: str) -> str:
+    """A path relative to the project folder ("" stays "", meaning off)"""
+    value = os.getenv(name, default).strip()
+    return os.path.join(PROJECT_DIR, value) if value else ""
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    App settings, read once from environment variables
+
+    Same idea as env_example.py: every value has a default, and you can
+    override it in the environment (or in the Azure App Service settings).
+    """
+
+    # Upstream (DummyJSON) HTTP client
+    external_api_base_url: str = "https://dummyjson.com"
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_timeout: float = 10.0
+    http_connect_timeout: float = 5.0
+    http2: bool = False
+
+    # Retries, deadline and circuit breaker for upstream calls (core/upstream.py)
+    upstream_retries: int = 2
+    upstream_backoff_base: float = 0.1
+    upstream_backoff_max: float = 1.0
+    upstream_deadline: float = 5.0
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+
+    # Cache for /external/post/{post_id}
+    external_cache_max_entries: int = 1024
+    external_cache_ttl: float = 60.0
+    external_cache_stale_ttl: float = 0.0  # > 0 enables stale-while-revalidate
+
+    # Batch endpoint /external/posts
+    external_batch_max_ids: int = 100
+    external_batch_concurrency: int = 10
+
+    # Static images served by /images/{image_path:path}
+    images_root: str = "static/images"  # Relative paths are relative to the project folder
+    images_stat_cache_size: int = 1024
+    images_stat_cache_ttl: float = 5.0
+    images_cache_control: str = "public, max-age=3600"
+
+    # Thumbnails (/images/...?w=200&fmt=webp)
+    thumbnail_cache_dir: str = ".cache/thumbnails"  # Relative paths are relative to the project folder
+    thumbnail_cache_max_bytes: int = 256 * 1024 * 1024
+    image_workers: int = 2  # Processes that decode and resize images
+
+    # Storage backend for items and users (storage/)
+    storage_backend: str = "memory"  # "memory" or "sqlite"
+    sqlite_path: str = "data/app.db"  # Relative paths are relative to the project folder
+    sqlite_pool_size: int = 4  # Reader connections (items and users share them); writes use one extra connection
+
+    # Write-behind persistence of the memory backend (storage/changelog.py)
+    persist_dir: str = ""  # Change logs + snapshots go here; empty = off (memory is lost on restart)
+    persist_flush_interval: float = 0.05  # Group-commit window: at most this much of the last writes can be lost
+    persist_snapshot_every: int = 10_000  # Log entries between two snapshots (bounds the replay at startup)
+
+    # HTTP caching (ETag / 304) of read-only routes (core/http_cache.py)
+    cache_control_static: str = "public, max-age=60"  # Routes whose answer only depends on the URL
+    cache_control_data: str = "no-cache"  # Item/user routes: always revalidate (cheap 304 with the ETag)
+    cache_control_overrides: str = ""  # "route=value;route=value", e.g. "/models/{model_name}=public, max-age=3600"
+
+    # Response compression (core/compression.py)
+    compression_encodings: str = "zstd,br,gzip"  # Preference order; br/zstd only if brotli/zstandard are installed
+    compression_minimum_size: int = 1024  # Smaller complete bodies are sent uncompressed
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_zstd_level: int = 3
+    compression_cache_max_bytes: int = 32 * 1024 * 1024  # Compressed bodies kept per (ETag, encoding); 0 disables
+
+    # Rate limits and admission control (core/rate_limit.py)
+    # "[METHOD ]route=count/period[:burst];...", per client (API key or IP); "*" = any route
+    # Off by default: behind a proxy without --proxy-headers every user has the proxy's IP (one bucket for all)
+    rate_limits: str = ""
+    rate_limit_key_header: str = "X-API-Key"  # Clients sending this header are limited by key instead of IP
+    rate_limit_max_clients: int = 100_000  # Token buckets kept in memory (least recently used dropped)
+    max_concurrency: int = 256  # Requests processed at once; 0 = no limit
+    max_queue: int = 512  # Requests waiting for a slot; beyond that → 503 right away
+    queue_timeout: float = 2.0  # Max seconds a request waits in the queue before a 503
+
+    # Bulk endpoints (/items/bulk, /users/bulk)
+    bulk_max_rows: int = 50_000
+    bulk_max_bytes: int = 64 * 1024 * 1024  # Larger bodies are refused (413) while they are read
+
+    # Startup (main.py): which routers are registered and when their modules are imported
+    routers: str = ""  # Comma-separated names, e.g. "items,users,metrics"; empty = all of them
+    lazy_routers: bool = True  # Import a router on the first request to its prefix instead of at startup
+    startup_report: bool = False  # Log the startup phases (imports, app, lifespan, first response)
+
+    # /admin routes: only registered when a token is set, then sent as `X-Admin-Token: <token>`
+    admin_token: str = ""
+
+    # Sampling profiler (off unless a sample rate or a token is set)
+    profiling_sample_rate: float = 0.0  # Fraction of requests profiled, e.g. 0.01
+    profiling_token: str = ""  # Enables the X-Profile: <token> header (profiles one request)
+    profiling_interval_ms: float = 5.0
+    profiling_output_dir: str = ""  # If set, collapsed stacks are written there at shutdown
+
+    @property
+    def profiling_enabled(self) -> bool:
+        return self.profiling_sample_rate > 0 or bool(self.profiling_token)
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            external_api_base_url=os.getenv("EXTERNAL_API_BASE_URL", cls.external_api_base_url).rstrip("/"),
+            http_max_connections=_env_int("HTTP_MAX_CONNECTIONS", cls.http_max_connections),
+            http_max_keepalive_connections=_env_int("HTTP_MAX_KEEPALIVE_CONNECTIONS", cls.http_max_keepalive_connections),
+            http_keepalive_expiry=_env_float("HTTP_KEEPALIVE_EXPIRY", cls.http_keepalive_expiry),
+            http_timeout=_env_float("HTTP_TIMEOUT", cls.http_timeout),
+            http_connect_timeout=_env_float("HTTP_CONNECT_TIMEOUT", cls.http_connect_timeout),
+            http2=_env_bool("HTTP2", cls.http2),
+            upstream_retries=_env_int("UPSTREAM_RETRIES", cls.upstream_retries),
+            upstream_backoff_base=_env_float("UPSTREAM_BACKOFF_BASE", cls.upstream_backoff_base),
+            upstream_backoff_max=_env_float("UPSTREAM_BACKOFF_MAX", cls.upstream_backoff_max),
+            upstream_deadline=_env_float("UPSTREAM_DEADLINE", cls.upstream_deadline),
+            breaker_failure_threshold=_env_int("BREAKER_FAILURE_THRESHOLD", cls.breaker_failure_threshold),
+            breaker_reset_timeout=_env_float("BREAKER_RESET_TIMEOUT", cls.breaker_reset_timeout),
+            external_cache_max_entries=_env_int("EXTERNAL_CACHE_MAX_ENTRIES", cls.external_cache_max_entries),
+            external_cache_ttl=_env_float("EXTERNAL_CACHE_TTL", cls.external_cache_ttl),
+            external_cache_stale_ttl=_env_float("EXTERNAL_CACHE_STALE_TTL", cls.external_cache_stale_ttl),
+            external_batch_max_ids=_env_int("EXTERNAL_BATCH_MAX_IDS", cls.external_batch_max_ids),
+            external_batch_concurrency=_env_int("EXTERNAL_BATCH_CONCURRENCY", cls.external_batch_concurrency),
+            images_root=os.path.join(PROJECT_DIR, os.getenv("IMAGES_ROOT", cls.images_root)),
+            images_stat_cache_size=_env_int("IMAGES_STAT_CACHE_SIZE", cls.images_stat_cache_size),
+            images_stat_cache_ttl=_env_float("IMAGES_STAT_CACHE_TTL", cls.images_stat_cache_ttl),
+            images_cache_control=os.getenv("IMAGES_CACHE_CONTROL", cls.images_cache_control),
+            thumbnail_cache_dir=os.path.join(PROJECT_DIR, os.getenv("THUMBNAIL_CACHE_DIR", cls.thumbnail_cache_dir)),
+            thumbnail_cache_max_bytes=_env_int("THUMBNAIL_CACHE_MAX_BYTES", cls.thumbnail_cache_max_bytes),
+            image_workers=_env_int("IMAGE_WORKERS", cls.image_workers),
+            storage_backend=os.getenv("STORAGE_BACKEND", cls.storage_backend).strip().lower(),
+            sqlite_path=os.path.join(PROJECT_DIR, os.getenv("SQLITE_PATH", cls.sqlite_path)),
+            sqlite_pool_size=_env_int("SQLITE_POOL_SIZE", cls.sqlite_pool_size),
+            persist_dir=_env_path("PERSIST_DIR", cls.persist_dir),
+            persist_flush_interval=_env_float("PERSIST_FLUSH_INTERVAL", cls.persist_flush_interval),
+            persist_snapshot_every=_env_int("PERSIST_SNAPSHOT_EVERY", cls.persist_snapshot_every),
+            cache_control_static=os.getenv("CACHE_CONTROL_STATIC", cls.cache_control_static),
+            cache_control_data=os.getenv("CACHE_CONTROL_DATA", cls.cache_control_data),
+            cache_control_overrides=os.getenv("CACHE_CONTROL_OVERRIDES", cls.cache_control_overrides),
+            compression_encodings=os.getenv("COMPRESSION_ENCODINGS", cls.compression_encodings).strip().lower(),
+            compression_minimum_size=_env_int("COMPRESSION_MINIMUM_SIZE", cls.compression_minimum_size),
+            compression_gzip_level=_env_int("COMPRESSION_GZIP_LEVEL", cls.compression_gzip_level),
+            compression_brotli_quality=_env_int("COMPRESSION_BROTLI_QUALITY", cls.compression_brotli_quality),
+            compression_zstd_level=_env_int("COMPRESSION_ZSTD_LEVEL", cls.compression_zstd_level),
+            compression_cache_max_bytes=_env_int("COMPRESSION_CACHE_MAX_BYTES", cls.compression_cache_max_bytes),
+            rate_limits=os.getenv("RATE_LIMITS", cls.rate_limits),
+            rate_limit_key_header=os.getenv("RATE_LIMIT_KEY_HEADER", cls.rate_limit_key_header),
+            rate_limit_max_clients=_env_int("RATE_LIMIT_MAX_CLIENTS", cls.rate_limit_max_clients),
+            max_concurrency=_env_int("MAX_CONCURRENCY", cls.max_concurrency),
+            max_queue=_env_int("MAX_QUEUE", cls.max_queue),
+            queue_timeout=_env_float("QUEUE_TIMEOUT", cls.queue_timeout),
+            bulk_max_rows=_env_int("BULK_MAX_ROWS", cls.bulk_max_rows),
+            bulk_max_bytes=_env_int("BULK_MAX_BYTES", cls.bulk_max_bytes),
+            routers=os.getenv("ROUTERS", cls.routers).strip().lower(),
+            lazy_routers=_env_bool("LAZY_ROUTERS", cls.lazy_routers),
+            startup_report=_env_bool("STARTUP_REPORT", cls.startup_report),
+            admin_token=os.getenv("ADMIN_TOKEN", cls.admin_token),
+            profiling_sample_rate=_env_float("PROFILING_SAMPLE_RATE", cls.profiling_sample_rate),
+            profiling_token=os.getenv("PROFILING_TOKEN", cls.profiling_token),
+            profiling_interval_ms=_env_float("PROFILING_INTERVAL_MS", cls.profiling_interval_ms),
+            profiling_output_dir=os.getenv("PROFILING_OUTPUT_DIR", cls.profiling_output_dir),
+        )
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """The settings are read from the environment only the first time"""
+    return Settings.from_env()
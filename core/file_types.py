@@ -0,0 +1,30 @@
+from typing import Optional
+
+# Magic numbers: the first bytes of a file tell its real type, whatever its name says
+MAGIC_NUMBERS = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"%PDF-", "application/pdf"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"\x1f\x8b", "application/gzip"),
+]
+
+SNIFF_SIZE = 16  # Bytes needed to recognise every type above
+
+
+def sniff_file_type(head: bytes) -> Optional[str]:
+    """Return the MIME type matching the first bytes of a file, or None"""
+    # RIFF containers: the real type is at offset 8 (e.g. "RIFF....WEBP")
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for magic, media_type in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return media_type
+    return None
+
+
+def is_image(media_type: Optional[str]) -> bool:
+    return media_type is not None and media_type.startswith("image/")
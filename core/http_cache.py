@@ -0,0 +1,159 @@
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .route_lookup import RouteLookup
+
+VersionSource = Callable[[], Awaitable[Optional[object]]]
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """
+    How the responses of one route are cached by clients
+
+    - cache_control: value of the Cache-Control header
+    - version: async function returning a counter that changes whenever the
+      data behind the route changes (a store version). The ETag is then a
+      weak one built from it, known BEFORE running the route, so a matching
+      If-None-Match is answered with 304 without doing any work.
+    - deterministic: the body only depends on the URL. The strong ETag
+      (hash of the body) is remembered per URL, so a revalidation is also
+      answered without running the route.
+    Without version or deterministic, the route runs and the body is hashed;
+    a match still saves the bandwidth (304 with no body).
+    """
+
+    cache_control: str = "no-cache"
+    version: Optional[VersionSource] = None
+    deterministic: bool = False
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/"x" and "x" are the same tag"""
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+
+def body_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def parse_cache_control_overrides(value: str) -> Dict[str, str]:
+    """'/models/{model_name}=public, max-age=300;/=no-cache' → {route: Cache-Control}"""
+    overrides = {}
+    for entry in value.split(";"):
+        route, separator, cache_control = entry.partition("=")
+        if separator and route.strip():
+            overrides[route.strip()] = cache_control.strip()
+    return overrides
+
+
+class HTTPCacheMiddleware:
+    """
+    Pure ASGI middleware: ETag / If-None-Match (304) and Cache-Control per route
+
+    `policies` maps route templates ("/items/{item_id}") to a CachePolicy.
+    Only GET/HEAD requests to those routes are touched; everything else
+    passes straight through.
+    """
+
+    def __init__(self, app: ASGIApp, policies: Dict[str, CachePolicy], max_urls: int = 4096):
+        self.app = app
+        self.policies = policies
+        self.max_urls = max_urls
+        self._routes = RouteLookup(max_urls)
+        self._etags: "OrderedDict[bytes, str]" = OrderedDict()  # URL → strong ETag
+
+    def _remember(self, cache: OrderedDict, key, value) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.max_urls:
+            cache.popitem(last=False)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        route = self._routes.find(scope)
+        policy = self.policies.get(getattr(route, "path", None)) if route is not None else None
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        url = scope["path"].encode("utf-8") + b"?" + scope.get("query_string", b"")
+
+        etag = None
+        if policy.version is not None:
+            # Store version + URL: a different page or filter is a different resource
+            etag = f'W/"{await policy.version()}-{hashlib.blake2b(url, digest_size=6).hexdigest()}"'
+        elif policy.deterministic:
+            etag = self._etags.get(url)
+
+        if etag is not None and etag_matches(if_none_match, etag):
+            scope["route"] = route  # So the metrics still see which route it was
+            await self._send_not_modified(send, etag, policy)
+            return
+
+        if etag is not None:
+            await self.app(scope, receive, self._add_headers(send, etag, policy))
+        else:
+            await self._run_and_hash(scope, receive, send, policy, if_none_match, url)
+
+    def _add_headers(self, send: Send, etag: str, policy: CachePolicy) -> Send:
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = [(k, v) for k, v in message.get("headers", []) if k not in (b"etag", b"cache-control")]
+                headers += [(b"etag", etag.encode("latin-1")), (b"cache-control", policy.cache_control.encode("latin-1"))]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        return send_with_headers
+
+    async def _run_and_hash(self, scope, receive, send, policy: CachePolicy, if_none_match, url) -> None:
+        # The ETag depends on the whole body: hold the response until it is complete
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def buffer(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                if start["status"] != 200:
+                    await send(message)
+                return
+            if start is None or start["status"] != 200 or message["type"] != "http.response.body":
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            etag = body_etag(body)
+            if policy.deterministic:
+                self._remember(self._etags, url, etag)
+            if etag_matches(if_none_match, etag):
+                await self._send_not_modified(send, etag, policy)
+                return
+            await self._add_headers(send, etag, policy)(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, buffer)
+
+    @staticmethod
+    async def _send_not_modified(send: Send, etag: str, policy: CachePolicy) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": 304,
+            "headers": [(b"etag", etag.encode("latin-1")), (b"cache-control", policy.cache_control.encode("latin-1"))],
+        })
+        await send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,41 @@
+import logging
+
+import httpx
+from fastapi import Request
+
+from .config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+def create_http_client(settings: Settings) -> httpx.AsyncClient:
+    """
+    Build the app-wide httpx client (one per worker process)
+
+    Reusing one client means reusing its connection pool: after the first
+    request to DummyJSON, the next ones skip the TCP connection and the TLS
+    handshake and go straight through a kept-alive connection.
+    """
+    http2 = settings.http2
+    if http2:
+        try:
+            import h2  # noqa: F401  (httpx needs it for HTTP/2: pip install "httpx[http2]")
+        except ImportError:
+            logger.warning("HTTP2=true but the 'h2' package is not installed, using HTTP/1.1")
+            http2 = False
+
+    return httpx.AsyncClient(
+        base_url=settings.external_api_base_url,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout),
+    )
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """Dependency: the shared client (created on first use, see core/resources.py)"""
+    return request.app.state.resources.http_client
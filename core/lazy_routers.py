@@ -0,0 +1,103 @@
+import importlib
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from fastapi import FastAPI
+from starlette.routing import BaseRoute, Match, NoMatchFound
+from starlette.types import Receive, Scope, Send
+
+
+@dataclass(frozen=True)
+class RouterSpec:
+    """
+    One router of the app: its name (for the ROUTERS setting), the module
+    that defines `router`, and the path prefix of its routes
+    """
+
+    name: str
+    module: str
+    prefix: str
+
+
+class LazyRouter(BaseRoute):
+    """
+    Placeholder for a router whose module is not imported yet
+
+    It sits in app.router.routes where the real routes will go. The first
+    request whose path starts with the prefix imports the module and puts
+    the real routes in its place, so the order of the routes (and which one
+    wins) is the same as with app.include_router. After that the
+    placeholder is gone and costs nothing.
+    """
+
+    def __init__(self, app: FastAPI, spec: RouterSpec):
+        self.app = app
+        self.spec = spec
+        self.routes: Optional[List[BaseRoute]] = None
+
+    @property
+    def path(self) -> str:
+        return self.spec.prefix
+
+    def load(self) -> List[BaseRoute]:
+        if self.routes is not None:
+            return self.routes
+        module = importlib.import_module(self.spec.module)
+        routes = self.app.router.routes
+        before = len(routes)
+        self.app.include_router(module.router)  # Appends the routes at the end...
+        self.routes = routes[before:]
+        del routes[before:]
+        for index, route in enumerate(routes):  # ...and we move them where the placeholder was
+            if route is self:
+                routes[index:index + 1] = self.routes
+                break
+        self.app.openapi_schema = None  # The docs now have more routes
+        return self.routes
+
+    def _in_prefix(self, path: str) -> bool:
+        prefix = self.spec.prefix
+        return not prefix or path == prefix or path.startswith(prefix.rstrip("/") + "/")
+
+    def matches(self, scope: Scope) -> Tuple[Match, dict]:
+        if scope["type"] not in ("http", "websocket") or not self._in_prefix(scope["path"]):
+            return Match.NONE, {}
+        # Same rule as the Router: the first full match, else the first partial one (→ 405)
+        partial = None
+        for route in self.load():
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                return match, {**child_scope, "route": child_scope.get("route", route)}
+            if match == Match.PARTIAL and partial is None:
+                partial = {**child_scope, "route": child_scope.get("route", route)}
+        if partial is not None:
+            return Match.PARTIAL, partial
+        return Match.NONE, {}
+
+    def url_path_for(self, name: str, /, **path_params):
+        for route in self.load():
+            try:
+                return route.url_path_for(name, **path_params)
+            except NoMatchFound:
+                pass
+        raise NoMatchFound(name, path_params)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # matches() put the real route in the scope
+        await scope["route"].handle(scope, receive, send)
+
+
+def include_routers(app: FastAPI, specs: List[RouterSpec], lazy: bool) -> None:
+    """Register the routers in order: placeholders if lazy, the real routes otherwise"""
+    for spec in specs:
+        if lazy:
+            app.router.routes.append(LazyRouter(app, spec))
+        else:
+            app.include_router(importlib.import_module(spec.module).router)
+
+
+def load_all(app: FastAPI) -> None:
+    """Import every router still waiting (the OpenAPI schema needs all the routes)"""
+    for route in list(app.router.routes):
+        if isinstance(route, LazyRouter):
+            route.load()
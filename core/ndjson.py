@@ -0,0 +1,23 @@
+from typing import AsyncIterator
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+EXPORT_CHUNK_SIZE = 500  # Records serialized per chunk sent to the client
+
+
+async def stream_ndjson(store, chunk_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Stream every record of a repository as newline-delimited JSON
+
+    The repository is walked with keyset pagination (`page_after_json`), so
+    only one chunk of records is held in memory at a time, and the first
+    chunk goes out before the rest of the data is even read.
+    Each line is the JSON the repository keeps for the record, so it has
+    exactly the same shape as the record in the regular JSON endpoints.
+    """
+    after = None
+    while True:
+        page, after = await store.page_after_json(after, chunk_size)
+        if page:
+            yield b"\n".join(page) + b"\n"
+        if after is None:
+            break
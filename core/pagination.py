@@ -0,0 +1,45 @@
+import base64
+import json
+from typing import Optional
+
+from fastapi import HTTPException, Request, Response
+
+MAX_PAGE_SIZE = 100  # Hard limit for any page, whatever the client asks for
+
+
+def clamp_limit(limit: int) -> int:
+    """Keep the page size between 1 and MAX_PAGE_SIZE"""
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(after: int) -> str:
+    """Build an opaque cursor: base64url(JSON) of the last key we returned"""
+    raw = json.dumps({"after": after}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Read back the key stored in a cursor (400 if the cursor was tampered with)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["after"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(after, int) or isinstance(after, bool):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return after
+
+
+def set_next_cursor(request: Request, response: Response, after: Optional[int], limit: int) -> None:
+    """
+    Advertise the next page in the headers, so the JSON body keeps its shape
+
+    - X-Next-Cursor: the opaque cursor to send back as ?cursor=...
+    - Link: the full URL of the next page (rel="next")
+    """
+    if after is None:
+        return
+    cursor = encode_cursor(after)
+    next_url = request.url.remove_query_params("skip").include_query_params(cursor=cursor, limit=limit)
+    response.headers["X-Next-Cursor"] = cursor
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
@@ -0,0 +1,154 @@
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = "/".join(code.co_filename.replace("\\", "/").rsplit("/", 2)[-2:])
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({filename})"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler: a background thread looks at the event loop's stack
+    every `interval` seconds while at least one profiled request is running
+
+    Each profiled request registers the frame of the middleware call that
+    handles it. A sample belongs to a request when that frame is in the
+    sampled stack (with asyncio, the running coroutine's frames are chained
+    to the middleware that awaited them). Only the frames below the
+    middleware are kept, and stacks are counted per route template in the
+    "collapsed" format used by flamegraph.pl and speedscope:
+        frame1;frame2;frame3 <count>
+
+    Samples of sync (def) endpoints, which run in the threadpool, are not seen.
+    """
+
+    def __init__(self, interval: float = 0.005, max_stacks_per_route: int = 5000):
+        self.interval = interval
+        self.max_stacks_per_route = max_stacks_per_route
+        self.stacks: Dict[str, Counter] = {}  # route template → Counter(collapsed stack → samples)
+        self.requests: Counter = Counter()  # route template → profiled requests
+        self._active: Dict[object, Counter] = {}  # middleware frame → samples of that request
+        self._lock = threading.Lock()
+        self._has_work = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._target_thread_id: Optional[int] = None
+
+    def begin(self, frame) -> Counter:
+        """Start sampling the request handled by `frame` (called on the event loop thread)"""
+        samples = Counter()
+        with self._lock:
+            self._active[frame] = samples
+        if self._thread is None:
+            self._target_thread_id = threading.get_ident()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        self._has_work.set()
+        return samples
+
+    def end(self, frame, route: str) -> None:
+        with self._lock:
+            samples = self._active.pop(frame, None)
+            if not self._active:
+                self._has_work.clear()
+        if samples is None:
+            return
+        self.requests[route] += 1
+        route_stacks = self.stacks.setdefault(route, Counter())
+        for stack, count in samples.items():
+            if stack in route_stacks or len(route_stacks) < self.max_stacks_per_route:
+                route_stacks[stack] += count
+
+    def _run(self) -> None:
+        while True:
+            self._has_work.wait()
+            frame = sys._current_frames().get(self._target_thread_id)
+            if frame is not None:
+                self._sample(frame)
+            time.sleep(self.interval)
+
+    def _sample(self, frame) -> None:
+        labels = []
+        with self._lock:
+            while frame is not None:
+                samples = self._active.get(frame)
+                if samples is not None:
+                    samples[";".join(reversed(labels))] += 1
+                    return
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+
+    def collapsed(self, route: str) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.get(route, Counter()).most_common())
+
+    def summary(self) -> dict:
+        return {
+            route: {"requests": self.requests[route], "samples": sum(stacks.values()), "unique_stacks": len(stacks)}
+            for route, stacks in self.stacks.items()
+        }
+
+    def reset(self) -> None:
+        self.stacks.clear()
+        self.requests.clear()
+
+    def dump(self, directory: str) -> list:
+        """Write one <route>.collapsed file per route, return the file names"""
+        os.makedirs(directory, exist_ok=True)
+        written = []
+        for route in list(self.stacks):
+            name = re.sub(r"[^A-Za-z0-9_.-]+", "_", route).strip("_") or "root"
+            path = os.path.join(directory, f"{name}.collapsed")
+            with open(path, "w", encoding="utf-8") as output:
+                output.write(self.collapsed(route))
+            written.append(path)
+        return written
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a random fraction of requests (sample_rate), plus any request
+    sent with the header `X-Profile: <token>` when a token is configured
+
+    Only added to the app when profiling is configured (see main.py), so a
+    disabled profiler costs nothing at all.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: SamplingProfiler, sample_rate: float = 0.0, token: str = ""):
+        self.app = app
+        self.profiler = profiler
+        self.sample_rate = sample_rate
+        self.token = token.encode("latin-1")
+
+    def _wants_profile(self, scope: Scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    return value == self.token
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        frame = sys._getframe()
+        self.profiler.begin(frame)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.profiler.end(frame, route)
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .metrics import Counter, Gauge, registry
+from .route_lookup import RouteLookup
+
+PERIODS = {"s": 1.0, "m": 60.0, "h": 3600.0}
+
+http_requests_rejected_total = registry.register(Counter(
+    "http_requests_rejected_total", "Requests refused before reaching the app, by reason", ("reason",)
+))
+http_requests_queued = registry.register(Gauge(
+    "http_requests_queued", "Requests waiting for a free slot of the concurrency limit"
+))
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    A token bucket: `burst` tokens, refilled at `rate` tokens per second
+
+    Every request takes one token; with none left it is refused (429).
+    "20/s" → rate 20, burst 20. "600/m:50" → rate 10, burst 50.
+    """
+
+    rate: float
+    burst: float
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        limit, _, burst = value.strip().partition(":")
+        count, _, period = limit.partition("/")
+        if period.strip() not in PERIODS:
+            raise ValueError(f"Bad rate limit {value!r}, use e.g. 20/s, 600/m or 600/m:50")
+        count = float(count)
+        return cls(rate=count / PERIODS[period.strip()], burst=float(burst) if burst else count)
+
+
+def parse_rate_limits(value: str) -> Dict[Tuple[str, str], RateLimit]:
+    """
+    '/items/search=20/s;POST *=10/s:20' → {("*", "/items/search"): ..., ("POST", "*"): ...}
+
+    Each entry is "[METHOD ]route=limit". The route is a route template, or
+    "*" for every route; without a method the limit applies to all methods.
+    """
+    limits = {}
+    for entry in value.split(";"):
+        target, separator, limit = entry.partition("=")
+        if not separator or not target.strip():
+            continue
+        method, _, route = target.strip().rpartition(" ")
+        limits[(method.strip().upper() or "*", route.strip())] = RateLimit.parse(limit)
+    return limits
+
+
+class TokenBuckets:
+    """
+    One token bucket per (client, limit), in memory, for the whole process
+
+    Buckets are refilled lazily: a bucket only stores its tokens and when it
+    was last touched, and the refill is computed when a request arrives. The
+    least recently used buckets are dropped beyond `max_keys` (a dropped
+    bucket comes back full, so forgetting one is always on the client's side).
+    """
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: "OrderedDict[tuple, List[float]]" = OrderedDict()  # key → [tokens, last refill]
+
+    def take(self, key: tuple, limit: RateLimit) -> float:
+        """Take one token: 0.0 if the request may go, else the seconds until a token is back"""
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [limit.burst, now]
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+            bucket[1] = now
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return 0.0
+        return (1.0 - bucket[0]) / limit.rate if limit.rate > 0 else math.inf
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+async def send_error(send: Send, status_code: int, detail: str, retry_after: float) -> None:
+    """The same JSON error body as an HTTPException, with a Retry-After header (whole seconds)"""
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware: per-client token buckets, per route (429 + Retry-After)
+
+    The client is its API key (the `key_header` header) when it sends one,
+    else its IP address. Behind a proxy (Azure App Service), run uvicorn with
+    --proxy-headers --forwarded-allow-ips so the IP is the real client's.
+
+    `limits` maps (method, route template) to a RateLimit, with "*" as a
+    wildcard; the most specific entry wins: "POST /items/", then "/items/",
+    then "POST *", then "*". Routes without a limit pass straight through.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[Tuple[str, str], RateLimit], buckets: TokenBuckets,
+                 key_header: str = "x-api-key"):
+        self.app = app
+        self.limits = limits
+        self.buckets = buckets
+        self.key_header = key_header.lower()
+        self._routes = RouteLookup()
+
+    def _limit_for(self, method: str, template: Optional[str]) -> Tuple[Optional[tuple], Optional[RateLimit]]:
+        limits = self.limits
+        for key in ((method, template), ("*", template), (method, "*"), ("*", "*")):
+            limit = limits.get(key)
+            if limit is not None:
+                return key, limit
+        return None, None
+
+    def _client(self, scope: Scope) -> str:
+        if self.key_header:
+            api_key = Headers(scope=scope).get(self.key_header)
+            if api_key:
+                return "key:" + api_key
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.limits:
+            await self.app(scope, receive, send)
+            return
+        route = self._routes.find(scope)
+        rule, limit = self._limit_for(scope["method"], getattr(route, "path", None))
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        # The bucket is per client AND per rule: a busy search doesn't use up the POST budget
+        retry_after = self.buckets.take((self._client(scope), rule), limit)
+        if retry_after > 0:
+            http_requests_rejected_total.inc(("rate_limited",))
+            if route is not None:
+                scope["route"] = route  # So the metrics still see which route it was
+            await send_error(send, 429, "Too many requests", retry_after)
+            return
+        await self.app(scope, receive, send)
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Pure ASGI middleware: at most `max_concurrency` requests in the app at once
+
+    Requests beyond that wait in a FIFO queue, for at most `queue_timeout`
+    seconds. When `max_queue` requests are already waiting, or a request
+    waited too long, it is refused right away with 503 + Retry-After (load
+    shedding). Under overload a few clients get a fast 503, and the requests
+    that are accepted keep a bounded latency, instead of everyone timing out.
+
+    Paths starting with one of `exempt` (metrics, admin) are never queued, so
+    the server can still be observed while it is overloaded.
+    """
+
+    def __init__(self, app: ASGIApp, max_concurrency: int, max_queue: int = 0, queue_timeout: float = 1.0,
+                 exempt: Tuple[str, ...] = ("/metrics", "/admin")):
+        self.app = app
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.exempt = exempt
+        self.in_flight = 0
+        self._waiters: "OrderedDict[asyncio.Future, None]" = OrderedDict()  # FIFO queue
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.max_concurrency <= 0 or scope["path"].startswith(self.exempt):
+            await self.app(scope, receive, send)
+            return
+        if self.in_flight >= self.max_concurrency or self._waiters:
+            if len(self._waiters) >= self.max_queue:
+                http_requests_rejected_total.inc(("queue_full",))
+                await send_error(send, 503, "Server busy, try again later", self.queue_timeout)
+                return
+            if not await self._wait_for_slot():
+                http_requests_rejected_total.inc(("queue_timeout",))
+                await send_error(send, 503, "Server busy, try again later", self.queue_timeout)
+                return
+        else:
+            self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._release()
+
+    async def _wait_for_slot(self) -> bool:
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[waiter] = None
+        http_requests_queued.inc()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+            return True  # _release() handed its slot over: in_flight already counts us
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return True  # The slot arrived just as the timeout fired
+            return False
+        except asyncio.CancelledError:
+            # The client went away while waiting: give back the slot if we already got it
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+        finally:
+            self._waiters.pop(waiter, None)
+            http_requests_queued.dec()
+
+    def _release(self) -> None:
+        # Hand the slot to the oldest waiter (in_flight doesn't change), or free it
+        while self._waiters:
+            waiter, _ = self._waiters.popitem(last=False)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
@@ -0,0 +1,55 @@
+from .config import Settings
+
+
+class AppResources:
+    """
+    The expensive app-wide objects, created the first time they are needed
+
+    Importing httpx (and certifi's CA bundle) or starting the process pool at
+    startup delays the first response of a fresh instance, even when that
+    response never calls DummyJSON or resizes an image. So they are built on
+    first use instead, and closed at shutdown only if they were ever built.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._http_client = None
+        self._upstream = None
+        self._image_pool = None
+
+    @property
+    def http_client(self):
+        """One httpx client for the whole app (with its connection pool)"""
+        if self._http_client is None:
+            from .http_client import create_http_client
+            self._http_client = create_http_client(self.settings)
+        return self._http_client
+
+    @property
+    def upstream(self):
+        """The http_client with retries, deadlines and a circuit breaker per host"""
+        if self._upstream is None:
+            from .upstream import UpstreamClient
+            self._upstream = UpstreamClient(self.http_client, self.settings)
+        return self._upstream
+
+    @property
+    def image_pool(self):
+        """Processes where images are resized (CPU-bound work off the event loop)"""
+        if self._image_pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._image_pool = ProcessPoolExecutor(max_workers=self.settings.image_workers)
+        return self._image_pool
+
+    @property
+    def started(self) -> dict:
+        return {
+            "http_client": self._http_client is not None,
+            "image_pool": self._image_pool is not None,
+        }
+
+    async def aclose(self) -> None:
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        if self._image_pool is not None:
+            self._image_pool.shutdown(cancel_futures=True)
@@ -0,0 +1,36 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from starlette.routing import BaseRoute, Match
+from starlette.types import Scope
+
+
+class RouteLookup:
+    """
+    Finds the route a request will go to, BEFORE the router runs
+
+    Middleware that works per route (caching, rate limits...) needs the route
+    template (/items/{item_id}), not the raw path. We look for it the same
+    way the router will (the first route that fully matches) and remember the
+    answer per (method, path), so a hot path is looked up once.
+    """
+
+    def __init__(self, max_paths: int = 4096):
+        self.max_paths = max_paths
+        self._routes: "OrderedDict[Tuple[str, str], Optional[BaseRoute]]" = OrderedDict()
+
+    def find(self, scope: Scope) -> Optional[BaseRoute]:
+        key = (scope["method"], scope["path"])
+        if key in self._routes:
+            self._routes.move_to_end(key)
+            return self._routes[key]
+        found = None
+        for route in scope["app"].router.routes:
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                found = child_scope.get("route", route)  # A lazy router answers with the real route
+                break
+        self._routes[key] = found
+        while len(self._routes) > self.max_paths:
+            self._routes.popitem(last=False)
+        return found
@@ -0,0 +1,49 @@
+from typing import Any, Iterable, Mapping, Optional
+
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # Optional: without it we fall back to the standard json module
+    orjson = None
+
+# Used by every route that returns plain Python data (dicts, lists...):
+# orjson serializes several times faster than json.dumps and allocates less
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+class RecordEncoder:
+    """
+    Turns a stored record (a dict) into the JSON bytes of its response model
+
+    Validation and serialization happen in ONE pydantic-core call, with a
+    TypeAdapter built once. The repositories call this when a record is
+    written and keep the bytes, so reading a record doesn't validate it again.
+    """
+
+    def __init__(self, model: Any):
+        self.adapter = TypeAdapter(model)
+
+    def __call__(self, record: dict) -> bytes:
+        return self.adapter.dump_json(self.adapter.validate_python(record))
+
+
+def json_array(parts: Iterable[bytes]) -> bytes:
+    """Join already-serialized JSON values into a JSON array (no re-parsing)"""
+    return b"[" + b",".join(parts) + b"]"
+
+
+class RawJSONResponse(Response):
+    """
+    A response whose body is already JSON bytes
+
+    Returning a Response skips FastAPI's response_model validation and
+    serialization, so use it only with bytes produced from that same model
+    (the route keeps `response_model` for the documentation).
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, content: bytes, status_code: int = 200, headers: Optional[Mapping[str, str]] = None):
+        super().__init__(content=content, status_code=status_code, headers=headers)
@@ -0,0 +1,69 @@
+import logging
+import sys
+import time
+from typing import List, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Uvicorn's logger: its INFO lines are shown by default, next to "Application startup complete"
+logger = logging.getLogger("uvicorn.error")
+
+
+class StartupTimer:
+    """
+    Where the cold start goes: imports, building the app, lifespan, first response
+
+    main.py calls mark() at the end of each phase; every phase is the time
+    since the previous mark. Recording a mark is one perf_counter() call, so
+    the timer is always on; STARTUP_REPORT=true only adds the log line and
+    the first-response measurement.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.last = self.origin
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self) -> dict:
+        return {
+            "phases_ms": {phase: round(seconds * 1000, 2) for phase, seconds in self.phases},
+            "total_ms": round((self.last - self.origin) * 1000, 2),
+            "modules_loaded": len(sys.modules),
+        }
+
+    def log(self) -> None:
+        report = self.report()
+        phases = ", ".join(f"{phase} {ms}ms" for phase, ms in report["phases_ms"].items())
+        logger.info("Startup: %s (total %sms, %s modules)", phases, report["total_ms"], report["modules_loaded"])
+
+
+# Created when main.py imports this module: the first thing it does
+startup_timer = StartupTimer()
+
+
+class FirstResponseMiddleware:
+    """Marks "first response" when the first HTTP response starts, then logs the report"""
+
+    def __init__(self, app: ASGIApp, timer: StartupTimer):
+        self.app = app
+        self.timer = timer
+        self.done = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.done or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_mark(message: Message) -> None:
+            if message["type"] == "http.response.start" and not self.done:
+                self.done = True
+                self.timer.mark("first response")
+                self.timer.log()
+            await send(message)
+
+        await self.app(scope, receive, send_and_mark)
@@ -0,0 +1,84 @@
+import os
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from starlette.datastructures import Headers
+
+
+class StatCache:
+    """
+    Small LRU cache of (real path, os.stat result) per requested path
+
+    A hit costs no system call at all: no realpath, no stat. Entries expire
+    after `ttl` seconds so replaced files are picked up quickly. Missing
+    files are cached too (as None), so 404 floods don't hit the disk either.
+    """
+
+    def __init__(self, root: str, maxsize: int = 1024, ttl: float = 5.0):
+        self.root = os.path.realpath(root)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[Optional[Tuple[str, os.stat_result]], float]]" = OrderedDict()
+
+    def lookup(self, relative_path: str) -> Optional[Tuple[str, os.stat_result]]:
+        """Return (full path, stat) of a regular file under root, or None"""
+        entry = self._entries.get(relative_path)
+        now = time.monotonic()
+        if entry is not None and now < entry[1]:
+            self._entries.move_to_end(relative_path)
+            return entry[0]
+
+        result = self._resolve(relative_path)
+        self._entries[relative_path] = (result, now + self.ttl)
+        self._entries.move_to_end(relative_path)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return result
+
+    def _resolve(self, relative_path: str) -> Optional[Tuple[str, os.stat_result]]:
+        # realpath() follows "..", "." and symlinks, so the check below also
+        # catches /images/../../etc/passwd and links pointing outside the root
+        full_path = os.path.realpath(os.path.join(self.root, relative_path.lstrip("/")))
+        if os.path.commonpath([self.root, full_path]) != self.root:
+            return None
+        try:
+            stat_result = os.stat(full_path)
+        except OSError:
+            return None
+        if not os.path.isfile(full_path):
+            return None
+        return full_path, stat_result
+
+
+def make_etag(stat_result: os.stat_result) -> str:
+    """Strong validator from modification time (ns) and size: no file read needed"""
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def last_modified(stat_result: os.stat_result) -> str:
+    return formatdate(stat_result.st_mtime, usegmt=True)
+
+
+def is_not_modified(request_headers: Headers, etag: str, stat_result: os.stat_result) -> bool:
+    """
+    Conditional GET: True if the client's cached copy is still valid
+
+    If-None-Match wins over If-Modified-Since (RFC 9110, section 13.2.2).
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in tags
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(stat_result.st_mtime) <= since
+    return False
@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import importlib.util
+import mimetypes
+import os
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Tuple
+
+from .file_types import SNIFF_SIZE, is_image, sniff_file_type
+
+THUMBNAIL_FORMATS = {"jpeg": "image/jpeg", "png": "image/png", "webp": "image/webp"}
+
+
+def default_format(source_path: str) -> str:
+    """Keep PNG and WebP sources in their format (transparency), anything else → JPEG"""
+    media_type = mimetypes.guess_type(source_path)[0]
+    for fmt, format_media_type in THUMBNAIL_FORMATS.items():
+        if media_type == format_media_type:
+            return fmt
+    return "jpeg"
+
+PILLOW_AVAILABLE = importlib.util.find_spec("PIL") is not None  # Checked without importing it
+
+
+class NotAnImageError(ValueError):
+    """The source file is not an image we can decode"""
+
+
+def render_thumbnail(source_path: str, dest_path: str, width: Optional[int], height: Optional[int], fmt: str, quality: int) -> int:
+    """
+    Resize/convert one image; runs in a worker PROCESS (CPU-bound work)
+
+    The result is written to a temporary file and renamed, so a reader
+    never sees a half-written thumbnail. Returns the size of the output.
+    """
+    with open(source_path, "rb") as source:
+        if not is_image(sniff_file_type(source.read(SNIFF_SIZE))):
+            raise NotAnImageError(f"{os.path.basename(source_path)} is not an image")
+
+    from PIL import Image  # Imported in the worker only, the web process never loads Pillow
+
+    try:
+        image = Image.open(source_path)
+    except Image.UnidentifiedImageError:
+        raise NotAnImageError(f"{os.path.basename(source_path)} is not an image")
+
+    with image:
+        # Fit inside width x height, keeping the aspect ratio, never upscaling
+        ratio = min(width / image.width if width else 1.0, height / image.height if height else 1.0, 1.0)
+        if ratio < 1.0:
+            target = (max(1, round(image.width * ratio)), max(1, round(image.height * ratio)))
+            image.draft(image.mode, target)  # JPEG only: decode directly at a smaller scale (much faster)
+            image.thumbnail(target)
+        if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")  # JPEG has no alpha channel
+        temp_path = f"{dest_path}.{os.getpid()}.tmp"
+        image.save(temp_path, format=fmt.upper(), quality=quality)
+    os.replace(temp_path, dest_path)
+    return os.path.getsize(dest_path)
+
+
+class DerivativeCache:
+    """
+    Content-addressed disk cache for derived images, with size-based LRU eviction
+
+    The file name is a SHA-256 of (source path, source mtime and size,
+    parameters): a changed source gets a new key automatically, and a repeat
+    request is a dictionary lookup followed by a plain file read.
+    Concurrent requests for the same missing thumbnail share one render.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._index: Optional[Dict[str, Tuple[str, os.stat_result]]] = None  # key → (path, stat), LRU order
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._index_loading: Optional[asyncio.Future] = None  # The first scan, shared by the requests that wait for it
+
+    @staticmethod
+    def make_key(source_path: str, source_stat: os.stat_result, width, height, fmt: str, quality: int) -> str:
+        raw = f"{source_path}|{source_stat.st_mtime_ns}|{source_stat.st_size}|{width}|{height}|{fmt}|{quality}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path_for(self, key: str, fmt: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.{fmt}")
+
+    def _scan(self) -> List[Tuple[str, str, os.stat_result]]:
+        """(key, path, stat) of every file in the cache folder, oldest first (blocking: runs in a thread)"""
+        entries = []
+        for folder, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(folder, name)
+                entries.append((name.split(".", 1)[0], path, os.stat(path)))
+        entries.sort(key=lambda entry: entry[2].st_atime)
+        return entries
+
+    async def _load_index(self) -> Dict[str, Tuple[str, os.stat_result]]:
+        """
+        Scan the cache folder once (first use)
+
+        A big cache folder takes a while to walk, so the scan runs in a
+        thread: the event loop keeps serving other requests meanwhile, and
+        the requests that arrive during the scan wait for the same one.
+        """
+        if self._index is None:
+            if self._index_loading is None:
+                self._index_loading = asyncio.ensure_future(asyncio.to_thread(self._scan))
+            try:
+                entries = await asyncio.shield(self._index_loading)
+            except BaseException:
+                if self._index_loading.done():
+                    self._index_loading = None  # The scan failed: the next request tries again
+                raise
+            if self._index is None:  # The first waiter to wake up builds it
+                self._index = {key: (path, stat_result) for key, path, stat_result in entries}
+                self.total_bytes = sum(stat_result.st_size for _, stat_result in self._index.values())
+                self._index_loading = None
+        return self._index
+
+    async def get_or_render(self, executor: Executor, source_path: str, source_stat: os.stat_result,
+                            width: Optional[int], height: Optional[int], fmt: str, quality: int) -> Tuple[str, os.stat_result]:
+        """Return (path, stat) of the derived image, rendering it if needed"""
+        index = await self._load_index()
+        key = self.make_key(source_path, source_stat, width, height, fmt, quality)
+        entry = index.pop(key, None)
+        if entry is not None:
+            index[key] = entry  # Move to the end: most recently used
+            return entry
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._render(executor, key, source_path, width, height, fmt, quality))
+            self._inflight[key] = future
+        return await asyncio.shield(future)
+
+    async def _render(self, executor: Executor, key: str, source_path: str,
+                      width: Optional[int], height: Optional[int], fmt: str, quality: int) -> Tuple[str, os.stat_result]:
+        try:
+            dest_path = self._path_for(key, fmt)
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(executor, render_thumbnail, source_path, dest_path, width, height, fmt, quality)
+            entry = (dest_path, os.stat(dest_path))
+            self._index[key] = entry
+            self.total_bytes += entry[1].st_size
+            self._evict()
+            return entry
+        finally:
+            self._inflight.pop(key, None)
+
+    def _evict(self) -> None:
+        """Delete least recently used files until we are back under 90% of max_bytes"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        while len(self._index) > 1 and self.total_bytes > target:  # Never the file we just rendered
+            key = next(iter(self._index))
+            path, stat_result = self._index.pop(key)
+            self.total_bytes -= stat_result.st_size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    async def stats(self) -> dict:
+        index = await self._load_index()
+        return {"files": len(index), "total_bytes": self.total_bytes, "max_bytes": self.max_bytes}
@@ -0,0 +1,203 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+from fastapi import Request
+
+from .config import Settings
+from .metrics import upstream_request_duration_seconds, upstream_retries_total
+
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """The circuit for this host is open: we don't even try the request"""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"Circuit open for {host}, retry in {retry_after:.1f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(Exception):
+    """The time budget of the request ran out before the upstream answered"""
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker: closed → open → half-open → closed
+
+    - closed: requests go through; `failure_threshold` consecutive failures open it
+    - open: requests fail immediately for `reset_timeout` seconds
+    - half-open: ONE probe request is let through; success closes the
+      circuit, failure opens it again
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (self._clock() - self.opened_at))
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self._probe_in_flight or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = self._clock()
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """The probe ended without an outcome (cancelled, unexpected error): let the next call probe"""
+        self._probe_in_flight = False
+
+
+class UpstreamClient:
+    """
+    Resilient GET calls on top of the shared httpx client
+
+    - Circuit breaking per host: while a host's circuit is open, calls fail
+      fast with CircuitOpenError instead of waiting for a timeout.
+    - Retries with jittered exponential backoff ("full jitter"), only for
+      GET (idempotent) and only on connection errors, timeouts and
+      429/502/503/504 answers.
+    - Deadline propagation: every call has an absolute deadline; each
+      attempt's timeout and each backoff sleep are cut to what is left of it,
+      so retries never make a request slower than its budget.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        settings: Settings,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        jitter: Callable[[], float] = random.random,
+    ):
+        self.client = client
+        self.settings = settings
+        self._sleep = sleep
+        self._jitter = jitter
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker_for(self, host: str) -> CircuitBreaker:
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = CircuitBreaker(
+                self.settings.breaker_failure_threshold, self.settings.breaker_reset_timeout
+            )
+        return breaker
+
+    def new_deadline(self) -> float:
+        return time.monotonic() + self.settings.upstream_deadline
+
+    async def get(self, url: str, deadline: Optional[float] = None) -> httpx.Response:
+        """GET `url` with retries; returns the last response or raises the last error"""
+        if deadline is None:
+            deadline = self.new_deadline()
+        host = self.client.base_url.join(url).host
+        breaker = self.breaker_for(host)
+        attempts = self.settings.upstream_retries + 1
+
+        for attempt in range(attempts):
+            # Checked before allow_request(): a call that never goes out must not take the probe
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceededError(f"Deadline exceeded calling {host}")
+            probe = breaker.state == "half_open"
+            if not breaker.allow_request():
+                raise CircuitOpenError(host, breaker.retry_after())
+
+            started = time.perf_counter()
+            try:
+                response = await self.client.get(url, timeout=min(remaining, self.settings.http_timeout))
+            except httpx.TransportError as error:
+                upstream_request_duration_seconds.observe(time.perf_counter() - started, (host, type(error).__name__))
+                breaker.record_failure()
+                if attempt == attempts - 1:
+                    if isinstance(error, httpx.TimeoutException) and time.monotonic() >= deadline:
+                        raise DeadlineExceededError(f"Deadline exceeded calling {host}") from error
+                    raise
+            else:
+                upstream_request_duration_seconds.observe(time.perf_counter() - started, (host, str(response.status_code)))
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    breaker.record_success()  # 404 and friends mean the host is healthy
+                    return response
+                breaker.record_failure()
+                if attempt == attempts - 1:
+                    return response
+            finally:
+                # Cancelled, or an error that says nothing about the host (e.g. httpx.DecodingError):
+                # without this the probe flag stays set and the circuit never closes again
+                if probe:
+                    breaker.release_probe()
+
+            backoff = self._jitter() * min(
+                self.settings.upstream_backoff_max, self.settings.upstream_backoff_base * 2 ** attempt
+            )
+            if time.monotonic() + backoff >= deadline:
+                raise DeadlineExceededError(f"Deadline exceeded calling {host}")
+            upstream_retries_total.inc((host,))
+            await self._sleep(backoff)
+
+        raise AssertionError("unreachable")  # The loop always returns or raises
+
+    def stats(self) -> dict:
+        return {
+            host: {
+                "state": breaker.state,
+                "consecutive_failures": breaker.consecutive_failures,
+                "retry_after_seconds": round(breaker.retry_after(), 3),
+            }
+            for host, breaker in self.breakers.items()
+        }
+
+
+def get_upstream(request: Request) -> UpstreamClient:
+    """Dependency: the app-wide UpstreamClient (created on first use, see core/resources.py)"""
+    return request.app.state.resources.upstream
+
+
+def request_deadline(request: Request) -> float:
+    """
+    Dependency: absolute deadline (time.monotonic()) for the upstream calls
+
+    It is UPSTREAM_DEADLINE seconds from now, or less if the caller sends a
+    shorter budget in the `X-Request-Timeout` header (seconds).
+    """
+    budget = request.app.state.resources.settings.upstream_deadline
+    header = request.headers.get("x-request-timeout")
+    if header:
+        try:
+            budget = min(budget, max(0.0, float(header)))
+        except ValueError:
+            pass
+    return time.monotonic() + budget
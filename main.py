@@ -1,231 +1,203 @@
+from core.startup import FirstResponseMiddleware, startup_timer  # First: starts the startup clock
+from contextlib import asynccontextmanager
+from datetime import datetime
 from typing import Annotated, List
 from pydantic import BaseModel
-from fastapi import FastAPI, HTTPException, Query
-import httpx
-import base64
-from routers import users, items, models
+from fastapi import FastAPI, Query
+from core.config import Settings, get_settings
+from core.lazy_routers import RouterSpec, include_routers, load_all
+from core.resources import AppResources
+from core.metrics import MetricsMiddleware
+from core.profiling import ProfilingMiddleware, profiler
+from core.serialization import DefaultJSONResponse
+from core.http_cache import CachePolicy, HTTPCacheMiddleware, parse_cache_control_overrides
+from core.compression import CompressionMiddleware, available_codecs, compressed_cache
+from core.rate_limit import ConcurrencyLimitMiddleware, RateLimitMiddleware, TokenBuckets, parse_rate_limits
 
-app = FastAPI(
-    title="FastAPI Scaffolding Project",
-    description="A well-organized FastAPI application with routers",
-    version="1.0.0"
-)
+startup_timer.mark("imports")
 
-app.include_router(users.router)
-app.include_router(items.router)
-app.include_router(models.router)
+# Every router of the app, in the order they are registered. The prefix is
+# what lets a lazy router be found before its module is imported.
+# The ROUTERS setting picks a subset by name (e.g. ROUTERS=items,users,metrics).
+ROUTERS = [
+    RouterSpec("metrics", "routers.metrics", "/metrics"),
+    RouterSpec("admin", "routers.admin", "/admin"),
+    RouterSpec("users", "routers.users", "/users"),
+    RouterSpec("items", "routers.items", "/items"),
+    RouterSpec("models", "routers.models", "/models"),
+    RouterSpec("external", "routers.external", "/external"),
+    RouterSpec("images", "routers.images", "/images"),
+    RouterSpec("convert", "routers.convert", "/convert"),
+]
 
-class HelloResponse(BaseModel):
-    Hello: str
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Code before `yield` runs once at startup, code after it runs at shutdown
+    
+    The httpx client (with its connection pool, retries and circuit breakers)
+    and the process pool that resizes images are NOT created here: building
+    them would delay the first response of every new instance. AppResources
+    creates each one the first time a request needs it (see core/resources.py)
+    and we close whatever was created when the server stops.
+    
+    At shutdown the storage repositories release their database connections.
+    """
+    settings = get_settings()
+    app.state.resources = AppResources(settings)
+    startup_timer.mark("lifespan")
+    yield
+    await app.state.resources.aclose()
+    from storage import close_repositories  # Imported here: only needed at shutdown
+    await close_repositories()
+    if settings.profiling_output_dir:
+        profiler.dump(settings.profiling_output_dir)
 
-@app.get("/", response_model=HelloResponse)
-def read_root():
-    return {"Hello": "World"}
+async def _items_version():
+    from routers.items import item_repo  # Already imported: only item routes use this policy
+    return await item_repo.version()
 
-@app.get("/datetime")
-def get_datetime():
-    from datetime import datetime
-    return {
-        "timestamp": datetime.now(),
-    }
+async def _users_version():
+    from routers.users import user_repo
+    return await user_repo.version()
 
-@app.get("/images/{image_path:path}")
-async def serve_image(image_path: str):
+async def _user_items_version():
+    from routers.items import item_repo
+    from routers.users import user_repo
+    return f"{await user_repo.version()}.{await item_repo.version()}"
+
+def build_cache_policies(settings) -> dict:
     """
-    Serve images from different folders
+    Which GET routes get ETags (and 304s) and which Cache-Control they send
     
-    Useful examples:
-    - /images/products/laptop.jpg
-    - /images/users/avatars/juan.png
-    - /images/blog/2024/article-1/cover.jpg
+    - Item/user routes: weak ETag from the store version, checked before the
+      route runs, so polling an unchanged list costs almost nothing.
+    - Routes whose answer only depends on the URL: strong ETag (body hash),
+      remembered per URL.
     """
-    # In real life, here you would verify that the file exists
-    # and return FileResponse(f"/static/images/{image_path}")
-    
-    return {
-        "image_path": image_path,
-        "full_url": f"https://myserver.com/static/images/{image_path}",
-        "type": "image",
-        "folder": image_path.split('/')[0] if '/' in image_path else "root"
+    static = CachePolicy(settings.cache_control_static, deterministic=True)
+    item_data = CachePolicy(settings.cache_control_data, version=_items_version)
+    user_data = CachePolicy(settings.cache_control_data, version=_users_version)
+    policies = {
+        "/": static,
+        "/{name}": static,
+        "/models/{model_name}": static,
+        "/items/": item_data,
+        "/items/search": item_data,
+        "/items/stats": item_data,
+        "/items/export": item_data,
+        "/items/{item_id}": item_data,
+        "/users/": user_data,
+        "/users/by-email": user_data,
+        "/users/export": user_data,
+        "/users/{user_id}": user_data,
+        "/users/{user_id}/items/{item_id}": CachePolicy(settings.cache_control_data, version=_user_items_version),
     }
+    for route, cache_control in parse_cache_control_overrides(settings.cache_control_overrides).items():
+        if route in policies:
+            policies[route] = CachePolicy(cache_control, policies[route].version, policies[route].deterministic)
+    return policies
 
-@app.get("/external/post/{post_id}")
-async def get_external_post(post_id: int):
+def create_app(settings: Settings) -> FastAPI:
     """
-    Get a post from an external API (DummyJSON) - Example of async/await
+    App factory: the FastAPI app with its middleware and the routers in ROUTERS
     
-    This endpoint demonstrates:
-    - How to make external API calls with httpx and await
-    - Error handling for external services
-    - Real use case for async/await in FastAPI
-    
-    Example: /external/post/1
-    """
-    try:
-        async with httpx.AsyncClient() as client:
-            # This is where we NEED await - external API call
-            response = await client.get(f"https://dummyjson.com/posts/{post_id}")
-            
-            if response.status_code == 404:
-                raise HTTPException(status_code=404, detail="Post not found in external API")
-            
-            response.raise_for_status()  # Raises exception for bad status codes
-            post_data = response.json()
-            
-            # Add some extra info to show we processed it
-            return {
-                "source": "DummyJSON API",
-                "post_id": post_id,
-                "title": post_data.get("title"),
-                "body": post_data.get("body"),
-                "user_id": post_data.get("userId"),
-                "tags": post_data.get("tags", []),
-                "reactions": post_data.get("reactions", {}),
-                "api_response_time": f"{response.elapsed.total_seconds():.3f}s",
-                "status": "success"
-            }
-        # Thanks to the 'with', the connection is closed automatically here
-            
-    except httpx.RequestError as e:
-        raise HTTPException(status_code=503, detail=f"External API unavailable: {str(e)}")
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=e.response.status_code, detail=f"External API error: {e.response.text}")
-
-@app.get("/convert/filename/{filename}")
-async def convert_filename_encoding(filename: str):
+    With LAZY_ROUTERS (the default) a router module is only imported when
+    the first request for its prefix arrives, so a new instance answers its
+    first request (a health check, usually) without importing the others.
+    Opening /docs or /openapi.json imports all of them.
     """
-    Demonstrate string ↔ bytes conversion - Example of encoding/decoding
+    app = FastAPI(
+        title="FastAPI Scaffolding Project",
+        description="A well-organized FastAPI application with routers",
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=DefaultJSONResponse  # orjson (when installed) for every JSON response
+    )
     
-    This endpoint demonstrates:
-    - Converting string to bytes (encode)
-    - Converting bytes back to string (decode)
-    - Base64 encoding for safe transport
-    - Real use case for filename processing
+    # ETag / If-None-Match / Cache-Control (inside the metrics, so 304s are measured too)
+    app.add_middleware(HTTPCacheMiddleware, policies=build_cache_policies(settings))
     
-    Example: /convert/filename/archivo1.jpg
-    """
-    try:
-        # 1. Start with string filename (what user provides)
-        original_string = filename
-        
-        # 2. String → Bytes (encode to UTF-8)
-        filename_bytes = original_string.encode('utf-8')
-        
-        # 3. It converts to Base64 for safe transport/storage
-        base64_encoded = base64.b64encode(filename_bytes).decode('ascii')
-        
-        # 4. Now let's reverse the process...
-        # Base64 → Bytes
-        decoded_from_base64 = base64.b64decode(base64_encoded.encode('ascii'))
-        
-        # 5. Bytes → String (decode from UTF-8)
-        reconstructed_string = decoded_from_base64.decode('utf-8')
-        
-        # 6. Demonstrate some properties of bytes
-        byte_values = list(filename_bytes)  # Show individual byte values
-        
-        return {
-            "original_filename": original_string,
-            "encoding_process": {
-                "step_1_string": original_string,
-                "step_2_bytes_repr": str(filename_bytes),  # String representation of bytes
-                "step_3_base64": base64_encoded,
-                "step_4_back_to_bytes": str(decoded_from_base64),
-                "step_5_back_to_string": reconstructed_string
-            },
-            "byte_analysis": {
-                "total_bytes": len(filename_bytes),
-                "byte_values": byte_values,
-                "first_byte": filename_bytes[0] if filename_bytes else None,
-                "last_byte": filename_bytes[-1] if filename_bytes else None
-            },
-            "verification": {
-                "strings_match": original_string == reconstructed_string,
-                "encoding_used": "UTF-8",
-                "transport_encoding": "Base64"
-            },
-            "practical_uses": [
-                "File upload processing",
-                "Network data transmission",
-                "Database blob storage",
-                "Cryptographic operations"
-            ]
-        }
-        
-    except UnicodeError as e:
-        raise HTTPException(status_code=400, detail=f"Encoding error: {str(e)}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Conversion error: {str(e)}")
-
-@app.get("/convert/image-simulation")
-async def simulate_image_processing():
-    """
-    Simulate image processing with bytes - Real-world example
+    # gzip / br / zstd bodies. Outside the HTTP cache middleware so it sees the
+    # ETags: an unchanged resource is compressed once, then served from the cache
+    compressed_cache.max_bytes = settings.compression_cache_max_bytes
+    app.add_middleware(
+        CompressionMiddleware,
+        codecs=available_codecs(
+            [name.strip() for name in settings.compression_encodings.split(",")],
+            gzip_level=settings.compression_gzip_level,
+            brotli_quality=settings.compression_brotli_quality,
+            zstd_level=settings.compression_zstd_level
+        ),
+        minimum_size=settings.compression_minimum_size,
+        cache=compressed_cache if settings.compression_cache_max_bytes > 0 else None
+    )
     
-    This endpoint demonstrates:
-    - How images are handled as bytes in real applications
-    - String metadata vs bytes content
-    - Base64 encoding for image transmission
-    - Real use case scenarios
+    # Global cap on the requests being processed, with a bounded queue (503 beyond it)
+    app.add_middleware(
+        ConcurrencyLimitMiddleware,
+        max_concurrency=settings.max_concurrency,
+        max_queue=settings.max_queue,
+        queue_timeout=settings.queue_timeout
+    )
     
-    Example: GET /convert/image-simulation
-    """
-    try:
-        # Simulate an uploaded image (in reality this would come from UploadFile)
-        image_metadata = {
-            "filename": "profile_photo.jpg",
-            "content_type": "image/jpeg",
-            "size_kb": 245
-        }
-        
-        # Simulate smaller image content as bytes
-        simulated_image_bytes = b'\xff\xd8\xff\xe0JFIF'
-        
-        # Step 1: String metadata (filename) → Bytes
-        filename_bytes = image_metadata["filename"].encode('utf-8')
-        
-        # Step 2: Image bytes → Base64 (for JSON transmission)
-        image_base64 = base64.b64encode(simulated_image_bytes).decode('ascii')
-        
-        # Simplified response for better Postman compatibility
-        return {
-            "status": "success",
-            "image_info": {
-                "filename": image_metadata["filename"],
-                "content_type": image_metadata["content_type"],
-                "size_bytes": len(simulated_image_bytes)
-            },
-            "conversions": {
-                "filename_to_bytes": {
-                    "original": image_metadata["filename"],
-                    "bytes_length": len(filename_bytes),
-                    "first_byte": filename_bytes[0] if filename_bytes else None
-                },
-                "image_to_base64": {
-                    "bytes_sample": str(simulated_image_bytes),
-                    "base64_result": image_base64,
-                    "base64_length": len(image_base64)
-                }
-            },
-            "byte_analysis": {
-                "total_bytes": len(simulated_image_bytes),
-                "header_bytes": list(simulated_image_bytes[:5]),
-                "is_jpeg": simulated_image_bytes.startswith(b'\xff\xd8'),
-                "is_png": simulated_image_bytes.startswith(b'\x89PNG')
-            },
-            "demonstration": {
-                "purpose": "Show string ↔ bytes conversion for images",
-                "use_cases": [
-                    "File upload processing",
-                    "Image transmission via JSON",
-                    "File type detection",
-                    "Database storage"
-                ]
-            }
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+    # Per-client token buckets (429 + Retry-After). Outside the concurrency cap:
+    # a client over its limit is refused before it takes a slot or a queue place
+    app.add_middleware(
+        RateLimitMiddleware,
+        limits=parse_rate_limits(settings.rate_limits),
+        buckets=TokenBuckets(settings.rate_limit_max_clients),
+        key_header=settings.rate_limit_key_header
+    )
+    
+    # Times every request (per route template) for the /metrics endpoint (429s and 503s included)
+    app.add_middleware(MetricsMiddleware)
+    
+    # Sampling profiler: only installed when configured, so it costs nothing otherwise
+    if settings.profiling_enabled:
+        profiler.interval = settings.profiling_interval_ms / 1000
+        app.add_middleware(
+            ProfilingMiddleware,
+            profiler=profiler,
+            sample_rate=settings.profiling_sample_rate,
+            token=settings.profiling_token
+        )
+    
+    if settings.startup_report:
+        app.add_middleware(FirstResponseMiddleware, timer=startup_timer)
+    
+    enabled = {name.strip() for name in settings.routers.split(",") if name.strip()}
+    specs = [spec for spec in ROUTERS if not enabled or spec.name in enabled]
+    if not settings.admin_token:
+        # No token, no /admin: profiles, stats and DELETE /admin/profiles are never public
+        specs = [spec for spec in specs if spec.name != "admin"]
+    include_routers(app, specs, lazy=settings.lazy_routers)
+    
+    # The OpenAPI schema (/docs) is built from app.routes: import the lazy routers first
+    build_openapi = app.openapi
+    def openapi():
+        load_all(app)
+        return build_openapi()
+    app.openapi = openapi
+    return app
+
+_settings = get_settings()
+app = create_app(_settings)
+startup_timer.mark("app")
+
+# The endpoints below are registered after the routers, like before: "/{name}" must stay last
+class HelloResponse(BaseModel):
+    Hello: str
+
+@app.get("/", response_model=HelloResponse)
+def read_root():
+    return {"Hello": "World"}
+
+@app.get("/datetime")
+def get_datetime():
+    return {
+        "timestamp": datetime.now(),
+    }
 
 # See the difference between having a list of queries vs many query parameters defined (between multiple_queries and various_queries):
 @app.get("/multiple-queries/")
@@ -268,3 +240,4 @@ async def various_queries(
 def read_root_name(name: str):
     return {"Hello": name}
 
+startup_timer.mark("main routes")
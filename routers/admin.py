@@ -0,0 +1,91 @@
+import secrets
+import sys
+from typing import Annotated
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from core.config import get_settings
+from core.profiling import profiler
+from core.compression import available_codecs, compressed_cache
+from core.startup import startup_timer
+from storage import persistence_stats
+
+def require_admin_token(x_admin_token: Annotated[str | None, Header()] = None):
+    """Every /admin route needs `X-Admin-Token: <ADMIN_TOKEN>` (main.py only registers them when it is set)"""
+    token = get_settings().admin_token
+    # compare_digest takes the same time wherever the strings differ: the token can't be guessed byte by byte
+    if not token or not secrets.compare_digest((x_admin_token or "").encode(), token.encode()):
+        raise HTTPException(status_code=403, detail="Missing or wrong X-Admin-Token header")
+
+router = APIRouter(
+    prefix="/admin",  # All endpoints will start with /admin
+    tags=["admin"],   # For organizing documentation
+    dependencies=[Depends(require_admin_token)],  # Applies to every route below
+)
+
+@router.get("/profiles")
+async def list_profiles():
+    """
+    Routes that have been profiled, with their number of requests and stack samples
+    
+    Enable profiling with PROFILING_SAMPLE_RATE (e.g. 0.01 = 1% of requests)
+    and/or PROFILING_TOKEN (then send `X-Profile: <token>` to profile one request).
+    """
+    return {"enabled": get_settings().profiling_enabled, "routes": profiler.summary()}
+
+@router.get("/profiles/flamegraph", response_class=PlainTextResponse)
+async def get_profile(route: str):
+    """
+    Collapsed stacks of one route template, ready for a flamegraph
+    
+    - **route**: Route template, e.g. /items/search
+    
+    Example: curl "http://127.0.0.1:8000/admin/profiles/flamegraph?route=/items/search" > search.collapsed
+    Then: flamegraph.pl search.collapsed > search.svg (or drop the file on https://www.speedscope.app)
+    """
+    if route not in profiler.stacks:
+        raise HTTPException(status_code=404, detail="No samples for this route")
+    return profiler.collapsed(route)
+
+@router.delete("/profiles")
+async def reset_profiles():
+    """Forget all the samples collected so far"""
+    profiler.reset()
+    return {"message": "Profiles reset"}
+
+@router.get("/compression/stats")
+async def get_compression_stats():
+    """
+    Encodings offered (in preference order) and the compressed-body cache counters
+    
+    A hit means a response was sent without compressing it again.
+    """
+    settings = get_settings()
+    encodings = [codec.name for codec in available_codecs([name.strip() for name in settings.compression_encodings.split(",")])]
+    return {"encodings": encodings, "minimum_size": settings.compression_minimum_size, "cache": compressed_cache.stats()}
+
+@router.get("/startup")
+async def get_startup_report(request: Request):
+    """
+    How long this process took to start, phase by phase
+    
+    - **phases_ms**: imports, app construction, lifespan (and the first response with STARTUP_REPORT=true)
+    - **routers_loaded**: router modules imported so far (LAZY_ROUTERS imports them on first use)
+    - **resources**: whether the httpx client and the image process pool have been created yet
+    """
+    return {
+        **startup_timer.report(),
+        "routers_loaded": sorted(name for name in sys.modules if name.startswith("routers.")),
+        "resources": request.app.state.resources.started,
+    }
+
+@router.get("/persistence")
+async def get_persistence_stats():
+    """
+    Change logs of the in-memory stores (only with PERSIST_DIR set)
+    
+    - **pending** / **pending_ms**: changes not on disk yet, and the age of the oldest one
+    - **max_lag_ms**: worst time so far from a change to its fsync (the durability window)
+    - **fsyncs** / **entries_written**: group commits, and the changes they wrote
+    - **since_snapshot** / **last_snapshot**: log entries a restart would replay, and the last snapshot written
+    """
+    return {"enabled": bool(get_settings().persist_dir), "stores": persistence_stats()}
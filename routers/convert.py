@@ -0,0 +1,220 @@
+import base64
+import hashlib
+from typing import Annotated
+from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from core.base64_stream import Base64StreamEncoder, base64_length
+from core.file_types import SNIFF_SIZE, sniff_file_type
+
+router = APIRouter(
+    prefix="/convert",  # All endpoints will start with /convert
+    tags=["convert"],   # For organizing documentation
+)
+
+@router.get("/filename/{filename}")
+async def convert_filename_encoding(filename: str):
+    """
+    Demonstrate string ↔ bytes conversion - Example of encoding/decoding
+    
+    This endpoint demonstrates:
+    - Converting string to bytes (encode)
+    - Converting bytes back to string (decode)
+    - Base64 encoding for safe transport
+    - Real use case for filename processing
+    
+    Example: /convert/filename/archivo1.jpg
+    """
+    try:
+        # 1. Start with string filename (what user provides)
+        original_string = filename
+        
+        # 2. String → Bytes (encode to UTF-8)
+        filename_bytes = original_string.encode('utf-8')
+        
+        # 3. It converts to Base64 for safe transport/storage
+        base64_encoded = base64.b64encode(filename_bytes).decode('ascii')
+        
+        # 4. Now let's reverse the process...
+        # Base64 → Bytes
+        decoded_from_base64 = base64.b64decode(base64_encoded.encode('ascii'))
+        
+        # 5. Bytes → String (decode from UTF-8)
+        reconstructed_string = decoded_from_base64.decode('utf-8')
+        
+        # 6. Demonstrate some properties of bytes
+        byte_values = list(filename_bytes)  # Show individual byte values
+        
+        return {
+            "original_filename": original_string,
+            "encoding_process": {
+                "step_1_string": original_string,
+                "step_2_bytes_repr": str(filename_bytes),  # String representation of bytes
+                "step_3_base64": base64_encoded,
+                "step_4_back_to_bytes": str(decoded_from_base64),
+                "step_5_back_to_string": reconstructed_string
+            },
+            "byte_analysis": {
+                "total_bytes": len(filename_bytes),
+                "byte_values": byte_values,
+                "first_byte": filename_bytes[0] if filename_bytes else None,
+                "last_byte": filename_bytes[-1] if filename_bytes else None
+            },
+            "verification": {
+                "strings_match": original_string == reconstructed_string,
+                "encoding_used": "UTF-8",
+                "transport_encoding": "Base64"
+            },
+            "practical_uses": [
+                "File upload processing",
+                "Network data transmission",
+                "Database blob storage",
+                "Cryptographic operations"
+            ]
+        }
+        
+    except UnicodeError as e:
+        raise HTTPException(status_code=400, detail=f"Encoding error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Conversion error: {str(e)}")
+
+@router.get("/image-simulation")
+async def simulate_image_processing():
+    """
+    Simulate image processing with bytes - Real-world example
+    
+    This endpoint demonstrates:
+    - How images are handled as bytes in real applications
+    - String metadata vs bytes content
+    - Base64 encoding for image transmission
+    - Real use case scenarios
+    
+    Example: GET /convert/image-simulation
+    """
+    try:
+        # Simulate an uploaded image (in reality this would come from UploadFile)
+        image_metadata = {
+            "filename": "profile_photo.jpg",
+            "content_type": "image/jpeg",
+            "size_kb": 245
+        }
+        
+        # Simulate smaller image content as bytes
+        simulated_image_bytes = b'\xff\xd8\xff\xe0JFIF'
+        
+        # Step 1: String metadata (filename) → Bytes
+        filename_bytes = image_metadata["filename"].encode('utf-8')
+        
+        # Step 2: Image bytes → Base64 (for JSON transmission)
+        image_base64 = base64.b64encode(simulated_image_bytes).decode('ascii')
+        
+        # Simplified response for better Postman compatibility
+        return {
+            "status": "success",
+            "image_info": {
+                "filename": image_metadata["filename"],
+                "content_type": image_metadata["content_type"],
+                "size_bytes": len(simulated_image_bytes)
+            },
+            "conversions": {
+                "filename_to_bytes": {
+                    "original": image_metadata["filename"],
+                    "bytes_length": len(filename_bytes),
+                    "first_byte": filename_bytes[0] if filename_bytes else None
+                },
+                "image_to_base64": {
+                    "bytes_sample": str(simulated_image_bytes),
+                    "base64_result": image_base64,
+                    "base64_length": len(image_base64)
+                }
+            },
+            "byte_analysis": {
+                "total_bytes": len(simulated_image_bytes),
+                "header_bytes": list(simulated_image_bytes[:5]),
+                "is_jpeg": simulated_image_bytes.startswith(b'\xff\xd8'),
+                "is_png": simulated_image_bytes.startswith(b'\x89PNG')
+            },
+            "demonstration": {
+                "purpose": "Show string ↔ bytes conversion for images",
+                "use_cases": [
+                    "File upload processing",
+                    "Image transmission via JSON",
+                    "File type detection",
+                    "Database storage"
+                ]
+            }
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+
+UPLOAD_CHUNK_SIZE = 3 * 256 * 1024  # 768 KiB, a multiple of 3 so Base64 chunks need no carry-over
+
+def _read_and_hash(file, digest) -> bytes:
+    """Read one chunk and feed it to the hash (runs in a worker thread: both touch the disk/CPU)"""
+    chunk = file.read(UPLOAD_CHUNK_SIZE)
+    digest.update(chunk)
+    return chunk
+
+@router.post("/upload")
+async def upload_file_summary(file: Annotated[UploadFile, File(description="Any file, even hundreds of MB")]):
+    """
+    Upload a file and get its size, SHA-256, real type and Base64 size - Example of streaming
+    
+    This endpoint demonstrates:
+    - python-multipart writes the upload to a temporary file (spooled to
+      disk after 1 MB), never the whole file in memory
+    - We read it back in chunks: memory stays constant, whatever the size
+    - The hash is updated chunk by chunk (hashlib.sha256().update)
+    - The file type is detected from the magic number in the FIRST chunk only
+    
+    Example: curl -F "file=@photo.jpg" http://127.0.0.1:8000/convert/upload
+    """
+    digest = hashlib.sha256()
+    size = 0
+    detected_type = None
+    preview = ""
+    
+    while chunk := await run_in_threadpool(_read_and_hash, file.file, digest):
+        if size == 0:
+            detected_type = sniff_file_type(chunk[:SNIFF_SIZE])
+            preview = base64.b64encode(chunk[:57]).decode("ascii")  # 57 bytes → one 76-char Base64 line
+        size += len(chunk)
+    
+    return {
+        "filename": file.filename,
+        "declared_content_type": file.content_type,
+        "detected_content_type": detected_type,
+        "size_bytes": size,
+        "sha256": digest.hexdigest(),
+        "base64": {
+            "length": base64_length(size),
+            "preview": preview,
+            "full_output": "POST the same file to /convert/upload/base64"
+        }
+    }
+
+@router.post("/upload/base64")
+async def upload_file_to_base64(file: Annotated[UploadFile, File(description="Any file, even hundreds of MB")]):
+    """
+    Upload a file and get it back as Base64 text, streamed chunk by chunk
+    
+    The Base64 output is produced incrementally while it is sent, so neither
+    the file nor its (33% bigger) Base64 version is ever fully in memory.
+    The magic-number type of the file is sent in the `X-Detected-Content-Type` header.
+    
+    Example: curl -F "file=@photo.jpg" http://127.0.0.1:8000/convert/upload/base64 -o photo.b64
+    """
+    first_chunk = await file.read(UPLOAD_CHUNK_SIZE)
+    detected_type = sniff_file_type(first_chunk[:SNIFF_SIZE])
+    
+    async def encode_chunks():
+        encoder = Base64StreamEncoder()
+        chunk = first_chunk
+        while chunk:
+            yield encoder.update(chunk)
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        yield encoder.finish()
+    
+    headers = {"X-Detected-Content-Type": detected_type or "unknown"}
+    return StreamingResponse(encode_chunks(), media_type="text/plain", headers=headers)
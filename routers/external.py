@@ -0,0 +1,183 @@
+import asyncio
+import time
+from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, Query
+import httpx
+from core.cache import AsyncTTLCache
+from core.config import get_settings
+from core.upstream import CircuitOpenError, DeadlineExceededError, UpstreamClient, get_upstream, request_deadline
+
+router = APIRouter(
+    prefix="/external",  # All endpoints will start with /external
+    tags=["external"],   # For organizing documentation
+    responses={503: {"description": "External API unavailable"}},
+)
+
+_settings = get_settings()
+
+# Hot posts are served from memory instead of asking DummyJSON again every time
+post_cache = AsyncTTLCache(
+    maxsize=_settings.external_cache_max_entries,
+    ttl=_settings.external_cache_ttl,
+    stale_ttl=_settings.external_cache_stale_ttl,
+)
+
+async def fetch_post(upstream: UpstreamClient, post_id: int, deadline: float) -> dict:
+    """Fetch one post from DummyJSON and shape it for our API (no cache)"""
+    try:
+        # This is where we NEED await - external API call (with retries until the deadline)
+        response = await upstream.get(f"/posts/{post_id}", deadline=deadline)
+        
+        if response.status_code == 404:
+            raise HTTPException(status_code=404, detail="Post not found in external API")
+        
+        response.raise_for_status()  # Raises exception for bad status codes
+        try:
+            post_data = response.json()
+        except ValueError:  # A 200 whose body is not JSON (an error page from a proxy...)
+            raise HTTPException(status_code=502, detail="External API sent a response that is not JSON")
+        if not isinstance(post_data, dict):
+            raise HTTPException(status_code=502, detail="External API sent an unexpected response (not a JSON object)")
+        
+        # Add some extra info to show we processed it
+        # (the upstream latency is in /metrics: upstream_request_duration_seconds)
+        return {
+            "source": "DummyJSON API",
+            "post_id": post_id,
+            "title": post_data.get("title"),
+            "body": post_data.get("body"),
+            "user_id": post_data.get("userId"),
+            "tags": post_data.get("tags", []),
+            "reactions": post_data.get("reactions", {}),
+            "status": "success"
+        }
+        # We don't close the client here: it lives as long as the app (see lifespan in main.py)
+            
+    except CircuitOpenError as e:
+        # Fail fast: DummyJSON has been failing, we don't make this request wait for it
+        raise HTTPException(
+            status_code=503,
+            detail=f"External API unavailable: {str(e)}",
+            headers={"Retry-After": str(max(1, round(e.retry_after)))}
+        )
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=f"External API too slow: {str(e)}")
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=503, detail=f"External API unavailable: {str(e)}")
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(status_code=e.response.status_code, detail=f"External API error: {e.response.text}")
+
+async def get_post_cached(upstream: UpstreamClient, post_id: int, deadline: float) -> dict:
+    """
+    Same as fetch_post, but through the TTL/LRU cache (errors are never cached)
+    
+    The load is shared with every other request for this post (and by the
+    background refreshes), so it runs with the server's UPSTREAM_DEADLINE,
+    not with this caller's. The caller's `deadline` only limits how long
+    IT waits: a client with a tiny X-Request-Timeout gets its 504 alone.
+    """
+    try:
+        return await post_cache.get_or_load(
+            post_id,
+            lambda: fetch_post(upstream, post_id, upstream.new_deadline()),
+            timeout=deadline - time.monotonic(),
+        )
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail=f"External API too slow: post {post_id} not loaded in time")
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Hit/miss counters of the external post cache
+    
+    - **hits** / **stale_hits**: served from memory (fresh / stale while refreshing)
+    - **misses**: had to wait for DummyJSON
+    - **coalesced**: misses that joined a request already in flight for the same post
+    """
+    return post_cache.stats()
+
+@router.get("/upstream/stats")
+async def get_upstream_stats(upstream: Annotated[UpstreamClient, Depends(get_upstream)]):
+    """Circuit breaker state per upstream host (closed, open or half_open)"""
+    return upstream.stats()
+
+@router.get("/post/{post_id}")
+async def get_external_post(
+    post_id: int,
+    upstream: Annotated[UpstreamClient, Depends(get_upstream)],
+    deadline: Annotated[float, Depends(request_deadline)],
+):
+    """
+    Get a post from an external API (DummyJSON) - Example of async/await
+    
+    This endpoint demonstrates:
+    - How to make external API calls with httpx and await
+    - Error handling for external services
+    - Real use case for async/await in FastAPI
+    
+    The httpx client is shared by the whole app (created in the lifespan
+    handler of main.py), so connections to DummyJSON are kept alive and
+    reused instead of opening a new TCP + TLS connection on every request.
+    
+    Posts are cached in memory (see EXTERNAL_CACHE_* settings), and many
+    simultaneous requests for the same post share a single upstream call.
+    
+    Failed calls are retried with backoff within a deadline (UPSTREAM_DEADLINE,
+    or a shorter `X-Request-Timeout` header). If DummyJSON keeps failing, its
+    circuit opens and we answer 503 right away instead of waiting.
+    
+    Example: /external/post/1
+    """
+    return await get_post_cached(upstream, post_id, deadline)
+
+@router.get("/posts")
+async def get_external_posts(
+    ids: Annotated[str, Query(pattern=r"^\d+(,\d+)*$", description="Comma-separated post IDs, e.g. 1,2,3")],
+    upstream: Annotated[UpstreamClient, Depends(get_upstream)],
+    deadline: Annotated[float, Depends(request_deadline)],
+):
+    """
+    Get many posts in ONE request - Example of asyncio.gather with a semaphore
+    
+    - **ids**: Comma-separated post IDs (duplicates are fetched once)
+    
+    The posts are fetched in parallel (at most EXTERNAL_BATCH_CONCURRENCY at a
+    time, so we don't flood DummyJSON) and go through the same cache as
+    /external/post/{post_id}. A failing ID doesn't fail the whole batch: it
+    is reported in "errors" and the other posts are still returned.
+    All the posts share the same deadline as the batch request.
+    
+    Example: /external/posts?ids=1,2,3,9999
+    """
+    post_ids = list(dict.fromkeys(int(post_id) for post_id in ids.split(",")))  # Dedupe, keep order
+    if len(post_ids) > _settings.external_batch_max_ids:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many IDs: {len(post_ids)} (max {_settings.external_batch_max_ids})"
+        )
+    
+    semaphore = asyncio.Semaphore(_settings.external_batch_concurrency)
+    
+    async def fetch_one(post_id: int) -> dict:
+        async with semaphore:
+            return await get_post_cached(upstream, post_id, deadline)
+    
+    # return_exceptions=True: one failed post doesn't cancel the others
+    outcomes = await asyncio.gather(*(fetch_one(post_id) for post_id in post_ids), return_exceptions=True)
+    
+    posts, errors = [], []
+    for post_id, outcome in zip(post_ids, outcomes):
+        if isinstance(outcome, HTTPException):
+            errors.append({"post_id": post_id, "status_code": outcome.status_code, "detail": outcome.detail})
+        elif isinstance(outcome, BaseException):
+            raise outcome  # A bug, not an upstream error: don't hide it
+        else:
+            posts.append(outcome)
+    
+    return {
+        "requested": len(post_ids),
+        "succeeded": len(posts),
+        "failed": len(errors),
+        "posts": posts,
+        "errors": errors
+    }
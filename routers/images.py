@@ -0,0 +1,97 @@
+from enum import Enum
+from typing import Annotated, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+from core.config import get_settings
+from core.static_files import StatCache, is_not_modified, last_modified, make_etag
+from core.thumbnails import PILLOW_AVAILABLE, THUMBNAIL_FORMATS, DerivativeCache, NotAnImageError, default_format
+
+router = APIRouter(
+    prefix="/images",  # All endpoints will start with /images
+    tags=["images"],   # For organizing documentation
+    responses={404: {"description": "Image not found"}},
+)
+
+_settings = get_settings()
+
+# Remembers the stat() of recently served files, so a hot image costs no disk access
+stat_cache = StatCache(
+    _settings.images_root,
+    maxsize=_settings.images_stat_cache_size,
+    ttl=_settings.images_stat_cache_ttl,
+)
+
+# Resized/converted images, stored on disk and reused until the cache is full
+thumbnail_cache = DerivativeCache(_settings.thumbnail_cache_dir, _settings.thumbnail_cache_max_bytes)
+
+class ImageFormat(str, Enum):
+    jpeg = "jpeg"
+    png = "png"
+    webp = "webp"
+
+@router.get("/_thumbnails/stats")
+async def get_thumbnail_cache_stats():
+    """Files and bytes in the thumbnail disk cache"""
+    return await thumbnail_cache.stats()
+
+@router.get("/{image_path:path}")
+@router.head("/{image_path:path}", include_in_schema=False)  # Same handler; a second operation in /docs would duplicate its ID
+async def serve_image(
+    image_path: str,
+    request: Request,
+    w: Annotated[Optional[int], Query(ge=1, le=4096, description="Max width in pixels")] = None,
+    h: Annotated[Optional[int], Query(ge=1, le=4096, description="Max height in pixels")] = None,
+    fmt: Annotated[Optional[ImageFormat], Query(description="Output format")] = None,
+    quality: Annotated[int, Query(ge=1, le=100)] = 85,
+):
+    """
+    Serve images from different folders (under IMAGES_ROOT, default static/images)
+    
+    Useful examples:
+    - /images/products/laptop.jpg
+    - /images/users/avatars/juan.png
+    - /images/blog/2024/article-1/cover.jpg
+    
+    What you get for free:
+    - **Path-traversal protection**: /images/../main.py is a 404
+    - **Range requests**: `Range: bytes=0-1023` → 206 Partial Content (video/large files)
+    - **Conditional GET**: send back the `ETag` (If-None-Match) or `Last-Modified`
+      (If-Modified-Since) and you get an empty 304 if the file didn't change
+    - **Streaming**: FileResponse sends the file in chunks (or with the server's
+      zero-copy "pathsend" extension when available), never loading it in memory
+    
+    Thumbnails (needs Pillow): add **w**, **h** and/or **fmt** (jpeg, png, webp)
+    - /images/products/laptop.jpg?w=200 → 200px wide, same aspect ratio and format
+    - /images/products/laptop.jpg?w=200&h=200&fmt=webp → fits in 200x200, as WebP
+    
+    The first request renders the thumbnail in a worker process; the next
+    ones read it from the disk cache like any other file.
+    """
+    found = stat_cache.lookup(image_path)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    full_path, stat_result = found
+    
+    media_type = None
+    if w is not None or h is not None or fmt is not None:
+        if not PILLOW_AVAILABLE:
+            raise HTTPException(status_code=501, detail="Thumbnails need Pillow: pip install Pillow")
+        output_format = fmt.value if fmt is not None else default_format(full_path)
+        try:
+            full_path, stat_result = await thumbnail_cache.get_or_render(
+                request.app.state.resources.image_pool, full_path, stat_result, w, h, output_format, quality
+            )
+        except NotAnImageError as e:
+            raise HTTPException(status_code=415, detail=str(e))
+        media_type = THUMBNAIL_FORMATS[output_format]
+    
+    headers = {
+        "ETag": make_etag(stat_result),
+        "Last-Modified": last_modified(stat_result),
+        "Cache-Control": _settings.images_cache_control,
+    }
+    if is_not_modified(request.headers, headers["ETag"], stat_result):
+        return Response(status_code=304, headers=headers)
+    
+    # Passing stat_result avoids a second stat() inside FileResponse
+    return FileResponse(full_path, headers=headers, stat_result=stat_result, media_type=media_type)
@@ -1,9 +1,16 @@
 from decimal import Decimal
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Discriminator, Tag, TypeAdapter
+from typing import Annotated, List, Literal, Optional, Union
 from enum import Enum
 from datetime import datetime
+from storage import create_item_repository
+from core.config import get_settings
+from core.pagination import clamp_limit, decode_cursor, set_next_cursor
+from core.ndjson import NDJSON_MEDIA_TYPE, stream_ndjson
+from core.bulk import bulk_summary, operation_of, read_bulk_rows
+from core.serialization import RawJSONResponse, RecordEncoder, json_array
 
 router = APIRouter(
     prefix="/items", # Automatically adds /items at the beginning of all routes in this router: DRY (Don't Repeat Yourself)
@@ -15,6 +22,14 @@ class FormatType(str, Enum):
     simple = "simple"
     detailed = "detailed"
 
+# Release-date buckets of /items/stats
+class DateBucket(str, Enum):
+    year = "year"
+    month = "month"
+    day = "day"
+
+MAX_HISTOGRAM_BINS = 100
+
 class ItemBase(BaseModel):
     item_id: int
     name: str
@@ -26,6 +41,30 @@ class ItemCreate(BaseModel):
     price: Decimal
     release_date: Optional[datetime] = None
 
+# Rows of /items/bulk: "op" says what to do with each one (create if missing)
+class ItemBulkCreate(ItemCreate):
+    op: Literal["create"] = "create"
+
+class ItemBulkUpdate(BaseModel):
+    op: Literal["update"]
+    item_id: int
+    name: Optional[str] = None  # Fields left out (or null) are not changed
+    price: Optional[Decimal] = None
+    release_date: Optional[datetime] = None
+
+class ItemBulkDelete(BaseModel):
+    op: Literal["delete"]
+    item_id: int
+
+ItemBulkRow = Annotated[
+    Union[
+        Annotated[ItemBulkCreate, Tag("create")],
+        Annotated[ItemBulkUpdate, Tag("update")],
+        Annotated[ItemBulkDelete, Tag("delete")],
+    ],
+    Discriminator(operation_of),
+]
+
 fake_items = [
     {"item_id": 1, "name": "Laptop", "price": 999.99, "release_date": "2025-10-07T15:53:00+02:00"},
     {"item_id": 2, "name": "Mouse", "price": 29.99},
@@ -39,21 +78,43 @@ fake_items = [
     {"item_id": 10, "name": "Phone", "price": 699.99},
 ]
 
+# Built once: the repository serializes each item with it when the item is written
+_item_encoder = RecordEncoder(ItemBase)
+_bulk_adapter = TypeAdapter(List[ItemBulkRow])  # Validates all the rows of a bulk body in one call
+_settings = get_settings()
+
+# Where items live depends on STORAGE_BACKEND: in this process's memory
+# (stored in columns, indexed by item_id, name and price) or in a SQLite
+# file shared by all workers
+item_repo = create_item_repository(_settings, fake_items, _item_encoder)
+
 # http://127.0.0.1:8000/items/?skip=0&limit=10
 @router.get("/", response_model=List[ItemBase])
-async def get_items(skip: int = 0, limit: int = 10):
+async def get_items(request: Request, response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None):
     """
     Get items with pagination
     
     - **skip**: Number of elements to skip (default 0)
-    - **limit**: Maximum number of elements to return (default 10)
+    - **limit**: Maximum number of elements to return (default 10, max 100)
+    - **cursor**: Opaque cursor from the `X-Next-Cursor` header of the previous page (optional, replaces skip)
+    
+    When there are more items, the response has an `X-Next-Cursor` header
+    and a `Link: <...>; rel="next"` header pointing to the next page.
     
     Examples:
     - /items/ → First 10 items
     - /items/?limit=3 → First 3 items  
     - /items/?skip=3&limit=2 → Items 4 and 5
+    - /items/?cursor=eyJhZnRlciI6NX0&limit=2 → 2 items after the item with ID 5
     """
-    return fake_items[skip : skip + limit]
+    limit = clamp_limit(limit)
+    if cursor is not None:
+        page, next_after = await item_repo.page_after_json(decode_cursor(cursor), limit)
+    else:
+        page, next_after = await item_repo.slice_json(max(skip, 0), limit)
+    set_next_cursor(request, response, next_after, limit)
+    # The items are already serialized as ItemBase: just join them
+    return RawJSONResponse(json_array(page), headers=response.headers)
 
 @router.get("/search", response_model=List[ItemBase])
 async def search_items(
@@ -68,21 +129,47 @@ async def search_items(
     - **min_price**: Minimum price (optional)
     - **max_price**: Maximum price (optional)
     """
-    results = []
-    
-    for item in fake_items:
-        if q.lower() not in item["name"].lower():
-            continue
-            
-        if min_price and item["price"] < min_price:
-            continue
-            
-        if max_price and item["price"] > max_price:
-            continue
-            
-        results.append(item)
-    
-    return results
+    # Served by the name/price indexes of the repository (no full scan)
+    return RawJSONResponse(json_array(await item_repo.search_json(q, min_price, max_price)))
+
+# Like /export, it must go before /{item_id}
+@router.get("/stats")
+async def item_stats(
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+    bins: int = 10,
+    date_bucket: DateBucket = DateBucket.month
+):
+    """
+    Aggregates of the catalog: count, min/max/avg price, price histogram and release dates
+    
+    - **min_price**: Only items with at least this price (optional)
+    - **max_price**: Only items with at most this price (optional)
+    - **bins**: Number of equal-width bins of the price histogram (default 10, max 100)
+    - **date_bucket**: Count releases per "year", "month" (default) or "day"
+    
+    Examples:
+    - /items/stats → Stats of every item
+    - /items/stats?min_price=100&max_price=500&bins=4 → Only items from 100 to 500, in 4 price bins
+    - /items/stats?date_bucket=year → Releases per year
+    """
+    # Memory: computed on the sorted price column, without visiting every item
+    # SQLite: computed by SQL aggregates
+    bins = min(max(bins, 1), MAX_HISTOGRAM_BINS)
+    return await item_repo.stats(min_price, max_price, bins, date_bucket.value)
+
+# It must go before /{item_id}, otherwise "export" would be parsed as an item_id
+@router.get("/export", response_class=StreamingResponse)
+async def export_items():
+    """
+    Export the whole catalog as NDJSON (one item per line)
+    
+    The response is streamed in chunks, so memory stays flat no matter how
+    many items there are and the first lines arrive right away.
+    
+    Example: curl http://127.0.0.1:8000/items/export
+    """
+    return StreamingResponse(stream_ndjson(item_repo), media_type=NDJSON_MEDIA_TYPE)
 
 @router.get("/{item_id}", response_model=dict)
 async def get_item(item_id: int, include_details: bool = False, format_type: Optional[FormatType] = None):  
@@ -99,51 +186,72 @@ async def get_item(item_id: int, include_details: bool = False, format_type: Opt
     - /items/1?format=detailed → Item with specific format
     - /items/1?include_details=true&format=simple → Both parameters
     """
-    # Search for the item
-    for item in fake_items:
-        if item["item_id"] == item_id:
-            # Basic item
-            result = {
-                "item_id": item["item_id"],
-                "name": item["name"],
-                "price": item["price"]
-            }
-            
-            # Add details if requested
-            if include_details:
-                result["category"] = "electronics"
-                result["in_stock"] = True
-                result["rating"] = 4.5
-            
-            # Apply format if specified
-            if format_type == FormatType.simple:
-                result["display"] = f"{item['name']} - ${item['price']}"
-            elif format_type == FormatType.detailed:
-                result["description"] = f"High-quality {item['name']} for ${item['price']}"
-            
-            return result
-    
-    # If item is not found
-    raise HTTPException(status_code=404, detail="Item not found")
-
-_item_id_counter = max(item["item_id"] for item in fake_items) if fake_items else 0
+    # Search for the item (O(1) thanks to the index)
+    item = await item_repo.get(item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    # Basic item
+    result = {
+        "item_id": item["item_id"],
+        "name": item["name"],
+        "price": item["price"]
+    }
+    
+    # Add details if requested
+    if include_details:
+        result["category"] = "electronics"
+        result["in_stock"] = True
+        result["rating"] = 4.5
+    
+    # Apply format if specified
+    if format_type == FormatType.simple:
+        result["display"] = f"{item['name']} - ${item['price']}"
+    elif format_type == FormatType.detailed:
+        result["description"] = f"High-quality {item['name']} for ${item['price']}"
+    
+    return result
+
+def _with_tax_price(item_dict: dict) -> dict:
+    # Calculate and add tax price (20% tax)
+    if item_dict.get("price") is not None:
+        item_dict["tax_price"] = item_dict["price"] * Decimal("1.2")
+    return item_dict
 
 @router.post("/")
 async def create_item(item: ItemCreate): 
     """Create a new item and return it with its tax price"""
-    global _item_id_counter
-    _item_id_counter += 1
-    
     # Convert Pydantic model to dictionary using model_dump(), otherwise you cannot modify its fields!
-    item_dict = item.model_dump()
+    item_dict = _with_tax_price(item.model_dump())
+    
+    # The repository assigns the next item_id (in SQLite it is the table's primary key)
+    return await item_repo.create(item_dict)
+
+@router.post("/bulk")
+async def bulk_items(request: Request):
+    """
+    Create, update and delete many items in one request
     
-    # Add the generated ID
-    item_dict["item_id"] = _item_id_counter
+    The body is a JSON array, or NDJSON (one row per line) with
+    `Content-Type: application/x-ndjson`. Each row has an `op`:
     
-    # Calculate and add tax price (20% tax)
-    if item_dict["price"] is not None:
-        tax_price = item_dict["price"] * 1.2
-        item_dict["tax_price"] = tax_price
+    - `{"op": "create", "name": "Dock", "price": 49.99}` (`op` can be left out)
+    - `{"op": "update", "item_id": 3, "price": 69.99}` (only the fields sent are changed)
+    - `{"op": "delete", "item_id": 4}`
     
-    fake_items.append(item_dict)
-    return item_dict
+    Valid rows are applied in order, as one batch. Invalid rows (422) and
+    updates/deletes of missing items (404) are listed in `errors` by row
+    index; they don't stop the other rows.
+    """
+    rows, errors = await read_bulk_rows(request, _bulk_adapter, _settings.bulk_max_rows, _settings.bulk_max_bytes)
+    operations = []
+    for _, row in rows:
+        if row.op == "create":
+            operations.append(("create", None, _with_tax_price(row.model_dump(exclude={"op"}))))
+        elif row.op == "update":
+            changes = _with_tax_price(row.model_dump(exclude={"op", "item_id"}, exclude_none=True))
+            operations.append(("update", row.item_id, changes))
+        else:
+            operations.append(("delete", row.item_id, None))
+    results = await item_repo.bulk(operations)
+    return bulk_summary(rows, results, errors, key="item_id", not_found="Item not found")
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from core.metrics import CONTENT_TYPE, registry
+
+router = APIRouter(
+    tags=["monitoring"],  # No prefix: Prometheus expects /metrics
+)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Metrics in the Prometheus text format (scrape this from Prometheus/Grafana)
+    
+    - **http_requests_total**: requests by method, route template and status code
+    - **http_requests_in_flight**: requests being processed right now
+    - **http_request_duration_seconds**: latency histogram per route template
+    - **upstream_request_duration_seconds**: latency of each call to DummyJSON
+    - **upstream_retries_total**: upstream calls that had to be retried
+    """
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -1,7 +1,14 @@
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
-from typing import Annotated, List, FrozenSet
-from .items import fake_items
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Discriminator, Tag, TypeAdapter
+from typing import Annotated, List, FrozenSet, Literal, Optional, Union
+from .items import item_repo
+from storage import ConflictError, create_user_repository
+from core.config import get_settings
+from core.pagination import MAX_PAGE_SIZE, clamp_limit, decode_cursor, set_next_cursor
+from core.ndjson import NDJSON_MEDIA_TYPE, stream_ndjson
+from core.bulk import bulk_summary, operation_of, read_bulk_rows
+from core.serialization import RawJSONResponse, RecordEncoder, json_array
 from uuid import UUID, uuid4
 
 router = APIRouter(
@@ -24,6 +31,32 @@ class UserCreate(BaseModel):
     edad: int | None = None  # Optional age field
     roles: FrozenSet[str] = frozenset()
 
+# Rows of /users/bulk: "op" says what to do with each one (create if missing)
+class UserBulkCreate(UserCreate):
+    op: Literal["create"] = "create"
+
+class UserBulkUpdate(BaseModel):
+    op: Literal["update"]
+    id: UUID
+    name: Optional[str] = None  # Fields left out (or null) are not changed
+    email: Optional[str] = None
+    active: Optional[bool] = None
+    roles: Optional[FrozenSet[str]] = None
+    edad: Optional[int] = None
+
+class UserBulkDelete(BaseModel):
+    op: Literal["delete"]
+    id: UUID
+
+UserBulkRow = Annotated[
+    Union[
+        Annotated[UserBulkCreate, Tag("create")],
+        Annotated[UserBulkUpdate, Tag("update")],
+        Annotated[UserBulkDelete, Tag("delete")],
+    ],
+    Discriminator(operation_of),
+]
+
 fake_users = [
     {
         "id": "a1b2c3d4-e5f6-7890-1234-567890abcdef", 
@@ -51,20 +84,15 @@ fake_users = [
     }
 ]
 
-@router.get("/", response_model=List[User])
-async def get_users():
-    return fake_users
+# In memory (indexed by id) or in SQLite, depending on STORAGE_BACKEND
+_settings = get_settings()
+# Built once: the repository serializes each user with it when the user is written
+_user_encoder = RecordEncoder(User)
+user_repo = create_user_repository(_settings, fake_users, _user_encoder)
+_bulk_adapter = TypeAdapter(List[UserBulkRow])  # Validates all the rows of a bulk body in one call
 
-@router.get("/{user_id}", response_model=User)
-async def get_user(user_id: int):
-    for user in fake_users:
-        if user["id"] == user_id:
-            return user
-    raise HTTPException(status_code=404, detail="User not found")
-
-@router.post("/", response_model=User)
-async def create_user(user: UserCreate):
-    new_user = {
+def _new_user_record(user: UserCreate) -> dict:
+    return {
         "id": str(uuid4()), 
         "name": user.name,
         "email": user.email,
@@ -72,34 +100,126 @@ async def create_user(user: UserCreate):
         "roles": list(user.roles),
         "edad": user.edad  # Include age if provided
     }
-    fake_users.append(new_user)
+
+@router.get("/", response_model=List[User])
+async def get_users(request: Request, response: Response, skip: int = 0, limit: int = MAX_PAGE_SIZE, cursor: str | None = None):
+    """
+    Get users with pagination
+    
+    - **skip**: Number of users to skip (default 0)
+    - **limit**: Maximum number of users to return (default and max 100)
+    - **cursor**: Opaque cursor from the `X-Next-Cursor` header of the previous page (optional, replaces skip)
+    
+    Examples:
+    - /users/ → First 100 users
+    - /users/?limit=2 → First 2 users, plus X-Next-Cursor/Link headers for the rest
+    """
+    limit = clamp_limit(limit)
+    if cursor is not None:
+        page, next_after = await user_repo.page_after_json(decode_cursor(cursor), limit)
+    else:
+        page, next_after = await user_repo.slice_json(max(skip, 0), limit)
+    set_next_cursor(request, response, next_after, limit)
+    # The users are already serialized as User (roles included): just join them
+    return RawJSONResponse(json_array(page), headers=response.headers)
+
+# It must go before /{user_id}, otherwise "export" would be parsed as a user_id
+@router.get("/export", response_class=StreamingResponse)
+async def export_users():
+    """
+    Export all users as NDJSON (one user per line), streamed in chunks
+    
+    Example: curl http://127.0.0.1:8000/users/export
+    """
+    return StreamingResponse(stream_ndjson(user_repo), media_type=NDJSON_MEDIA_TYPE)
+
+# Also before /{user_id}
+@router.get("/by-email", response_model=User)
+async def get_user_by_email(email: str):
+    """
+    Find a user by email (case-insensitive, emails are unique)
+    
+    Example: /users/by-email?email=john@example.com
+    """
+    user = await user_repo.get_by_email(email)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+# user_id is a UUID: FastAPI validates it (422 if it isn't one) and the
+# repository finds the user with a dictionary lookup, not a scan
+@router.get("/{user_id}", response_model=User)
+async def get_user(user_id: UUID):
+    user_json = await user_repo.get_json(user_id)
+    if user_json is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return RawJSONResponse(user_json)
+
+@router.post("/", response_model=User)
+async def create_user(user: UserCreate):
+    new_user = _new_user_record(user)
+    try:
+        await user_repo.add(new_user)
+    except ConflictError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
     return new_user
 
+@router.post("/bulk")
+async def bulk_users(request: Request):
+    """
+    Create, update and delete many users in one request
+    
+    The body is a JSON array, or NDJSON (one row per line) with
+    `Content-Type: application/x-ndjson`. Each row has an `op`:
+    
+    - `{"op": "create", "name": "Carlos", "email": "carlos@example.com"}` (`op` can be left out)
+    - `{"op": "update", "id": "<uuid>", "edad": 36}` (only the fields sent are changed)
+    - `{"op": "delete", "id": "<uuid>"}`
+    
+    Valid rows are applied in order, as one batch; invalid rows (422) and
+    missing users (404) are reported in `errors` by row index.
+    """
+    rows, errors = await read_bulk_rows(request, _bulk_adapter, _settings.bulk_max_rows, _settings.bulk_max_bytes)
+    operations = []
+    for _, row in rows:
+        if row.op == "create":
+            operations.append(("create", None, _new_user_record(row)))
+        elif row.op == "update":
+            changes = row.model_dump(exclude={"op", "id"}, exclude_none=True)
+            if "roles" in changes:
+                changes["roles"] = list(changes["roles"])
+            operations.append(("update", str(row.id), changes))
+        else:
+            operations.append(("delete", str(row.id), None))
+    results = await user_repo.bulk(operations)
+    return bulk_summary(rows, results, errors, key="id", not_found="User not found")
+
 @router.put("/{user_id}", response_model=User)
-async def update_user(user_id: int, user: UserCreate):# The UserCreate model appears in the documentation to fill out
-    for i, existing_user in enumerate(fake_users):
-        if existing_user["id"] == user_id:
-            fake_users[i].update({
-                "name": user.name,
-                "email": user.email,
-                "roles": list(user.roles), 
-                "edad": user.edad  # Update age if provided
-            })
-            return fake_users[i]
-    raise HTTPException(status_code=404, detail="User not found")
+async def update_user(user_id: UUID, user: UserCreate):# The UserCreate model appears in the documentation to fill out
+    try:
+        updated_user = await user_repo.update(user_id, {
+            "name": user.name,
+            "email": user.email,
+            "roles": list(user.roles), 
+            "edad": user.edad  # Update age if provided
+        })
+    except ConflictError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    if updated_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return updated_user
 
 @router.delete("/{user_id}")
-async def delete_user(user_id: int):
-    for i, user in enumerate(fake_users):
-        if user["id"] == user_id:
-            deleted_user = fake_users.pop(i)
-            return {"message": f"User {deleted_user['name']} deleted"}
-    raise HTTPException(status_code=404, detail="User not found")
+async def delete_user(user_id: UUID):
+    deleted_user = await user_repo.delete(user_id)
+    if deleted_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"message": f"User {deleted_user['name']} deleted"}
 
 #The title and description will appear in the redoc documentation
 @router.get("/{user_id}/items/{item_id}")
 async def read_user_item(
-    user_id: int, item_id: int, q: Annotated[ str | None, Query(min_length=3, max_length=50, pattern="^[aeiouAEIOU]{3,50}$", title="Query of only vocals", description="A query parameter that only accepts vowels."), ] = None, short: bool = False
+    user_id: UUID, item_id: int, q: Annotated[ str | None, Query(min_length=3, max_length=50, pattern="^[aeiouAEIOU]{3,50}$", title="Query of only vocals", description="A query parameter that only accepts vowels."), ] = None, short: bool = False
 ):
     """
     Get a specific item from a user
@@ -109,22 +229,14 @@ async def read_user_item(
     - **q**: Optional query parameter
     - **short**: If True, returns a summarized version without description
     """
-    # Search for the item in fake_items
-    found_item = None
-    for item in fake_items:
-        if item["item_id"] == item_id:
-            found_item = item
-            break
+    # Search for the item in the item repository (lookup by item_id)
+    found_item = await item_repo.get(item_id)
     
     # If item is not found
     if not found_item:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    found_user = None
-    for user in fake_users:
-        if user["id"] == user_id:
-            found_user = user
-            break
+    found_user = await user_repo.get(user_id)
     
     if not found_user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -0,0 +1,111 @@
+"""
+Storage package for FastAPI application.
+Contains the repositories that back the routers (in memory or SQLite)
+and the in-memory data structures behind the memory backend.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from .base import ConflictError, Encoder, ItemRepository, UserRepository
+from .changelog import ChangeLog
+from .item_catalog import ItemCatalog
+from .item_search import ItemSearchIndex
+from .item_store import ItemStore
+from .memory import MemoryItemRepository, MemoryUserRepository
+from .sqlite import SQLiteItemRepository, SQLitePool, SQLiteUserRepository
+from .user_store import UserStore
+
+BACKENDS = ("memory", "sqlite")
+
+# Every repository created, so the app can close them at shutdown without
+# knowing which routers were loaded
+_repositories: list = []
+
+# One SQLitePool per database file: items and users share its writer (SQLite has one writer at a time)
+_pools: Dict[str, SQLitePool] = {}
+
+
+def _check_backend(settings) -> None:
+    if settings.storage_backend not in BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND {settings.storage_backend!r}, use one of {BACKENDS}")
+
+
+def _sqlite_pool(settings) -> SQLitePool:
+    pool = _pools.get(settings.sqlite_path)
+    if pool is None:
+        pool = _pools[settings.sqlite_path] = SQLitePool(settings.sqlite_path, settings.sqlite_pool_size)
+    return pool
+
+
+def _recover(settings, name: str, seed: List[dict]) -> Tuple[Optional[ChangeLog], List[dict], List[dict]]:
+    """
+    With PERSIST_DIR: the change log of this store, the records to start
+    from (the last snapshot, else the seed) and the log entries to replay
+    """
+    if not settings.persist_dir:
+        return None, seed, []
+    changelog = ChangeLog(settings.persist_dir, name, settings.persist_flush_interval, settings.persist_snapshot_every)
+    snapshot, entries = changelog.recover()
+    return changelog, seed if snapshot is None else snapshot, entries
+
+
+def create_item_repository(settings, seed: List[dict], encoder: Encoder) -> ItemRepository:
+    """The item repository chosen by STORAGE_BACKEND, filled with seed if it is empty"""
+    _check_backend(settings)
+    if settings.storage_backend == "sqlite":
+        repository = SQLiteItemRepository(_sqlite_pool(settings), encoder, seed)
+    else:
+        changelog, records, entries = _recover(settings, "items", seed)
+        repository = MemoryItemRepository(ItemStore(records, encoder), encoder, changelog)
+        repository.replay(entries)
+    _repositories.append(repository)
+    return repository
+
+
+def create_user_repository(settings, seed: List[dict], encoder: Encoder) -> UserRepository:
+    """The user repository chosen by STORAGE_BACKEND, filled with seed if it is empty"""
+    _check_backend(settings)
+    if settings.storage_backend == "sqlite":
+        repository = SQLiteUserRepository(_sqlite_pool(settings), encoder, seed)
+    else:
+        changelog, records, entries = _recover(settings, "users", seed)
+        repository = MemoryUserRepository(UserStore(records, encoder), encoder, changelog)
+        repository.replay(entries)
+    _repositories.append(repository)
+    return repository
+
+
+def persistence_stats() -> dict:
+    """Change log counters of every memory repository that persists (PERSIST_DIR)"""
+    return {
+        repository.changelog.name: repository.changelog.stats()
+        for repository in _repositories
+        if getattr(repository, "changelog", None) is not None
+    }
+
+
+async def close_repositories() -> None:
+    """Release the database connections of every repository created so far"""
+    for repository in _repositories:
+        await repository.close()
+
+
+__all__ = [
+    "ChangeLog",
+    "ConflictError",
+    "ItemRepository",
+    "UserRepository",
+    "MemoryItemRepository",
+    "MemoryUserRepository",
+    "SQLitePool",
+    "SQLiteItemRepository",
+    "SQLiteUserRepository",
+    "ItemCatalog",
+    "ItemSearchIndex",
+    "ItemStore",
+    "UserStore",
+    "create_item_repository",
+    "create_user_repository",
+    "close_repositories",
+    "persistence_stats",
+]
@@ -0,0 +1,159 @@
+from abc import ABC, abstractmethod
+from typing import Any, Callable, List, Optional, Tuple
+
+Page = Tuple[List[dict], Optional[int]]  # (records, key to continue from with a cursor)
+JSONPage = Tuple[List[bytes], Optional[int]]  # Same, with each record already serialized
+Encoder = Callable[[dict], bytes]  # Record → JSON bytes of its response model
+Operation = Tuple[str, Any, Optional[dict]]  # ("create", None, data) / ("update", key, changes) / ("delete", key, None)
+
+
+class ConflictError(ValueError):
+    """A write would break a uniqueness rule (e.g. two users with the same email)"""
+
+
+class JSONViews:
+    """
+    Read methods that return records already serialized to JSON
+
+    `encoder` turns a record into the JSON of its response model. These
+    defaults encode what the dict methods return; backends that keep the
+    JSON of every record from write time (memory) override them.
+    """
+
+    encoder: Encoder
+
+    async def get_json(self, key) -> Optional[bytes]:
+        record = await self.get(key)
+        return None if record is None else self.encoder(record)
+
+    async def slice_json(self, skip: int, limit: int) -> JSONPage:
+        page, next_after = await self.slice(skip, limit)
+        return [self.encoder(record) for record in page], next_after
+
+    async def page_after_json(self, after: Optional[int], limit: int) -> JSONPage:
+        page, next_after = await self.page_after(after, limit)
+        return [self.encoder(record) for record in page], next_after
+
+
+class ItemRepository(JSONViews, ABC):
+    """
+    What the items router needs from a storage backend
+
+    Records are plain dicts with the keys of ItemBase (+ "tax_price").
+    Every method is async, so a backend may do I/O without blocking the loop.
+    """
+
+    @abstractmethod
+    async def get(self, item_id: int) -> Optional[dict]:
+        """The item with this ID, or None"""
+
+    @abstractmethod
+    async def create(self, data: dict) -> dict:
+        """Store a new item, assigning the next item_id; returns the stored record"""
+
+    @abstractmethod
+    async def bulk(self, operations: List[Operation]) -> List[Optional[dict]]:
+        """
+        Apply create/update/delete operations in order, as one batch
+
+        Returns, for each operation, the created/updated/deleted record, or
+        None when the item to update or delete does not exist.
+        """
+
+    @abstractmethod
+    async def slice(self, skip: int, limit: int) -> Page:
+        """Offset pagination, in item_id order"""
+
+    @abstractmethod
+    async def page_after(self, after_id: Optional[int], limit: int) -> Page:
+        """Keyset pagination: items with item_id > after_id"""
+
+    @abstractmethod
+    async def search(self, q: str, min_price=None, max_price=None) -> List[dict]:
+        """Items whose name contains q (case-insensitive) within the price range, by item_id"""
+
+    @abstractmethod
+    async def stats(self, min_price=None, max_price=None, bins: int = 10, date_bucket: str = "month") -> dict:
+        """
+        Aggregates of the items within the price range (all items without one)
+
+        {"count", "min_price", "max_price", "avg_price", "price_histogram":
+        [{"min", "max", "count"}] with `bins` equal-width bins, "release_dates":
+        {"bucket", "buckets": [{"period", "count"}], "undated"}}. Periods are
+        the local date of each release_date cut to the year, month or day
+        ("2025", "2025-10", "2025-10-07").
+        """
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Number of items"""
+
+    @abstractmethod
+    async def version(self) -> int:
+        """A counter that changes with every write (HTTP caching builds ETags from it)"""
+
+    async def search_json(self, q: str, min_price=None, max_price=None) -> List[bytes]:
+        return [self.encoder(record) for record in await self.search(q, min_price, max_price)]
+
+    async def close(self) -> None:
+        """Release resources (connections, files); nothing to do by default"""
+
+
+class UserRepository(JSONViews, ABC):
+    """
+    What the users router needs from a storage backend
+
+    Records are plain dicts with the keys of User. User IDs may be given as
+    UUID or string; emails are unique (case-insensitive). Pagination keys are an
+    internal, increasing sequence number (users have UUIDs, which don't sort
+    in insertion order).
+    """
+
+    @abstractmethod
+    async def get(self, user_id) -> Optional[dict]:
+        """The user with this ID, or None"""
+
+    @abstractmethod
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        """The user with this email (case-insensitive), or None"""
+
+    @abstractmethod
+    async def add(self, record: dict) -> dict:
+        """Store a new user (the record already has its ID); ConflictError if the email is taken"""
+
+    @abstractmethod
+    async def update(self, user_id, changes: dict) -> Optional[dict]:
+        """Apply changes to a user; returns the updated record, or None if not found (ConflictError if the email is taken)"""
+
+    @abstractmethod
+    async def delete(self, user_id) -> Optional[dict]:
+        """Remove a user; returns the removed record, or None if not found"""
+
+    @abstractmethod
+    async def bulk(self, operations: List[Operation]) -> List[Optional[dict]]:
+        """
+        Apply create/update/delete operations in order, as one batch
+
+        Returns, for each operation, the created/updated/deleted record, None
+        when the user to update or delete does not exist, or the ConflictError
+        that rejected it (the other operations still apply).
+        """
+
+    @abstractmethod
+    async def slice(self, skip: int, limit: int) -> Page:
+        """Offset pagination, in insertion order"""
+
+    @abstractmethod
+    async def page_after(self, after_seq: Optional[int], limit: int) -> Page:
+        """Keyset pagination: users stored after the given sequence number"""
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Number of users"""
+
+    @abstractmethod
+    async def version(self) -> int:
+        """A counter that changes with every write (HTTP caching builds ETags from it)"""
+
+    async def close(self) -> None:
+        """Release resources (connections, files); nothing to do by default"""
@@ -0,0 +1,366 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+try:
+    import orjson
+except ImportError:  # Optional: without it we fall back to the standard json module
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_BATCH = 1000  # Records written to the snapshot file per write() call
+
+
+def _default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Cannot store {type(value).__name__} in the change log")
+
+
+def _dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+class ChangeLog:
+    """
+    Write-behind persistence for an in-memory store: append-only log + snapshots
+
+    - put()/delete() only append the change to a list in memory, so a
+      write still costs what a write to a dict costs. A background task
+      writes everything that piled up and fsyncs it ONCE (group commit),
+      `flush_interval` seconds after the first pending change. That is the
+      durability window: a crash loses at most the changes of the last
+      `flush_interval` seconds (plus the fsync in progress).
+    - The log is split in segment files (`items.00000003.log`). After
+      `snapshot_every` entries, the whole store is written to
+      `items.snapshot` (to a temporary file, then renamed: a crash never
+      leaves half a snapshot) and the segments it covers are deleted, so
+      the log never grows without bound.
+    - recover() at startup reads the snapshot and the segments written
+      after it; the caller replays them. A torn last line (a crash in the
+      middle of a write) is ignored.
+    - A failed write (disk full...) is cut off the segment before it is
+      retried, so the log never holds half an entry followed by more.
+
+    Every entry is the full record ("put") or its key ("delete"), so
+    replaying an entry twice gives the same result. A put can also carry
+    `max_id`, the highest key handed out so far, which snapshots keep in
+    their header: IDs of deleted records are never given out again.
+
+    Only one process may write to a directory: with several uvicorn
+    workers, use STORAGE_BACKEND=sqlite instead.
+    """
+
+    def __init__(self, directory: str, name: str, flush_interval: float = 0.05, snapshot_every: int = 10_000):
+        self.directory = directory
+        self.name = name
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        # What a snapshot writes: returns the records as of now, and can be iterated from another thread
+        self.snapshot_source: Optional[Callable[[], Iterable[dict]]] = None
+        # Highest key handed out so far (written in the snapshot header), for stores that generate keys
+        self.max_id_source: Optional[Callable[[], int]] = None
+        os.makedirs(directory, exist_ok=True)
+
+        self._pending: List[dict] = []
+        self._oldest_pending = 0.0  # When the oldest change not yet on disk was made
+        # A new segment: never append after a possibly torn line, nor to one the snapshot covers
+        self._segment = max(max(self._segments(), default=0) + 1, self._snapshot_segment())
+        self._fd: Optional[int] = None  # Unbuffered: nothing is left in a buffer after a failed write
+        self._fd_segment = 0
+        self._offset = 0  # Size of the current segment after the last successful fsync
+        self._new_segment = False  # A failed write could not be cut off: continue in a new segment
+        self._since_snapshot = 0
+        self._task: Optional[asyncio.Task] = None
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._closing = False
+        self._counters = {"entries_written": 0, "fsyncs": 0, "snapshots": 0, "errors": 0}
+        self._last_fsync_ms = 0.0
+        self._max_lag_ms = 0.0
+        self._last_snapshot: Optional[dict] = None
+
+    # Files
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, f"{self.name}.snapshot")
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{self.name}.{segment:08d}.log")
+
+    def _segments(self) -> List[int]:
+        prefix, suffix = self.name + ".", ".log"
+        segments = []
+        for filename in os.listdir(self.directory):
+            number = filename[len(prefix) : -len(suffix)]
+            if filename.startswith(prefix) and filename.endswith(suffix) and number.isdigit():
+                segments.append(int(number))
+        return sorted(segments)
+
+    def _snapshot_segment(self) -> int:
+        """The first segment NOT included in the snapshot (0 without a snapshot)"""
+        if not os.path.exists(self.snapshot_path):
+            return 0
+        with open(self.snapshot_path, "rb") as f:
+            return _loads(f.readline())["segment"]
+
+    def recover(self) -> Tuple[Optional[List[dict]], List[dict]]:
+        """
+        (records of the last snapshot, or None if there is none; log entries written after it, in order)
+
+        The `max_id` of the snapshot comes first, as a {"op": "max_id"} entry.
+        """
+        records, first_segment = None, 0
+        entries = []
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "rb") as f:
+                header = _loads(f.readline())
+                records = [_loads(line) for line in f]
+            first_segment = header["segment"]
+            if header.get("max_id") is not None:
+                entries.append({"op": "max_id", "max_id": header["max_id"]})
+        for segment in self._segments():
+            if segment < first_segment:
+                continue  # Already in the snapshot (left over by a crash before they were deleted)
+            with open(self._segment_path(segment), "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Torn write: this entry never made it to disk completely
+                    try:
+                        entries.append(_loads(line))
+                    except ValueError:
+                        # Corrupted: replaying what comes after it could rebuild a state that never existed
+                        logger.error("Corrupted entry in %s, the log is replayed up to it", self._segment_path(segment))
+                        self._since_snapshot = len(entries)
+                        return records, entries
+        self._since_snapshot = len(entries)
+        return records, entries
+
+    # Writes (called by the repository, on the event loop)
+
+    def put(self, record: dict, max_id: Optional[int] = None) -> None:
+        """Log the new state of a record (a shallow copy is taken now: later changes don't leak in)"""
+        entry = {"op": "put", "record": dict(record)}
+        if max_id is not None:
+            entry["max_id"] = max_id
+        self._append(entry)
+
+    def delete(self, key) -> None:
+        self._append({"op": "delete", "key": key})
+
+    def _append(self, entry: dict) -> None:
+        if not self._pending:
+            self._oldest_pending = time.monotonic()
+        self._pending.append(entry)
+        try:
+            self._ensure_task()
+        except RuntimeError:
+            return  # No event loop running (e.g. a script): flushed by close()
+        self._wakeup.set()
+
+    def _ensure_task(self) -> None:
+        if self._task is None:
+            # Created here, inside the running loop (after a restart in tests, a new loop)
+            self._wakeup = asyncio.Event()
+            self._lock = asyncio.Lock()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closing:
+            await self._wakeup.wait()
+            if not self._closing:
+                await asyncio.sleep(self.flush_interval)  # Let more writes join this commit
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # Whatever went wrong, this task must keep running: it is the only one that persists
+                logger.exception("Unexpected error writing the %s change log", self.name)
+                self._counters["errors"] += 1
+            if self._pending:
+                self._wakeup.set()  # Changes arrived during the write (or it failed): go again
+            elif self._since_snapshot >= self.snapshot_every and self._snapshot_task is None:
+                self._snapshot_task = asyncio.get_running_loop().create_task(self.snapshot())
+
+    async def flush(self) -> None:
+        """Write the pending changes to the current segment and fsync them (one write, one fsync)"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            await self._flush_locked()
+
+    async def _flush_locked(self) -> bool:
+        """False if the write failed (the changes stay pending)"""
+        if not self._pending:
+            return True
+        # Serialized BEFORE the entries leave _pending: if one can't be, the others are not lost
+        lines, entries = [], []
+        for entry in self._pending:
+            try:
+                lines.append(_dumps(entry) + b"\n")
+                entries.append(entry)
+            except TypeError:
+                logger.exception("Dropped a %s change log entry that can't be serialized", self.name)
+                self._counters["errors"] += 1
+        self._pending = []
+        oldest = self._oldest_pending
+        lag_ms = (time.monotonic() - oldest) * 1000
+        data = b"".join(lines)
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._write, self._segment, data)
+        except OSError:
+            logger.exception("Could not write the %s change log, will retry", self.name)
+            self._counters["errors"] += 1
+            if self._new_segment:
+                self._segment += 1
+                self._new_segment = False
+            self._pending[:0] = entries  # Keep them, in order, in front of the newer ones
+            self._oldest_pending = oldest
+            return False
+        self._last_fsync_ms = (time.perf_counter() - start) * 1000
+        self._max_lag_ms = max(self._max_lag_ms, lag_ms + self._last_fsync_ms)
+        self._counters["entries_written"] += len(entries)
+        self._counters["fsyncs"] += 1
+        self._since_snapshot += len(entries)
+        return True
+
+    def _write(self, segment: int, data: bytes) -> None:
+        # Runs in a thread: the event loop keeps serving requests during the fsync
+        if self._fd is None or self._fd_segment != segment:
+            self._close_file()
+            self._fd = os.open(self._segment_path(segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            self._fd_segment = segment
+            self._offset = os.fstat(self._fd).st_size
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self._fd, view) :]  # os.write may write only part of it
+            os.fsync(self._fd)
+        except OSError:
+            # Part of `data` may be in the file: cut it off, or the retry would
+            # be glued to half an entry. If even that fails, use a new segment
+            self._close_file()
+            try:
+                os.truncate(self._segment_path(segment), self._offset)
+            except OSError:
+                self._new_segment = True
+            raise
+        self._offset += len(data)
+
+    def _close_file(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    # Snapshots
+
+    async def snapshot(self) -> None:
+        """Write the whole store to the snapshot file and delete the log segments it replaces"""
+        try:
+            if self.snapshot_source is None:
+                return
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if not await self._flush_locked():
+                    return  # The log could not be written: don't cut it either
+                await asyncio.to_thread(self._close_file)  # The old segment is complete
+                # Changes made from here on go to the new segment. The few made
+                # during the close above are in the snapshot AND in the new
+                # segment: replaying them again changes nothing
+                segment = self._segment = self._segment + 1
+                records = self.snapshot_source()
+                max_id = self.max_id_source() if self.max_id_source is not None else None
+                self._since_snapshot = 0
+            start = time.perf_counter()
+            count = await asyncio.to_thread(self._write_snapshot, records, segment, max_id)
+            self._counters["snapshots"] += 1
+            self._last_snapshot = {"records": count, "segment": segment, "ms": round((time.perf_counter() - start) * 1000, 2)}
+        except OSError:
+            logger.exception("Could not write the %s snapshot", self.name)
+            self._counters["errors"] += 1
+        finally:
+            self._snapshot_task = None
+
+    def _write_snapshot(self, records: Iterable[dict], segment: int, max_id: Optional[int] = None) -> int:
+        temporary = self.snapshot_path + ".tmp"
+        count = 0
+        with open(temporary, "wb") as f:
+            f.write(_dumps({"segment": segment, "created": time.time(), "max_id": max_id}) + b"\n")
+            batch = []
+            for record in records:
+                batch.append(_dumps(record))
+                if len(batch) >= SNAPSHOT_BATCH:
+                    f.write(b"\n".join(batch) + b"\n")
+                    count += len(batch)
+                    batch.clear()
+            if batch:
+                f.write(b"\n".join(batch) + b"\n")
+                count += len(batch)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.snapshot_path)  # Atomic: the old snapshot or the new one, never half of one
+        self._fsync_directory()
+        for old in self._segments():
+            if old < segment:
+                os.remove(self._segment_path(old))
+        return count
+
+    def _fsync_directory(self) -> None:
+        # The rename itself must reach the disk too (not possible on Windows: skipped there)
+        if hasattr(os, "O_DIRECTORY"):
+            fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    # Lifecycle
+
+    async def close(self) -> None:
+        """Write everything still pending (at shutdown) and stop the background task"""
+        self._closing = True
+        try:
+            if self._task is not None:
+                self._wakeup.set()
+                await self._task
+            if self._snapshot_task is not None:
+                await self._snapshot_task
+            await self.flush()
+            await asyncio.to_thread(self._close_file)
+        finally:
+            self._task = self._snapshot_task = self._wakeup = self._lock = None
+            self._closing = False
+
+    def stats(self) -> dict:
+        lag = (time.monotonic() - self._oldest_pending) * 1000 if self._pending else 0.0
+        return {
+            "directory": self.directory,
+            "segment": self._segment,
+            "pending": len(self._pending),
+            "pending_ms": round(lag, 2),  # Age of the oldest change that is not on disk yet
+            "max_lag_ms": round(self._max_lag_ms, 2),  # Worst time from a change to its fsync so far
+            "last_fsync_ms": round(self._last_fsync_ms, 2),
+            "since_snapshot": self._since_snapshot,
+            **self._counters,
+            "last_snapshot": self._last_snapshot,
+        }
@@ -0,0 +1,351 @@
+import math
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+NO_DATE = -(2**63)  # In the release column: the item has no release_date
+NAIVE = -(2**15)  # In the offset column: the release_date had no timezone
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+NAIVE_EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# Release-date buckets of /items/stats → length of the ISO date prefix that names them
+DATE_BUCKETS = {"year": 4, "month": 7, "day": 10}  # "2025", "2025-10", "2025-10-07"
+
+
+@lru_cache(maxsize=None)
+def _tz(offset_minutes: int) -> timezone:
+    # Only a handful of offsets ever show up: one timezone object each
+    return timezone(timedelta(minutes=offset_minutes))
+
+
+def _to_columns(value) -> Tuple[int, int]:
+    """release_date (ISO string, datetime or None) → (microseconds since epoch, UTC offset in minutes)"""
+    if value is None:
+        return NO_DATE, 0
+    moment = datetime.fromisoformat(value) if isinstance(value, str) else value
+    offset = moment.utcoffset()
+    if offset is None:
+        return (moment - NAIVE_EPOCH) // MICROSECOND, NAIVE
+    return (moment - EPOCH) // MICROSECOND, int(offset.total_seconds() // 60)
+
+
+def _from_columns(micros: int, offset: int) -> Optional[datetime]:
+    if micros == NO_DATE:
+        return None
+    if offset == NAIVE:
+        return NAIVE_EPOCH + micros * MICROSECOND
+    return (EPOCH + micros * MICROSECOND).astimezone(_tz(offset))
+
+
+def _local_micros(micros: int, offset: int) -> int:
+    # Wall-clock time where the item was released: buckets follow the local date
+    return micros if offset == NAIVE else micros + offset * 60_000_000
+
+
+def _bucket_of(local_micros: int, bucket: str) -> Tuple[str, int]:
+    """The bucket a local time falls in: its label and where the next bucket starts"""
+    moment = NAIVE_EPOCH + local_micros * MICROSECOND
+    if bucket == "year":
+        label, start = f"{moment.year:04d}", datetime(moment.year + 1, 1, 1)
+    elif bucket == "month":
+        year, month = divmod(moment.year * 12 + moment.month, 12)  # The next month, 0-based
+        label, start = f"{moment.year:04d}-{moment.month:02d}", datetime(year, month + 1, 1)
+    else:
+        day = datetime(moment.year, moment.month, moment.day)
+        label, start = day.strftime("%Y-%m-%d"), day + timedelta(days=1)
+    return label, (start - NAIVE_EPOCH) // MICROSECOND
+
+
+def count_buckets(local_times, bucket: str) -> List[Tuple[str, int]]:
+    """(label, count) per non-empty bucket of sorted local times"""
+    # Each bucket is one bisect, and empty periods are skipped by jumping
+    # straight to the bucket of the next release
+    buckets, start = [], 0
+    while start < len(local_times):
+        label, next_start = _bucket_of(local_times[start], bucket)
+        stop = bisect_left(local_times, next_start, start)
+        buckets.append((label, stop - start))
+        start = stop
+    return buckets
+
+
+def histogram_edges(low: float, high: float, bins: int) -> List[float]:
+    """`bins` equal-width bins from low to high (one bin when every price is the same)"""
+    if high <= low:
+        return [low, high]
+    width = (high - low) / bins
+    return [low + width * i for i in range(bins)] + [high]
+
+
+class SortedColumn:
+    """
+    A column kept sorted, next to the item_id of every value (parallel arrays)
+
+    The arrays hold raw 8-byte numbers, not Python objects, and a range
+    (min_price..max_price) is two bisects: everything between them is the
+    answer, and counting, min/max or a sum over it run in C.
+
+    `tags` is one more integer per value that travels with it (the price
+    column carries each item's local release time), so a range can be
+    grouped by it without going back to the rows.
+    """
+
+    def __init__(self, typecode: str):
+        self.values = array(typecode)
+        self.ids = array("q")
+        self.tags = array("q")
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def load(self, entries: Iterable[Tuple[float, int, int]]) -> None:
+        """Replace the contents with (value, item_id, tag) entries, sorting once (much faster than adding one by one)"""
+        ordered = sorted(entries)
+        self.values = array(self.values.typecode, [entry[0] for entry in ordered])
+        self.ids = array("q", [entry[1] for entry in ordered])
+        self.tags = array("q", [entry[2] for entry in ordered])
+
+    def add(self, value, item_id: int, tag: int = 0) -> None:
+        index = bisect_right(self.values, value)
+        self.values.insert(index, value)
+        self.ids.insert(index, item_id)
+        self.tags.insert(index, tag)
+
+    def remove(self, value, item_id: int) -> None:
+        index = bisect_left(self.values, value)
+        while self.ids[index] != item_id:  # Several items may share the value
+            index += 1
+        del self.values[index]
+        del self.ids[index]
+        del self.tags[index]
+
+    def bounds(self, low=None, high=None) -> Tuple[int, int]:
+        """Positions [start, stop) of the values with low <= value <= high"""
+        start = 0 if low is None else bisect_left(self.values, low)
+        stop = len(self.values) if high is None else bisect_right(self.values, high)
+        return start, max(start, stop)
+
+
+class ItemCatalog:
+    """
+    Items stored column by column, instead of one dict per item
+
+    - item_id, price, tax_price and release_date live in typed arrays (8
+      bytes per value, no Python object per number): release dates as
+      microseconds since the epoch + their UTC offset, a missing price as NaN.
+    - Names are interned, so repeated names share one string.
+    - Prices and local release times are also kept sorted (SortedColumn),
+      so price ranges and the /items/stats aggregates work on slices of
+      arrays instead of walking every item.
+
+    Rows keep insertion order. Deleting only forgets the row; compact()
+    drops the forgotten rows from the columns. Records are rebuilt as dicts
+    (the same shape as before) when they are read.
+    """
+
+    def __init__(self):
+        self._ids = array("q")
+        self._names: List[str] = []
+        self._prices = array("d")
+        self._taxes = array("d")
+        self._released = array("q")
+        self._offsets = array("h")
+        self._row: Dict[int, int] = {}  # item_id → row
+        self._by_price = SortedColumn("d")
+        self._by_release = SortedColumn("q")  # Local release time, for date buckets
+
+    def __len__(self) -> int:
+        return len(self._row)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._row
+
+    def _append(self, record: dict) -> int:
+        row = len(self._ids)
+        price, tax = record.get("price"), record.get("tax_price")
+        micros, offset = _to_columns(record.get("release_date"))
+        self._ids.append(record["item_id"])
+        self._names.append(sys.intern(record["name"]))
+        self._prices.append(math.nan if price is None else float(price))
+        self._taxes.append(math.nan if tax is None else float(tax))
+        self._released.append(micros)
+        self._offsets.append(offset)
+        self._row[record["item_id"]] = row
+        return row
+
+    def extend(self, records: Iterable[dict]) -> None:
+        """Add many new items at once (the sorted columns are rebuilt in one sort)"""
+        for record in records:
+            if record["item_id"] in self._row:
+                raise ValueError(f"Item {record['item_id']} already exists")
+            self._append(record)
+        self._rebuild_sorted()
+
+    def add(self, record: dict) -> None:
+        if record["item_id"] in self._row:
+            raise ValueError(f"Item {record['item_id']} already exists")
+        self._index(self._append(record))
+
+    def update(self, item_id: int, changes: dict) -> bool:
+        """Change some fields of an item; False if it does not exist"""
+        row = self._row.get(item_id)
+        if row is None:
+            return False
+        self._unindex(row)
+        if "name" in changes:
+            self._names[row] = sys.intern(changes["name"])
+        if "price" in changes:
+            self._prices[row] = math.nan if changes["price"] is None else float(changes["price"])
+        if "tax_price" in changes:
+            self._taxes[row] = math.nan if changes["tax_price"] is None else float(changes["tax_price"])
+        if "release_date" in changes:
+            self._released[row], self._offsets[row] = _to_columns(changes["release_date"])
+        self._index(row)
+        return True
+
+    def remove(self, item_id: int) -> bool:
+        """Forget an item (its row stays in the columns until compact()); False if it does not exist"""
+        row = self._row.pop(item_id, None)
+        if row is None:
+            return False
+        self._unindex(row)
+        return True
+
+    def compact(self) -> None:
+        """Drop the rows of removed items, keeping the order of the others"""
+        if len(self._ids) == len(self._row):
+            return
+        live = [row for row, item_id in enumerate(self._ids) if self._row.get(item_id) == row]
+        self._ids = array("q", [self._ids[row] for row in live])
+        self._names = [self._names[row] for row in live]
+        self._prices = array("d", [self._prices[row] for row in live])
+        self._taxes = array("d", [self._taxes[row] for row in live])
+        self._released = array("q", [self._released[row] for row in live])
+        self._offsets = array("h", [self._offsets[row] for row in live])
+        self._row = {item_id: row for row, item_id in enumerate(self._ids)}
+
+    def _local_release(self, row: int) -> int:
+        micros = self._released[row]
+        return NO_DATE if micros == NO_DATE else _local_micros(micros, self._offsets[row])
+
+    def _index(self, row: int) -> None:
+        price, local = self._prices[row], self._local_release(row)
+        if not math.isnan(price):
+            self._by_price.add(price, self._ids[row], local)
+        if local != NO_DATE:
+            self._by_release.add(local, self._ids[row])
+
+    def _unindex(self, row: int) -> None:
+        price, micros = self._prices[row], self._released[row]
+        if not math.isnan(price):
+            self._by_price.remove(price, self._ids[row])
+        if micros != NO_DATE:
+            self._by_release.remove(_local_micros(micros, self._offsets[row]), self._ids[row])
+
+    def _rebuild_sorted(self) -> None:
+        prices, ids = self._prices, self._ids
+        local = {row: self._local_release(row) for row in self._row.values()}
+        self._by_price.load((prices[row], ids[row], local[row]) for row in local if not math.isnan(prices[row]))
+        self._by_release.load((time, ids[row], 0) for row, time in local.items() if time != NO_DATE)
+
+    def copy(self) -> "ItemCatalog":
+        """
+        A copy of the columns, without the sorted ones (for snapshots)
+
+        Copying arrays is a memcpy, so this is quick even with millions of
+        items; the copy can then be read from another thread while this
+        catalog keeps changing.
+        """
+        copy = ItemCatalog()
+        copy._ids, copy._names = self._ids[:], self._names[:]
+        copy._prices, copy._taxes = self._prices[:], self._taxes[:]
+        copy._released, copy._offsets = self._released[:], self._offsets[:]
+        copy._row = dict(self._row)
+        return copy
+
+    def record(self, item_id: int) -> Optional[dict]:
+        """The item as a dict (built on the fly), or None if it does not exist"""
+        row = self._row.get(item_id)
+        if row is None:
+            return None
+        price, tax = self._prices[row], self._taxes[row]
+        record = {
+            "item_id": item_id,
+            "name": self._names[row],
+            "price": None if math.isnan(price) else price,
+            "release_date": _from_columns(self._released[row], self._offsets[row]),
+        }
+        if not math.isnan(tax):
+            record["tax_price"] = tax
+        return record
+
+    def ids(self) -> array:
+        """item_id of every item, in insertion order (call compact() first after removals)"""
+        return self._ids
+
+    def price_of(self, item_id: int) -> Optional[float]:
+        row = self._row.get(item_id)
+        price = math.nan if row is None else self._prices[row]
+        return None if math.isnan(price) else price
+
+    def price_range(self, min_price=None, max_price=None) -> array:
+        """item_id of the items with min_price <= price <= max_price, by price"""
+        start, stop = self._price_bounds(min_price, max_price)
+        return self._by_price.ids[start:stop]
+
+    def price_range_size(self, min_price=None, max_price=None) -> int:
+        start, stop = self._price_bounds(min_price, max_price)
+        return stop - start
+
+    def _price_bounds(self, min_price, max_price) -> Tuple[int, int]:
+        return self._by_price.bounds(
+            None if min_price is None else float(min_price),
+            None if max_price is None else float(max_price),
+        )
+
+    def stats(self, min_price=None, max_price=None, bins: int = 10, date_bucket: str = "month") -> dict:
+        """
+        Aggregates over the items in the price range (every item without a range)
+
+        count, min/max/avg price, a histogram of `bins` equal-width price
+        bins, and how many items were released per year/month/day (local
+        date of each release_date, like its ISO text).
+        """
+        filtered = min_price is not None or max_price is not None
+        start, stop = self._price_bounds(min_price, max_price)
+        prices = self._by_price.values
+        if filtered:
+            prices = prices[start:stop]  # Sorted: min is the first, max the last
+        count = len(prices) if filtered else len(self._row)
+
+        histogram = []
+        if prices:
+            edges = histogram_edges(prices[0], prices[-1], bins)
+            cuts = [bisect_left(prices, edge) for edge in edges[:-1]] + [len(prices)]
+            histogram = [
+                {"min": round(edges[i], 2), "max": round(edges[i + 1], 2), "count": cuts[i + 1] - cuts[i]}
+                for i in range(len(edges) - 1)
+            ]
+
+        if filtered:
+            # The release times travel with the prices: sort the ones in range (in C), skip the undated
+            local = sorted(self._by_price.tags[start:stop])
+            dated = count_buckets(local[bisect_right(local, NO_DATE):], date_bucket)
+        else:
+            dated = count_buckets(self._by_release.values, date_bucket)
+        return {
+            "count": count,
+            "min_price": prices[0] if prices else None,
+            "max_price": prices[-1] if prices else None,
+            "avg_price": round(sum(prices) / len(prices), 2) if prices else None,
+            "price_histogram": histogram,
+            "release_dates": {
+                "bucket": date_bucket,
+                "buckets": [{"period": label, "count": n} for label, n in dated],
+                "undated": count - sum(n for _, n in dated),
+            },
+        }
@@ -0,0 +1,75 @@
+from typing import Dict, Set
+
+NGRAM_SIZE = 3  # Names are indexed by every 1, 2 and 3 character substring
+
+
+def _ngrams(text: str, size: int) -> Set[str]:
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+class ItemSearchIndex:
+    """
+    Search index for item names: n-gram postings
+
+    Every 1..3 character substring of the lowercased name points to the set
+    of item IDs that contain it. A query of up to 3 characters is a single
+    dictionary lookup; longer queries intersect the postings of their
+    trigrams and then verify the real substring.
+
+    The price side of a search is the catalog's sorted price column
+    (ItemCatalog.price_range); ItemStore.search combines both.
+    The index is updated incrementally with `add()` and `remove()`.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = {}
+        self._lower_names: Dict[int, str] = {}  # Lowercased once, at insert time
+
+    def add(self, item_id: int, name: str) -> None:
+        lower_name = name.lower()
+        self._lower_names[item_id] = lower_name
+        for size in range(1, NGRAM_SIZE + 1):
+            for gram in _ngrams(lower_name, size):
+                self._postings.setdefault(gram, set()).add(item_id)
+
+    def remove(self, item_id: int) -> None:
+        """Forget an item (to re-index it after a change, remove it and add it again)"""
+        lower_name = self._lower_names.pop(item_id, None)
+        if lower_name is not None:
+            for size in range(1, NGRAM_SIZE + 1):
+                for gram in _ngrams(lower_name, size):
+                    posting = self._postings.get(gram)
+                    if posting is not None:
+                        posting.discard(item_id)
+                        if not posting:
+                            del self._postings[gram]
+
+    def contains(self, item_id: int, query: str) -> bool:
+        """Whether the name of this item contains the (already lowercased) query"""
+        return query in self._lower_names[item_id]
+
+    def posting_size(self, q: str) -> int:
+        """An upper bound of how many names contain `q` (cheap: one lookup)"""
+        query = q.lower()
+        return len(self._postings.get(query[:NGRAM_SIZE], ())) if query else len(self._lower_names)
+
+    def match_name(self, q: str) -> Set[int]:
+        """IDs of the items whose name contains `q` (case-insensitive)"""
+        query = q.lower()
+        if not query:
+            return set(self._lower_names)
+        if len(query) <= NGRAM_SIZE:
+            return set(self._postings.get(query, ()))
+
+        # Intersect starting with the rarest trigram to keep sets small
+        postings = sorted(
+            (self._postings.get(gram, set()) for gram in _ngrams(query, NGRAM_SIZE)),
+            key=len,
+        )
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        # Trigrams can all be present without the full substring: verify it
+        return {item_id for item_id in candidates if query in self._lower_names[item_id]}
@@ -0,0 +1,181 @@
+from array import array
+from bisect import bisect_right
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .item_catalog import ItemCatalog
+from .item_search import ItemSearchIndex
+
+
+class ItemStore:
+    """
+    In-memory item repository over a columnar catalog
+
+    The items live in an ItemCatalog (typed arrays, one column per field)
+    instead of one dict each; lookups by `item_id` go through its id → row
+    hash index, which is O(1) instead of walking a list. Names have their
+    own n-gram search index, and the catalog keeps prices sorted for range
+    filters and /items/stats. Methods that return records build the dicts
+    on the fly.
+
+    With an `encoder`, the JSON of every item is also computed when it is
+    written (and kept up to date on changes), so reads can send it as is.
+    """
+
+    def __init__(self, records: Optional[List[dict]] = None, encoder: Optional[Callable[[dict], bytes]] = None):
+        # The records are copied into the columns: the list itself is not kept
+        self._catalog = ItemCatalog()
+        self._catalog.extend(records or [])
+        self._encoder = encoder
+        self._json: Dict[int, bytes] = {}
+        self._sorted_ids = array("q", sorted(self._catalog.ids()))  # For keyset (cursor) pagination
+        self._names = ItemSearchIndex()
+        for item_id in self._catalog.ids():
+            self._index(item_id)
+
+    def _index(self, item_id: int) -> dict:
+        record = self._catalog.record(item_id)
+        self._names.add(item_id, record["name"])
+        if self._encoder is not None:
+            # Encoded from the stored columns, so the JSON is exactly what reads return
+            self._json[item_id] = self._encoder(record)
+        return record
+
+    def __len__(self) -> int:
+        return len(self._catalog)
+
+    def __iter__(self) -> Iterator[dict]:
+        return (self._catalog.record(item_id) for item_id in self._catalog.ids())
+
+    @property
+    def catalog(self) -> ItemCatalog:
+        return self._catalog
+
+    def get(self, item_id: int) -> Optional[dict]:
+        """Return the item with this ID, or None if it does not exist"""
+        return self._catalog.record(item_id)
+
+    def add(self, record: dict) -> dict:
+        """Add a new item, keeping the columns and the indexes in sync"""
+        self._catalog.add(record)  # ValueError if the item_id is taken
+        if not self._sorted_ids or record["item_id"] > self._sorted_ids[-1]:
+            self._sorted_ids.append(record["item_id"])  # Usual case: IDs only grow
+        else:
+            self._sorted_ids.insert(bisect_right(self._sorted_ids, record["item_id"]), record["item_id"])
+        return self._index(record["item_id"])
+
+    def update(self, item_id: int, changes: dict) -> Optional[dict]:
+        """Update an item (and re-index it); returns it, or None if it does not exist"""
+        if not self._catalog.update(item_id, changes):
+            return None
+        self._names.remove(item_id)
+        return self._index(item_id)  # Search index and JSON
+
+    def delete(self, item_id: int, compact: bool = True) -> Optional[dict]:
+        """
+        Remove an item from the indexes; returns it, or None if it does not exist
+
+        Taking it out of the columns and the sorted IDs is O(n), so when many
+        items are deleted in a row pass compact=False and call compact()
+        once at the end.
+        """
+        record = self._catalog.record(item_id)
+        if record is None:
+            return None
+        self._catalog.remove(item_id)
+        self._names.remove(item_id)
+        self._json.pop(item_id, None)
+        if compact:
+            self.compact()
+        return record
+
+    def compact(self) -> None:
+        """Drop deleted items from the columns and the sorted IDs"""
+        if len(self._sorted_ids) != len(self._catalog):
+            self._catalog.compact()
+            self._sorted_ids = array("q", [item_id for item_id in self._sorted_ids if item_id in self._catalog])
+
+    def get_json(self, item_id: int) -> Optional[bytes]:
+        """The JSON computed at write time for this item (needs an encoder), or None"""
+        return self._json.get(item_id)
+
+    def json_of(self, records: List[dict]) -> List[bytes]:
+        """The JSON computed at write time for each of these items"""
+        json_by_id = self._json
+        return [json_by_id[record["item_id"]] for record in records]
+
+    def _slice_ids(self, skip: int, limit: int) -> Tuple[array, Optional[int]]:
+        ids = self._catalog.ids()  # Insertion order
+        page = ids[skip : skip + limit]
+        return page, (page[-1] if page and skip + limit < len(ids) else None)
+
+    def _page_ids(self, after_id: Optional[int], limit: int) -> Tuple[array, Optional[int]]:
+        # Jumping to the start of the page is a bisect, so deep pages cost the same as the first one
+        start = 0 if after_id is None else bisect_right(self._sorted_ids, after_id)
+        ids = self._sorted_ids[start : start + limit]
+        return ids, (ids[-1] if ids and start + limit < len(self._sorted_ids) else None)
+
+    def slice(self, skip: int = 0, limit: int = 10) -> Tuple[List[dict], Optional[int]]:
+        """Offset pagination: the page and the key to continue from with a cursor"""
+        ids, next_after = self._slice_ids(skip, limit)
+        return [self._catalog.record(item_id) for item_id in ids], next_after
+
+    def page_after(self, after_id: Optional[int], limit: int) -> Tuple[List[dict], Optional[int]]:
+        """
+        Keyset pagination: up to `limit` items with item_id > after_id
+
+        Returns the page and the key to continue from (None on the last page).
+        """
+        ids, next_after = self._page_ids(after_id, limit)
+        return [self._catalog.record(item_id) for item_id in ids], next_after
+
+    def slice_json(self, skip: int, limit: int) -> Tuple[List[bytes], Optional[int]]:
+        """Like slice(), with the JSON of each item (no dicts are built)"""
+        ids, next_after = self._slice_ids(skip, limit)
+        return [self._json[item_id] for item_id in ids], next_after
+
+    def page_after_json(self, after_id: Optional[int], limit: int) -> Tuple[List[bytes], Optional[int]]:
+        """Like page_after(), with the JSON of each item"""
+        ids, next_after = self._page_ids(after_id, limit)
+        return [self._json[item_id] for item_id in ids], next_after
+
+    def search_ids(self, q: str, min_price=None, max_price=None) -> List[int]:
+        """IDs of the items whose name contains `q` and whose price is in the range, sorted"""
+        names, catalog = self._names, self._catalog
+        if min_price is None and max_price is None:
+            return sorted(names.match_name(q))
+
+        query = q.lower()
+        if catalog.price_range_size(min_price, max_price) <= names.posting_size(q):
+            # Narrow price range: check the (already lowercased) names in the range
+            return sorted(item_id for item_id in catalog.price_range(min_price, max_price)
+                          if names.contains(item_id, query))
+
+        # Selective name query: check the price of each name match
+        low = float("-inf") if min_price is None else float(min_price)
+        high = float("inf") if max_price is None else float(max_price)
+        price_of = catalog.price_of
+        return sorted(
+            item_id for item_id in names.match_name(q)
+            if (price := price_of(item_id)) is not None and low <= price <= high
+        )
+
+    def search(self, q: str, min_price=None, max_price=None) -> List[dict]:
+        """Items whose name contains `q` and whose price is in the range"""
+        return [self._catalog.record(item_id) for item_id in self.search_ids(q, min_price, max_price)]
+
+    def search_json(self, q: str, min_price=None, max_price=None) -> List[bytes]:
+        """Like search(), with the JSON of each item"""
+        return [self._json[item_id] for item_id in self.search_ids(q, min_price, max_price)]
+
+    def stats(self, min_price=None, max_price=None, bins: int = 10, date_bucket: str = "month") -> dict:
+        """Aggregates of the catalog (see ItemCatalog.stats)"""
+        return self._catalog.stats(min_price, max_price, bins, date_bucket)
+
+    def snapshot(self) -> Iterator[dict]:
+        """Every item as of now; the dicts are built while iterating, which may happen in another thread"""
+        catalog = self._catalog.copy()
+        return (catalog.record(item_id) for item_id in catalog.ids() if item_id in catalog)
+
+    def max_id(self) -> int:
+        """Highest item ID in the store (0 if the store is empty)"""
+        return self._sorted_ids[-1] if self._sorted_ids else 0
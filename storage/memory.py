@@ -0,0 +1,219 @@
+import time
+from typing import List, Optional
+
+from .base import ConflictError, Encoder, ItemRepository, JSONPage, Operation, Page, UserRepository
+from .changelog import ChangeLog
+from .item_store import ItemStore
+from .user_store import UserStore
+
+
+class MemoryItemRepository(ItemRepository):
+    """
+    Items kept in this process's memory (fast, but lost on restart and per worker)
+
+    The store was built with the same encoder, so the *_json methods return
+    the JSON computed when each item was written.
+
+    With a `changelog` (PERSIST_DIR), every change is also logged and
+    written to disk in the background (write-behind), so the items survive
+    a restart; see storage/changelog.py.
+    """
+
+    def __init__(self, store: ItemStore, encoder: Encoder, changelog: Optional[ChangeLog] = None):
+        self.store = store
+        self.encoder = encoder
+        self.changelog = changelog
+        if changelog is not None:
+            changelog.snapshot_source = store.snapshot
+            changelog.max_id_source = lambda: self._item_id_counter
+        self._item_id_counter = store.max_id()
+        self._version = time.time_ns()  # From the clock: after a restart (fresh data) old ETags never match
+
+    def replay(self, entries: List[dict]) -> None:
+        """Apply the change log entries read at startup (ChangeLog.recover)"""
+        for entry in entries:
+            if entry["op"] == "put":
+                record = entry["record"]
+                if self.store.get(record["item_id"]) is None:
+                    self.store.add(record)
+                else:
+                    self.store.update(record["item_id"], {"tax_price": None, **record})
+            elif entry["op"] == "delete":
+                self.store.delete(entry["key"], compact=False)
+            # The counter is logged, not taken from the items left: the ID of a
+            # deleted item is never given out again (like SQLite's AUTOINCREMENT)
+            self._item_id_counter = max(self._item_id_counter, entry.get("max_id", 0))
+        self.store.compact()
+        self._item_id_counter = max(self._item_id_counter, self.store.max_id())
+
+    def _log(self, op: str, record: Optional[dict]) -> None:
+        if self.changelog is not None and record is not None:
+            if op == "delete":
+                self.changelog.delete(record["item_id"])
+            elif op == "create":
+                self.changelog.put(record, max_id=self._item_id_counter)
+            else:
+                self.changelog.put(record)
+
+    async def get(self, item_id: int) -> Optional[dict]:
+        return self.store.get(item_id)
+
+    async def create(self, data: dict) -> dict:
+        self._version += 1
+        self._item_id_counter += 1
+        record = self.store.add(dict(data, item_id=self._item_id_counter))
+        self._log("create", record)
+        return record
+
+    async def bulk(self, operations: List[Operation]) -> List[Optional[dict]]:
+        # No await inside: the whole batch runs without other requests in between
+        self._version += 1
+        results = []
+        for op, item_id, data in operations:
+            if op == "create":
+                self._item_id_counter += 1
+                results.append(self.store.add(dict(data, item_id=self._item_id_counter)))
+            elif op == "update":
+                results.append(self.store.update(item_id, data))
+            else:
+                results.append(self.store.delete(item_id, compact=False))
+            self._log(op, results[-1])
+        self.store.compact()
+        return results
+
+    async def slice(self, skip: int, limit: int) -> Page:
+        return self.store.slice(skip, limit)
+
+    async def page_after(self, after_id: Optional[int], limit: int) -> Page:
+        return self.store.page_after(after_id, limit)
+
+    async def search(self, q: str, min_price=None, max_price=None) -> List[dict]:
+        return self.store.search(q, min_price, max_price)
+
+    async def count(self) -> int:
+        return len(self.store)
+
+    async def version(self) -> int:
+        return self._version
+
+    async def get_json(self, item_id: int) -> Optional[bytes]:
+        return self.store.get_json(item_id)
+
+    async def slice_json(self, skip: int, limit: int) -> JSONPage:
+        return self.store.slice_json(skip, limit)
+
+    async def page_after_json(self, after_id: Optional[int], limit: int) -> JSONPage:
+        return self.store.page_after_json(after_id, limit)
+
+    async def search_json(self, q: str, min_price=None, max_price=None) -> List[bytes]:
+        return self.store.search_json(q, min_price, max_price)
+
+    async def close(self) -> None:
+        if self.changelog is not None:
+            await self.changelog.close()  # Whatever is still pending reaches the disk
+
+    async def stats(self, min_price=None, max_price=None, bins: int = 10, date_bucket: str = "month") -> dict:
+        return self.store.stats(min_price, max_price, bins, date_bucket)
+
+
+class MemoryUserRepository(UserRepository):
+    """
+    Users kept in this process's memory (fast, but lost on restart and per worker)
+
+    With a `changelog` (PERSIST_DIR), changes are logged and written to disk
+    in the background, like MemoryItemRepository.
+    """
+
+    def __init__(self, store: UserStore, encoder: Encoder, changelog: Optional[ChangeLog] = None):
+        self.store = store
+        self.encoder = encoder
+        self.changelog = changelog
+        if changelog is not None:
+            changelog.snapshot_source = store.snapshot
+        self._version = time.time_ns()  # From the clock: after a restart (fresh data) old ETags never match
+
+    def replay(self, entries: List[dict]) -> None:
+        """Apply the change log entries read at startup (ChangeLog.recover)"""
+        for entry in entries:
+            if entry["op"] == "put":
+                record = entry["record"]
+                if self.store.get(record["id"]) is None:
+                    self.store.add(record)
+                else:
+                    self.store.update(record["id"], {key: value for key, value in record.items() if key != "id"})
+            elif entry["op"] == "delete":
+                self.store.delete(entry["key"], compact=False)
+        self.store.compact()
+
+    def _log(self, op: str, record) -> None:
+        if self.changelog is not None and isinstance(record, dict):  # Not a None or a ConflictError
+            if op == "delete":
+                self.changelog.delete(str(record["id"]))
+            else:
+                self.changelog.put(record)
+
+    async def get(self, user_id) -> Optional[dict]:
+        return self.store.get(user_id)
+
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        return self.store.get_by_email(email)
+
+    async def add(self, record: dict) -> dict:
+        self._version += 1
+        record = self.store.add(record)
+        self._log("create", record)
+        return record
+
+    async def update(self, user_id, changes: dict) -> Optional[dict]:
+        self._version += 1
+        record = self.store.update(user_id, changes)
+        self._log("update", record)
+        return record
+
+    async def delete(self, user_id) -> Optional[dict]:
+        self._version += 1
+        record = self.store.delete(user_id)
+        self._log("delete", record)
+        return record
+
+    async def bulk(self, operations: List[Operation]) -> List[Optional[dict]]:
+        self._version += 1
+        results = []
+        for op, user_id, data in operations:
+            try:
+                if op == "create":
+                    results.append(self.store.add(data))
+                elif op == "update":
+                    results.append(self.store.update(user_id, data))
+                else:
+                    results.append(self.store.delete(user_id, compact=False))
+            except ConflictError as exc:
+                results.append(exc)
+            self._log(op, results[-1])
+        self.store.compact()
+        return results
+
+    async def slice(self, skip: int, limit: int) -> Page:
+        return self.store.slice(skip, limit)
+
+    async def page_after(self, after_seq: Optional[int], limit: int) -> Page:
+        return self.store.page_after(after_seq, limit)
+
+    async def count(self) -> int:
+        return len(self.store)
+
+    async def version(self) -> int:
+        return self._version
+
+    async def get_json(self, user_id) -> Optional[bytes]:
+        return self.store.get_json(user_id)
+
+    async def slice_json(self, skip: int, limit: int) -> JSONPage:
+        return self.store.slice_json(skip, limit)
+
+    async def page_after_json(self, after_seq: Optional[int], limit: int) -> JSONPage:
+        return self.store.page_after_json(after_seq, limit)
+
+    async def close(self) -> None:
+        if self.changelog is not None:
+            await self.changelog.close()
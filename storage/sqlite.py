@@ -0,0 +1,503 @@
+import asyncio
+import json
+import os
+import sqlite3
+from typing import Callable, List, Optional, TypeVar
+
+from .base import ConflictError, Encoder, ItemRepository, Operation, Page, UserRepository
+from .item_catalog import DATE_BUCKETS, histogram_edges
+from .user_store import as_uuid
+
+T = TypeVar("T")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    item_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    name         TEXT NOT NULL,
+    price        REAL,
+    release_date TEXT,
+    tax_price    REAL
+);
+CREATE INDEX IF NOT EXISTS items_price ON items (price);
+
+CREATE TABLE IF NOT EXISTS users (
+    seq    INTEGER PRIMARY KEY AUTOINCREMENT,  -- Insertion order, used by cursors
+    id     TEXT NOT NULL UNIQUE,
+    name   TEXT NOT NULL,
+    email  TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1,
+    roles  TEXT NOT NULL DEFAULT '[]',         -- JSON list
+    edad   INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS users_email ON users (lower(email));  -- Unique, any case
+
+-- One counter per table, +1 on every write transaction (used for HTTP ETags)
+CREATE TABLE IF NOT EXISTS versions (
+    name    TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO versions (name, version) VALUES ('items', 0), ('users', 0);
+"""
+
+# Trigram full-text index over item names: substring search without a full scan
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(name, content='items', content_rowid='item_id', tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts (rowid, name) VALUES (new.item_id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+    INSERT INTO items_fts (items_fts, rowid, name) VALUES ('delete', old.item_id, old.name);
+END;
+CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF name ON items BEGIN
+    INSERT INTO items_fts (items_fts, rowid, name) VALUES ('delete', old.item_id, old.name);
+    INSERT INTO items_fts (rowid, name) VALUES (new.item_id, new.name);
+END;
+"""
+
+# SQL is written once as constants: sqlite3 keeps a per-connection cache of
+# prepared statements (cached_statements), so each one is compiled only once
+ITEM_COLUMNS = "item_id, name, price, release_date, tax_price"
+SQL_ITEM_GET = f"SELECT {ITEM_COLUMNS} FROM items WHERE item_id = ?"
+SQL_ITEM_SEED = "INSERT INTO items (item_id, name, price, release_date, tax_price) VALUES (?, ?, ?, ?, ?)"
+SQL_ITEM_INSERT = "INSERT INTO items (name, price, release_date, tax_price) VALUES (?, ?, ?, ?)"
+SQL_ITEM_DELETE = "DELETE FROM items WHERE item_id = ?"
+ITEM_UPDATABLE = ("name", "price", "release_date", "tax_price")
+SQL_ITEM_SLICE = f"SELECT {ITEM_COLUMNS} FROM items ORDER BY item_id LIMIT ? OFFSET ?"
+SQL_ITEM_PAGE_AFTER = f"SELECT {ITEM_COLUMNS} FROM items WHERE item_id > ? ORDER BY item_id LIMIT ?"
+SQL_ITEM_COUNT = "SELECT COUNT(*) FROM items"
+SQL_ITEM_SEARCH_FTS = (
+    f"SELECT {ITEM_COLUMNS} FROM items WHERE item_id IN (SELECT rowid FROM items_fts WHERE items_fts MATCH ?) "
+    "AND price >= ? AND price <= ? ORDER BY item_id"
+)
+SQL_ITEM_SEARCH_SCAN = (
+    f"SELECT {ITEM_COLUMNS} FROM items WHERE instr(lower(name), ?) > 0 "
+    "AND price >= ? AND price <= ? ORDER BY item_id"
+)
+
+SQL_ITEM_STATS = "SELECT COUNT(*), MIN(price), MAX(price), AVG(price) FROM items"
+SQL_ITEM_PRICE_RANGE = " WHERE price >= ? AND price <= ?"
+
+SQL_VERSION_GET = "SELECT version FROM versions WHERE name = ?"
+SQL_VERSION_BUMP = "UPDATE versions SET version = version + 1 WHERE name = ?"
+
+USER_COLUMNS = "seq, id, name, email, active, roles, edad"
+SQL_USER_GET = f"SELECT {USER_COLUMNS} FROM users WHERE id = ?"
+SQL_USER_GET_BY_EMAIL = f"SELECT {USER_COLUMNS} FROM users WHERE lower(email) = lower(?)"
+SQL_USER_INSERT = "INSERT INTO users (id, name, email, active, roles, edad) VALUES (?, ?, ?, ?, ?, ?)"
+SQL_USER_DELETE = "DELETE FROM users WHERE id = ?"
+SQL_USER_SLICE = f"SELECT {USER_COLUMNS} FROM users ORDER BY seq LIMIT ? OFFSET ?"
+SQL_USER_PAGE_AFTER = f"SELECT {USER_COLUMNS} FROM users WHERE seq > ? ORDER BY seq LIMIT ?"
+SQL_USER_COUNT = "SELECT COUNT(*) FROM users"
+USER_UPDATABLE = ("name", "email", "active", "roles", "edad")
+
+
+class SQLitePool:
+    """
+    Async access to one SQLite database file, in WAL mode
+
+    - Readers: a pool of connections handed out through an asyncio.Queue;
+      WAL lets them read while a write is in progress, even from other
+      worker processes.
+    - Writer: SQLite allows a single writer at a time, so writes go through
+      one connection behind an asyncio.Lock (no SQLITE_BUSY ping-pong inside
+      a worker; busy_timeout covers the other workers). The items and users
+      repositories share the pool of their database file (see
+      storage/__init__.py), so that is one writer per worker process.
+    - The blocking sqlite3 calls run in threads (asyncio.to_thread), so the
+      event loop keeps serving other requests. A connection (and the write
+      lock) is only given back once its thread is done, even when the
+      request that started it is cancelled.
+    """
+
+    def __init__(self, path: str, size: int = 4):
+        self.path = path
+        self.size = size
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write_lock = asyncio.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._readers: Optional[asyncio.Queue] = None
+        self._all: List[sqlite3.Connection] = []
+
+    def _open(self) -> None:
+        # Connections are (re)opened on first use, so the pool survives a
+        # close() at shutdown followed by a new startup in the same process
+        if self._writer is not None:
+            return
+        self._writer = self._connect()
+        self._readers = asyncio.Queue()
+        self._all = [self._writer]
+        for _ in range(self.size):
+            connection = self._connect()
+            self._all.append(connection)
+            self._readers.put_nowait(connection)
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: autocommit, we open write transactions ourselves
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, cached_statements=256)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, much faster than FULL
+        connection.execute("PRAGMA busy_timeout=5000")
+        return connection
+
+    def run_script(self, script: str) -> None:
+        """Run DDL on the writer connection (startup only, blocking)"""
+        self._open()
+        self._writer.executescript(script)
+
+    def setup(self, work: Callable[[sqlite3.Connection], T]) -> T:
+        """Run work in a write transaction right away (startup only, blocking)"""
+        self._open()
+        return self._in_transaction(work)
+
+    @staticmethod
+    async def _in_thread(func: Callable[..., T], *args) -> T:
+        """
+        asyncio.to_thread, but a cancelled caller still waits for the thread
+
+        Cancelling the await does not stop the thread: without this, the
+        connection would go back to the pool (or the write lock be released)
+        while the thread is still using it.
+        """
+        task = asyncio.ensure_future(asyncio.to_thread(func, *args))
+        try:
+            return await asyncio.shield(task)
+        finally:
+            while not task.done():
+                try:
+                    await asyncio.wait([task])
+                except asyncio.CancelledError:
+                    pass  # Cancelled again: still wait, the original cancellation is re-raised after
+            if not task.cancelled():
+                task.exception()  # Retrieved: a failure seen by no one is not logged as "never retrieved"
+
+    async def read(self, work: Callable[[sqlite3.Connection], T]) -> T:
+        self._open()
+        connection = await self._readers.get()
+        try:
+            return await self._in_thread(work, connection)
+        finally:
+            self._readers.put_nowait(connection)
+
+    async def write(self, work: Callable[[sqlite3.Connection], T], bump: Optional[str] = None) -> T:
+        """Run work in a write transaction; `bump` names the version counter to increment"""
+        async with self._write_lock:
+            self._open()
+            return await self._in_thread(self._in_transaction, work, bump)
+
+    def _in_transaction(self, work: Callable[[sqlite3.Connection], T], bump: Optional[str] = None) -> T:
+        self._writer.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(self._writer)
+            if bump is not None:
+                self._writer.execute(SQL_VERSION_BUMP, (bump,))
+        except BaseException:
+            self._writer.execute("ROLLBACK")
+            raise
+        self._writer.execute("COMMIT")
+        return result
+
+    def close(self) -> None:
+        for connection in self._all:
+            connection.close()
+        self._writer, self._readers, self._all = None, None, []
+        self._write_lock = asyncio.Lock()
+
+
+def _fts_available(pool: SQLitePool) -> bool:
+    try:
+        pool.run_script(FTS_SCHEMA)
+        return True
+    except sqlite3.OperationalError:  # SQLite built without FTS5 or older than 3.34
+        return False
+
+
+def _seed_if_empty(db: sqlite3.Connection, table: str, sql: str, rows: list) -> None:
+    # Only a brand-new database gets the demo data; an existing one keeps its rows
+    if db.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None:
+        db.executemany(sql, rows)
+
+
+def _item_from_row(row) -> dict:
+    item_id, name, price, release_date, tax_price = row
+    record = {"item_id": item_id, "name": name, "price": price, "release_date": release_date}
+    if tax_price is not None:
+        record["tax_price"] = tax_price
+    return record
+
+
+def _user_from_row(row) -> dict:
+    _, user_id, name, email, active, roles, edad = row
+    return {"id": user_id, "name": name, "email": email, "active": bool(active), "roles": json.loads(roles), "edad": edad}
+
+
+def _to_db_price(value):
+    return None if value is None else float(value)
+
+
+def _to_db_date(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _item_value(column: str, value):
+    if column == "release_date":
+        return _to_db_date(value)
+    return value if column == "name" else _to_db_price(value)
+
+
+def _insert_item(db: sqlite3.Connection, data: dict) -> dict:
+    params = (data["name"], _to_db_price(data.get("price")), _to_db_date(data.get("release_date")),
+              _to_db_price(data.get("tax_price")))
+    return dict(data, item_id=db.execute(SQL_ITEM_INSERT, params).lastrowid)
+
+
+def _update_item(db: sqlite3.Connection, item_id: int, changes: dict) -> Optional[dict]:
+    columns = [column for column in ITEM_UPDATABLE if column in changes]
+    if columns:
+        values = [_item_value(column, changes[column]) for column in columns]
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        db.execute(f"UPDATE items SET {assignments} WHERE item_id = ?", (*values, item_id))
+    row = db.execute(SQL_ITEM_GET, (item_id,)).fetchone()
+    return _item_from_row(row) if row else None
+
+
+def _delete_item(db: sqlite3.Connection, item_id: int) -> Optional[dict]:
+    row = db.execute(SQL_ITEM_GET, (item_id,)).fetchone()
+    if row:
+        db.execute(SQL_ITEM_DELETE, (item_id,))
+    return _item_from_row(row) if row else None
+
+
+def _item_stats(db: sqlite3.Connection, min_price, max_price, bins: int, date_bucket: str) -> dict:
+    # Same answer as ItemCatalog.stats, with SQL aggregates (one scan each, no rows sent back)
+    where, params = "", ()
+    if min_price is not None or max_price is not None:
+        where = SQL_ITEM_PRICE_RANGE
+        params = (float("-inf") if min_price is None else float(min_price),
+                  float("inf") if max_price is None else float(max_price))
+    count, low, high, avg = db.execute(SQL_ITEM_STATS + where, params).fetchone()
+
+    histogram = []
+    if low is not None:
+        # Bin i is [edge i, edge i+1), the last one also takes the max: counted in one pass
+        edges = histogram_edges(low, high, bins)
+        terms = ["SUM(price >= ? AND price < ?)" for _ in edges[1:-1]] + ["SUM(price >= ?)"]
+        bounds = [bound for i in range(len(edges) - 2) for bound in (edges[i], edges[i + 1])] + [edges[-2]]
+        condition = (where + " AND" if where else " WHERE") + " price IS NOT NULL"
+        counts = db.execute(f"SELECT {', '.join(terms)} FROM items{condition}", (*bounds, *params)).fetchone()
+        histogram = [
+            {"min": round(edges[i], 2), "max": round(edges[i + 1], 2), "count": counts[i] or 0}
+            for i in range(len(edges) - 1)
+        ]
+
+    # release_date is stored as ISO text in its own timezone: its prefix is the local year/month/day
+    condition = (where + " AND" if where else " WHERE") + " release_date IS NOT NULL"
+    periods = db.execute(
+        f"SELECT substr(release_date, 1, {DATE_BUCKETS[date_bucket]}) AS period, COUNT(*) "
+        f"FROM items{condition} GROUP BY period ORDER BY period",
+        params,
+    ).fetchall()
+    return {
+        "count": count,
+        "min_price": low,
+        "max_price": high,
+        "avg_price": None if avg is None else round(avg, 2),
+        "price_histogram": histogram,
+        "release_dates": {
+            "bucket": date_bucket,
+            "buckets": [{"period": period, "count": n} for period, n in periods],
+            "undated": count - sum(n for _, n in periods),
+        },
+    }
+
+
+def _user_key(user_id) -> str:
+    # IDs are stored in the canonical UUID form; an invalid ID matches nothing
+    key = as_uuid(user_id)
+    return "" if key is None else str(key)
+
+
+def _user_params(record: dict) -> tuple:
+    return (_user_key(record["id"]), record["name"], record["email"], int(record.get("active", True)),
+            json.dumps(sorted(record.get("roles", []))), record.get("edad"))
+
+
+def _email_conflict(exc: sqlite3.IntegrityError, email) -> Exception:
+    if "users_email" in str(exc) or "lower(email)" in str(exc):
+        return ConflictError(f"Email {email} is already in use")
+    return exc
+
+
+def _insert_user(db: sqlite3.Connection, record: dict) -> dict:
+    try:
+        db.execute(SQL_USER_INSERT, _user_params(record))
+    except sqlite3.IntegrityError as exc:
+        raise _email_conflict(exc, record["email"]) from None
+    return record
+
+
+def _update_user(db: sqlite3.Connection, user_id, changes: dict) -> Optional[dict]:
+    columns = [column for column in USER_UPDATABLE if column in changes]
+    if columns:
+        values = [json.dumps(sorted(changes[c])) if c == "roles" else changes[c] for c in columns]
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        try:
+            db.execute(f"UPDATE users SET {assignments} WHERE id = ?", (*values, _user_key(user_id)))
+        except sqlite3.IntegrityError as exc:
+            raise _email_conflict(exc, changes.get("email")) from None
+    row = db.execute(SQL_USER_GET, (_user_key(user_id),)).fetchone()
+    return _user_from_row(row) if row else None
+
+
+def _delete_user(db: sqlite3.Connection, user_id) -> Optional[dict]:
+    row = db.execute(SQL_USER_GET, (_user_key(user_id),)).fetchone()
+    if row:
+        db.execute(SQL_USER_DELETE, (_user_key(user_id),))
+    return _user_from_row(row) if row else None
+
+
+class SQLiteItemRepository(ItemRepository):
+    """Items in a SQLite table, shared by every worker process and kept across restarts"""
+
+    def __init__(self, pool: SQLitePool, encoder: Encoder, seed: Optional[List[dict]] = None):
+        self.pool = pool
+        self.encoder = encoder  # Rows are serialized when read (other workers may change them)
+        pool.run_script(SCHEMA)
+        self.fts = _fts_available(pool)
+        if seed:
+            rows = [(r["item_id"], r["name"], _to_db_price(r.get("price")), _to_db_date(r.get("release_date")),
+                     _to_db_price(r.get("tax_price"))) for r in seed]
+            pool.setup(lambda db: _seed_if_empty(db, "items", SQL_ITEM_SEED, rows))
+
+    async def get(self, item_id: int) -> Optional[dict]:
+        row = await self.pool.read(lambda db: db.execute(SQL_ITEM_GET, (item_id,)).fetchone())
+        return _item_from_row(row) if row else None
+
+    async def create(self, data: dict) -> dict:
+        return await self.pool.write(lambda db: _insert_item(db, data), bump="items")
+
+    async def bulk(self, operations: List[Operation]) -> List[Optional[dict]]:
+        # One transaction (one commit, one WAL sync) for the whole batch
+        def work(db):
+            results = []
+            for op, item_id, data in operations:
+                if op == "create":
+                    results.append(_insert_item(db, data))
+                elif op == "update":
+                    results.append(_update_item(db, item_id, data))
+                else:
+                    results.append(_delete_item(db, item_id))
+            return results
+
+        return await self.pool.write(work, bump="items")
+
+    async def slice(self, skip: int, limit: int) -> Page:
+        rows = await self.pool.read(lambda db: db.execute(SQL_ITEM_SLICE, (limit + 1, skip)).fetchall())
+        return self._page(rows, limit)
+
+    async def page_after(self, after_id: Optional[int], limit: int) -> Page:
+        after = -1 if after_id is None else after_id
+        rows = await self.pool.read(lambda db: db.execute(SQL_ITEM_PAGE_AFTER, (after, limit + 1)).fetchall())
+        return self._page(rows, limit)
+
+    @staticmethod
+    def _page(rows, limit: int) -> Page:
+        # We asked for one extra row: it only tells us whether there is a next page
+        page = [_item_from_row(row) for row in rows[:limit]]
+        return page, (page[-1]["item_id"] if len(rows) > limit else None)
+
+    async def search(self, q: str, min_price=None, max_price=None) -> List[dict]:
+        low = float("-inf") if min_price is None else float(min_price)
+        high = float("inf") if max_price is None else float(max_price)
+        query = q.lower()
+        if self.fts and len(query) >= 3:
+            # A quoted phrase in a trigram index = "contains this substring"
+            sql, needle = SQL_ITEM_SEARCH_FTS, '"' + query.replace('"', '""') + '"'
+        else:
+            sql, needle = SQL_ITEM_SEARCH_SCAN, query
+        rows = await self.pool.read(lambda db: db.execute(sql, (needle, low, high)).fetchall())
+        return [_item_from_row(row) for row in rows]
+
+    async def stats(self, min_price=None, max_price=None, bins: int = 10, date_bucket: str = "month") -> dict:
+        return await self.pool.read(lambda db: _item_stats(db, min_price, max_price, bins, date_bucket))
+
+    async def count(self) -> int:
+        return await self.pool.read(lambda db: db.execute(SQL_ITEM_COUNT).fetchone()[0])
+
+    async def version(self) -> int:
+        # Read from the database: writes from other worker processes count too
+        return await self.pool.read(lambda db: db.execute(SQL_VERSION_GET, ("items",)).fetchone()[0])
+
+    async def close(self) -> None:
+        self.pool.close()
+
+
+class SQLiteUserRepository(UserRepository):
+    """Users in a SQLite table, shared by every worker process and kept across restarts"""
+
+    def __init__(self, pool: SQLitePool, encoder: Encoder, seed: Optional[List[dict]] = None):
+        self.pool = pool
+        self.encoder = encoder
+        pool.run_script(SCHEMA)
+        if seed:
+            rows = [_user_params(record) for record in seed]
+            pool.setup(lambda db: _seed_if_empty(db, "users", SQL_USER_INSERT, rows))
+
+    async def get(self, user_id) -> Optional[dict]:
+        row = await self.pool.read(lambda db: db.execute(SQL_USER_GET, (_user_key(user_id),)).fetchone())
+        return _user_from_row(row) if row else None
+
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        row = await self.pool.read(lambda db: db.execute(SQL_USER_GET_BY_EMAIL, (email.strip(),)).fetchone())
+        return _user_from_row(row) if row else None
+
+    async def add(self, record: dict) -> dict:
+        return await self.pool.write(lambda db: _insert_user(db, record), bump="users")
+
+    async def update(self, user_id, changes: dict) -> Optional[dict]:
+        return await self.pool.write(lambda db: _update_user(db, user_id, changes), bump="users")
+
+    async def delete(self, user_id) -> Optional[dict]:
+        return await self.pool.write(lambda db: _delete_user(db, user_id), bump="users")
+
+    async def bulk(self, operations: List[Operation]) -> List[Optional[dict]]:
+        # One transaction (one commit, one WAL sync) for the whole batch
+        def work(db):
+            results = []
+            for op, user_id, data in operations:
+                try:
+                    if op == "create":
+                        results.append(_insert_user(db, data))
+                    elif op == "update":
+                        results.append(_update_user(db, user_id, data))
+                    else:
+                        results.append(_delete_user(db, user_id))
+                except ConflictError as exc:
+                    results.append(exc)  # A failed statement doesn't roll back the others
+            return results
+
+        return await self.pool.write(work, bump="users")
+
+    async def slice(self, skip: int, limit: int) -> Page:
+        rows = await self.pool.read(lambda db: db.execute(SQL_USER_SLICE, (limit + 1, skip)).fetchall())
+        return self._page(rows, limit)
+
+    async def page_after(self, after_seq: Optional[int], limit: int) -> Page:
+        after = -1 if after_seq is None else after_seq
+        rows = await self.pool.read(lambda db: db.execute(SQL_USER_PAGE_AFTER, (after, limit + 1)).fetchall())
+        return self._page(rows, limit)
+
+    @staticmethod
+    def _page(rows, limit: int) -> Page:
+        page = rows[:limit]
+        next_after = page[-1][0] if len(rows) > limit else None  # seq of the last row
+        return [_user_from_row(row) for row in page], next_after
+
+    async def count(self) -> int:
+        return await self.pool.read(lambda db: db.execute(SQL_USER_COUNT).fetchone()[0])
+
+    async def version(self) -> int:
+        return await self.pool.read(lambda db: db.execute(SQL_VERSION_GET, ("users",)).fetchone()[0])
+
+    async def close(self) -> None:
+        self.pool.close()
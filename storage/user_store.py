@@ -0,0 +1,172 @@
+from bisect import bisect_right
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from .base import ConflictError
+
+
+def as_uuid(user_id) -> Optional[UUID]:
+    """The UUID of a user ID given as UUID or string (None if it isn't a valid UUID)"""
+    if isinstance(user_id, UUID):
+        return user_id
+    try:
+        return UUID(str(user_id))
+    except ValueError:
+        return None
+
+
+def email_key(email: str) -> str:
+    """Emails are unique regardless of case: John@Example.com == john@example.com"""
+    return email.strip().lower()
+
+
+class UserStore:
+    """
+    In-memory user repository with UUID → record and email → record indexes
+
+    Both indexes are dictionaries, so a lookup costs the same with 3 users
+    or with 1 million. IDs are normalized to `UUID` (the records may hold
+    them as strings) and emails are unique, case-insensitively.
+
+    Users don't have an increasing ID (they use UUIDs), so every user gets
+    an internal sequence number when it is stored. The sequence follows
+    insertion order and is what cursors point at, so keyset pagination
+    returns users in the same order as the plain list.
+
+    With an `encoder`, the JSON of every user is also computed when it is
+    written (and kept up to date on changes), so reads can send it as is.
+    """
+
+    def __init__(self, records: Optional[List[dict]] = None, encoder: Optional[Callable[[dict], bytes]] = None):
+        # We keep a reference to the list we receive, we don't copy it
+        self._records = records if records is not None else []
+        self._encoder = encoder
+        self._json: Dict[int, bytes] = {}  # sequence number → JSON of the user
+        self._by_id: Dict[UUID, dict] = {}
+        self._by_email: Dict[str, dict] = {}
+        self._seq_of: Dict[UUID, int] = {}  # user id → sequence number
+        self._by_seq: Dict[int, dict] = {}  # sequence number → user
+        self._seqs: List[int] = []  # Always sorted (sequences only grow)
+        self._next_seq = 1
+        for record in self._records:
+            self._track(record)
+
+    def _track(self, record: dict) -> None:
+        key = as_uuid(record["id"])
+        if key is None:
+            raise ValueError(f"User ID {record['id']!r} is not a UUID")
+        if key in self._by_id:
+            raise ValueError(f"User {record['id']} already exists")
+        self._check_email(record["email"], None)
+        seq = self._next_seq
+        self._next_seq += 1
+        self._by_id[key] = record
+        self._by_email[email_key(record["email"])] = record
+        self._encode(seq, record)
+        self._seq_of[key] = seq
+        self._by_seq[seq] = record
+        self._seqs.append(seq)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._records)
+
+    def _encode(self, seq: int, record: dict) -> None:
+        if self._encoder is not None:
+            self._json[seq] = self._encoder(record)
+
+    def _check_email(self, email: str, owner: Optional[dict]) -> None:
+        existing = self._by_email.get(email_key(email))
+        if existing is not None and existing is not owner:
+            raise ConflictError(f"Email {email} is already in use")
+
+    def get(self, user_id) -> Optional[dict]:
+        """Return the user with this ID (UUID or string), or None if it does not exist"""
+        return self._by_id.get(as_uuid(user_id))
+
+    def get_by_email(self, email: str) -> Optional[dict]:
+        """Return the user with this email (any case), or None"""
+        return self._by_email.get(email_key(email))
+
+    def add(self, record: dict) -> dict:
+        """Add a new user, keeping the list and the indexes in sync"""
+        self._track(record)  # Validates the ID and the email before touching the list
+        self._records.append(record)
+        return record
+
+    def update(self, user_id, changes: dict) -> Optional[dict]:
+        """Update a user in place; returns it, or None if it does not exist"""
+        key = as_uuid(user_id)
+        record = self._by_id.get(key)
+        if record is None:
+            return None
+        if "email" in changes:
+            self._check_email(changes["email"], record)
+            del self._by_email[email_key(record["email"])]
+            self._by_email[email_key(changes["email"])] = record
+        record.update(changes)
+        self._encode(self._seq_of[key], record)
+        return record
+
+    def delete(self, user_id, compact: bool = True) -> Optional[dict]:
+        """
+        Remove a user from the indexes; returns it, or None if it does not exist
+
+        Taking it out of the list is O(n), so when many users are deleted in
+        a row pass compact=False and call compact() once at the end.
+        """
+        key = as_uuid(user_id)
+        record = self._by_id.pop(key, None)
+        if record is None:
+            return None
+        del self._by_email[email_key(record["email"])]
+        seq = self._seq_of.pop(key)
+        del self._by_seq[seq]
+        self._json.pop(seq, None)
+        if compact:
+            self.compact()
+        return record
+
+    def compact(self) -> None:
+        """Drop deleted users from the list (in place, it may be shared) and the sequences"""
+        if len(self._records) != len(self._by_id):
+            # The list is in sequence order, so it can be rebuilt from the live sequences
+            self._seqs = [seq for seq in self._seqs if seq in self._by_seq]
+            self._records[:] = [self._by_seq[seq] for seq in self._seqs]
+
+    def snapshot(self) -> List[dict]:
+        """Copies of every user as of now (updates change the records in place, the copies don't)"""
+        return [dict(record) for record in self._records]
+
+    def get_json(self, user_id) -> Optional[bytes]:
+        """The JSON computed at write time for this user (needs an encoder), or None"""
+        seq = self._seq_of.get(as_uuid(user_id))
+        return None if seq is None else self._json.get(seq)
+
+    def slice_json(self, skip: int, limit: int) -> Tuple[List[bytes], Optional[int]]:
+        """Like slice(), with the JSON of each user (the list and the sequences are in the same order)"""
+        seqs = self._seqs[skip : skip + limit]
+        next_after = seqs[-1] if seqs and skip + limit < len(self._seqs) else None
+        return [self._json[seq] for seq in seqs], next_after
+
+    def page_after_json(self, after_seq: Optional[int], limit: int) -> Tuple[List[bytes], Optional[int]]:
+        """Like page_after(), with the JSON of each user"""
+        start = 0 if after_seq is None else bisect_right(self._seqs, after_seq)
+        seqs = self._seqs[start : start + limit]
+        next_after = seqs[-1] if seqs and start + limit < len(self._seqs) else None
+        return [self._json[seq] for seq in seqs], next_after
+
+    def slice(self, skip: int, limit: int) -> Tuple[List[dict], Optional[int]]:
+        """Offset pagination: the page and the key to continue from with a cursor"""
+        page = self._records[skip : skip + limit]
+        next_after = self._seq_of[as_uuid(page[-1]["id"])] if page and skip + limit < len(self._records) else None
+        return page, next_after
+
+    def page_after(self, after_seq: Optional[int], limit: int) -> Tuple[List[dict], Optional[int]]:
+        """Keyset pagination: up to `limit` users stored after `after_seq`"""
+        start = 0 if after_seq is None else bisect_right(self._seqs, after_seq)
+        seqs = self._seqs[start : start + limit]
+        next_after = seqs[-1] if seqs and start + limit < len(self._seqs) else None
+        return [self._by_seq[seq] for seq in seqs], next_after